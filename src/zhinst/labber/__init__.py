@@ -1,7 +1,34 @@
 """The Zurich Instruments Labber driver package (zhinst-labber)"""
+import importlib
+import typing as t
+
 try:
     from zhinst.labber._version import version as __version__
 except ModuleNotFoundError:
     __version__ = "dev"
-from zhinst.labber.generator import generate_labber_files
-from zhinst.labber.helper import export_waveforms
+
+if t.TYPE_CHECKING:
+    from zhinst.labber.generator import generate_labber_files
+    from zhinst.labber.helper import export_waveforms
+
+# The drivers only need ``zhinst.labber.driver``. The generator stack (jinja2,
+# black, ...) and the helpers are imported on first access.
+_LAZY_ATTRIBUTES = {
+    "generate_labber_files": "zhinst.labber.generator",
+    "export_waveforms": "zhinst.labber.helper",
+}
+
+__all__ = ["__version__", *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name: str) -> t.Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> t.List[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
@@ -1,6 +1,16 @@
+import typing as t
+
 import click
 
-from zhinst.labber import generate_labber_files
+
+def generate_labber_files(*args, **kwargs) -> t.Tuple[t.List[str], t.List[str]]:
+    """Generate the Labber files (see ``zhinst.labber.generate_labber_files``).
+
+    The generator is imported on first use so that ``--help`` stays fast.
+    """
+    from zhinst.labber.generator import generate_labber_files
+
+    return generate_labber_files(*args, **kwargs)
 
 
 @click.group()
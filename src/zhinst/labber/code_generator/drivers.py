@@ -1,10 +1,6 @@
 import typing as t
 from pathlib import Path
 
-import autoflake
-import black
-import jinja2
-
 
 def generate_labber_device_driver_code(
     classname: str, settings_file: t.Union[Path, str]
@@ -14,6 +10,11 @@ def generate_labber_device_driver_code(
     Generates a Python file based on:
     `zhinst/labber/code_generator/templates/device_template.py.j2`
     """
+    # the formatters are slow to import and only needed to generate drivers
+    import autoflake
+    import black
+    import jinja2
+
     data = {"class": {"name": classname}, "settings_file": settings_file}
 
     fp = Path(__file__).parent / "templates"
@@ -1,32 +1,88 @@
 """Generic Labber base driver for all drivers from Zurich Instruments."""
-import csv
-import fnmatch
+import contextlib
+import functools
 import json
 import logging
 import os
-import re
-import string
+import tempfile
+import threading
 import typing as t
-from itertools import repeat
+from concurrent.futures import Future
 from pathlib import Path
 
 import numpy as np
+import zhinst.core
 from BaseDriver import LabberDriver
 from InstrumentDriver_Interface import Interface
 from zhinst.toolkit import Session, Waveforms
-from zhinst.toolkit.driver.devices import DeviceType
-from zhinst.toolkit.driver.modules import ModuleType
 
-from zhinst.labber.driver.logger import configure_logger
-from zhinst.labber.driver.snapshot_manager import SnapshotManager, TransactionManager
+from zhinst.labber.driver.file_cache import FileCache, file_key
+from zhinst.labber.driver.hardware_loop import HardwareLoop, linear_axis
+from zhinst.labber.driver.logger import (
+    RATE_LIMIT,
+    RATE_LIMITED,
+    Payload,
+    configure_logger,
+)
+from zhinst.labber.driver.module_manager import (
+    ModulePoller,
+    RingBuffer,
+    SignalEntry,
+    SignalTable,
+    iter_chunks,
+)
+from zhinst.labber.driver.node_doc_cache import (
+    CachedNodeDocConnection,
+    NodeDocCache,
+    default_directory,
+)
+from zhinst.labber.driver.node_path import NodePath, QuantPathMap
+from zhinst.labber.driver.profiling import (
+    FORMATS,
+    MAX_PROFILES,
+    LatencyRecorder,
+    ProfileCapture,
+    measure_iter,
+    nested,
+)
+from zhinst.labber.driver.ramp import UPDATE_RATE, RampEngine
+from zhinst.labber.driver.session_broker import connect_broker
+from zhinst.labber.driver.settings_cache import load_driver_settings
+from zhinst.labber.driver.snapshot_manager import (
+    MAX_WORKERS,
+    GetBatchManager,
+    SnapshotManager,
+    TransactionManager,
+)
+from zhinst.labber.driver.tracing import MAX_EVENTS, Tracer
+from zhinst.labber.driver.upload_tracker import UploadTracker, content_hash
+from zhinst.labber.driver.waveforms import (
+    BINARY_SUFFIXES,
+    import_waveforms,
+    iter_waveform_chunks,
+    pipelined,
+)
+
+if t.TYPE_CHECKING:
+    from zhinst.toolkit.driver.devices import DeviceType
+    from zhinst.toolkit.driver.modules import ModuleType
 
 Quantity = t.TypeVar("Quantity")
-NumpyArray = t.TypeVar("NumpyArray")
 
 GLOBAL_SETTINGS = Path(__file__).parent / "../resources/settings.json"
+FILE_CACHE_SIZE = 256
+SNAPSHOT_MAX_AGE = 60
+PIPELINE_SLOTS = 48
+# Minimum size in bytes of the waveform files that are uploaded in a pipeline
+PIPELINE_MIN_SIZE = 4e6
+# Quantity types whose value is the path of an input file
+FILE_TYPES = ("JSON", "TEXT", "CSV", "CSVARRAY")
 
 created_sessions = {}
 logger = logging.getLogger(__name__)
+# The handlers are installed on the package logger so that the records of all
+# driver modules (e.g. ramps, module poller, profiling) are written as well.
+driver_logger = logging.getLogger(__name__.rpartition(".")[0])
 
 
 class BaseDevice(LabberDriver):
@@ -47,17 +103,89 @@ class BaseDevice(LabberDriver):
         * hf2: Flag if the data server is for hf2 device. (default = false)
         * shared_session: Flag if the session should be shared with Labber.
             Warning: If set to false some feature may no longer be supported.
-            (default = true)
+            "broker" shares a single session between all Labber driver
+            processes through a local broker process. Not supported by
+            LabOne modules, which use their own session. (default = true)
     * instrument: (Labber instrument specific information)
         * base_type: Base type of the instrument. (device, module, session)
         * type: Type of the module. Not used for session.
             module => name of the module in toolkit
             device => device type
+        * profile: Capture a ``cProfile`` profile of selected operations.
+            One ``.pstats`` file is written per captured operation.
+            * operations: Labber operation types (SET, GET, SET_CFG, GET_CFG).
+            * quants: Glob patterns of the quantity names.
+            * functions: Glob patterns of the function names
+                (e.g. awg/write_to_waveform_memory).
+            * directory: Directory of the profiles. Defaults to a
+                ``profiles`` folder next to the ``logger_path`` (or in the
+                temporary directory).
+            * max_files: Maximum number of profiles. (default = 20)
+            * rotate: Remove the oldest profile once the maximum is reached
+                instead of stopping the capture. (default = True)
     },
     * logger_level: Logging level of python logger. If not specified the global
         settings are used.
     * logger_path: Optional logger path where the logging information will be
         stored (in addition to the std output which is always enabled).
+    * logger_rate_limit: Maximum number of messages per second that are logged
+        for every message of the hot paths (e.g. get and set of values),
+        counted per quantity. Additional messages are suppressed. 0 disables
+        the limit.
+        (default = 10)
+    * logger_async: Format and write the log messages in a background thread
+        so that the instrument operations do not wait for the console or the
+        log file. (default = False)
+    * file_cache_size: Maximum size in MB of the cached input files (waveforms,
+        command tables, sequencer programs). 0 disables the cache.
+        (default = 256)
+    * snapshot_subscribe: Keep the snapshot used for GET_CFG alive through a
+        change subscription on a separate data server connection, instead of
+        fetching all values for every GET_CFG. Only for devices.
+        (default = False)
+    * snapshot_max_age: Maximum time in seconds the snapshot is kept alive
+        through the subscription. (default = 60)
+    * transaction_workers: Maximum number of threads that read and parse the
+        input files of the bundled functions (e.g. waveform uploads to
+        different cores) in parallel at the end of a transaction. The
+        functions themselves are called one after another. 1 parses the files
+        one after another as well. (default = 8)
+    * waveform_pipeline_slots: Maximum number of parsed waveform slots that
+        are kept in memory while large CSV waveform files (> 4 MB) are
+        uploaded. The upload starts while the files are still being parsed.
+        0 disables the pipeline. (default = 48)
+    * module_poll_interval: Interval in seconds at which a background thread
+        reads the results of a module. Reading a result quantity then returns
+        the latest results immediately. 0 reads the module on every get.
+        Only for modules. (default = 0)
+    * module_accumulate: Result quantities of a module that accumulate all
+        received data instead of only keeping the latest one. Dictionary of
+        the quantity names and the maximum number of samples that are kept
+        (e.g. {"Result - 1": 1000000}). Once the maximum is reached the oldest
+        samples are dropped. (default = {})
+    * ramp_update_rate: Number of steps per second of the ramps that are
+        performed when Labber sets a value with a sweep rate. Running ramps
+        are stopped when a transaction starts, ramps requested within a
+        transaction start once it is ended. (default = 50)
+    * node_doc_cache: Cache the node documentation of the devices on disk
+        instead of downloading it on every open. True uses a cache in the
+        user directory, a path uses the given directory. The cache is
+        invalidated when the device type, the options, the firmware or the
+        LabOne version changes. (default = False)
+    * latency_stats: Record the duration of every set, get, function call,
+        transaction, snapshot and module read in a histogram per operation
+        type and quantity (or function). The statistics are written as
+        ``json`` or ``csv`` to the directory of the ``logger_path`` (or the
+        temporary directory) when the instrument is closed.
+        (default = False, True uses json)
+    * trace: Record a timeline of the driver activity (operations,
+        transactions, bundled functions, node gets and sets, file parsing and
+        module polling) in the Chrome trace event format. The trace is
+        written when the instrument is closed, to the given path or (if True)
+        to the directory of the ``logger_path`` (or the temporary directory).
+        It can be opened in Perfetto. (default = False)
+    * trace_max_events: Maximum number of events of the trace.
+        (default = 200000)
 
     The driver will accept all arguments and forward them to the
     ``LabberDriver`` directly.
@@ -72,37 +200,89 @@ class BaseDevice(LabberDriver):
         self._instrument = None
         self._transaction = None
         self._snapshot = None
+        self._get_batch = None
+        self._module_poller = None
+        self._module_sequence = None
+        # guards the raw module while it is read by the module poller
+        self._module_lock = threading.Lock()
+        # serializes the Labber operations and the steps of the ramp thread on
+        # the (not thread safe) connection to the data server
+        self._connection_lock = threading.RLock()
+        # ramps that are started once the running transaction is ended
+        self._deferred_ramps = []
         self._instrument_settings = settings
+        self._latency = None
+        self._latency_format = settings.get("latency_stats", False)
+        if self._latency_format is True:
+            self._latency_format = "json"
+        if self._latency_format:
+            if self._latency_format not in FORMATS:
+                raise ValueError(
+                    f"latency_stats must be one of {FORMATS}, "
+                    f"not {self._latency_format}."
+                )
+            self._latency = LatencyRecorder()
+        self._tracer = None
+        if settings.get("trace", False):
+            self._tracer = Tracer(
+                f"zhinst-labber {self._instrument_name()}",
+                settings.get("trace_max_events", MAX_EVENTS),
+            )
+        self._profiler = None
+        profile = settings["instrument"].get("profile", None)
+        if profile:
+            self._profiler = ProfileCapture(
+                profile.get("directory", self._output_directory() / "profiles"),
+                profile.get("operations", []),
+                profile.get("quants", []),
+                profile.get("functions", []),
+                profile.get("max_files", MAX_PROFILES),
+                profile.get("rotate", True),
+            )
+        self._file_cache = FileCache(
+            int(settings.get("file_cache_size", FILE_CACHE_SIZE) * 1e6)
+        )
+        self._preloaded = None
+        self._preload_lock = threading.Lock()
+        self._uploads = UploadTracker()
+        self._hardware_loop = HardwareLoop()
+        self._ramps = RampEngine(
+            self._set_ramp_values, settings.get("ramp_update_rate", UPDATE_RATE)
+        )
+        self._accumulators = {
+            quant_name: RingBuffer(max_size)
+            for quant_name, max_size in settings.get("module_accumulate", {}).items()
+        }
+        self._accumulated_paths = {}
         self._device_type = settings["instrument"].get("type", "")
         instrument_type = settings["instrument"].get("base_type", "")
         log_level = settings.get("logger_level", None)
 
-        # read information from global settings file
-        with GLOBAL_SETTINGS.open("r") as file:
-            node_info = json.loads(file.read())
-            self._node_info = node_info["common"].get("quants", {})
-            if self._device_type:
-                if instrument_type == "device":
-                    dev_type = self._device_type.split("_")[0].rstrip(string.digits)
-                    device_info = node_info.get(dev_type, {}).get("quants", {})
-                else:
-                    device_info = node_info.get(self._device_type, {}).get("quants", {})
-                self._node_info = {**self._node_info, **device_info}
-            self._function_info = node_info.get("functions", {})
-            self._path_seperator = node_info["misc"]["labberDelimiter"]
-            # use global log level if no local one is defined
-            log_level = node_info["misc"]["LogLevel"] if not log_level else log_level
+        # read information from global settings file (cached per process)
+        driver_settings = load_driver_settings(
+            GLOBAL_SETTINGS, instrument_type, self._device_type
+        )
+        self._node_info = driver_settings.node_info
+        self._function_info = driver_settings.function_info
+        self._path_seperator = driver_settings.path_seperator
+        # use global log level if no local one is defined
+        log_level = driver_settings.log_level if not log_level else log_level
 
         configure_logger(
-            logger, log_level, self._instrument_settings.get("logger_path", None)
+            driver_logger,
+            log_level,
+            self._instrument_settings.get("logger_path", None),
+            self._instrument_settings.get("logger_rate_limit", RATE_LIMIT),
+            self._instrument_settings.get("logger_async", False),
         )
 
         logger.debug("PID: %d", os.getpid())
 
         # Set up node to quant map
-        self._node_quant_map = {
-            self._quant_to_path(quant): quant for quant in self.dQuantities
-        }
+        self._node_quant_map = QuantPathMap(self._path_seperator, self.dQuantities)
+        self._signal_table = SignalTable(
+            self._node_quant_map, self._raw_path_to_zi_node
+        )
 
     def performOpen(self, options: t.Dict = {}) -> None:
         """Perform the operation of opening the instrument connection.
@@ -117,8 +297,189 @@ class BaseDevice(LabberDriver):
         self._instrument = self._create_instrument(
             self._instrument_settings["instrument"]
         )
-        self._snapshot = SnapshotManager(self._instrument.root)
-        self._transaction = TransactionManager(self._instrument, self)
+        # Devices have large node trees with vector nodes that are not used by
+        # any quantity. Limit the snapshot to the nodes of the quantities.
+        snapshot_scope = None
+        subscription = None
+        if self._instrument_settings["instrument"].get("base_type") == "device":
+            snapshot_scope = [
+                self._get_command(quant)
+                for quant in self.dQuantities.values()
+                if quant.get_cmd
+            ]
+            if self._instrument_settings.get("snapshot_subscribe", False):
+                # separate connection, polling a shared session would steal
+                # the data of other drivers
+                subscription = self._clone_connection()
+            # multi-path gets are only supported by devices
+            self._get_batch = GetBatchManager(self._instrument.root)
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = SnapshotManager(
+            self._instrument.root,
+            snapshot_scope,
+            subscription,
+            self._instrument_settings.get("snapshot_max_age", SNAPSHOT_MAX_AGE),
+            self._measure,
+        )
+        self._transaction = TransactionManager(
+            self._instrument,
+            self,
+            self._instrument_settings.get("transaction_workers", MAX_WORKERS),
+        )
+        self._uploads.invalidate()
+        self._hardware_loop.clear()
+        if self._module_poller is not None:
+            self._module_poller.stop()
+            self._module_poller = None
+        poll_interval = self._instrument_settings.get("module_poll_interval", 0)
+        if (
+            self._instrument_settings["instrument"].get("base_type") == "module"
+            and poll_interval > 0
+        ):
+            self._module_poller = ModulePoller(
+                self._instrument.raw_module,
+                poll_interval,
+                self._accumulate_results if self._accumulators else None,
+                self._measure,
+                self._module_lock,
+            )
+            self._module_sequence = None
+            self._module_poller.start()
+
+    def performClose(self, bError: bool = False, options: t.Dict = {}) -> None:
+        """Perform the close instrument connection operation.
+
+        Args:
+            bError: Flag if the instrument is closed because of an error.
+            options: Additional information provided by Labber.
+        """
+        self._ramps.close()
+        self._deferred_ramps = []
+        if self._module_poller is not None:
+            self._module_poller.stop()
+            self._module_poller = None
+        if self._snapshot is not None:
+            self._snapshot.close()
+        if self._latency is not None:
+            self.dump_latency_stats()
+        if self._tracer is not None:
+            self.dump_trace()
+
+    def dump_latency_stats(
+        self, directory: t.Optional[t.Union[str, Path]] = None
+    ) -> t.Optional[Path]:
+        """Write the recorded latency statistics to a file.
+
+        The file name contains the instrument type and the process id. An
+        existing file of the same process is overwritten.
+
+        Args:
+            directory: Target directory. Defaults to the directory of the
+                ``logger_path`` or the temporary directory.
+
+        Returns:
+            Path of the written file. None if the statistics are disabled or
+            the file could not be written.
+        """
+        if self._latency is None:
+            return None
+        if directory is None:
+            directory = self._output_directory()
+        try:
+            file = self._latency.dump(
+                Path(directory) / f"latency_{self._instrument_name()}_{os.getpid()}",
+                self._latency_format,
+            )
+        except OSError as error:
+            logger.error("Latency statistics could not be written: %s", error)
+            return None
+        logger.info("Latency statistics written to %s", file)
+        return file
+
+    def dump_trace(
+        self, file: t.Optional[t.Union[str, Path]] = None
+    ) -> t.Optional[Path]:
+        """Write the recorded timeline to a Chrome trace event file.
+
+        Args:
+            file: Target file. Defaults to the ``trace`` path of the local
+                settings or a file in the directory of the ``logger_path``.
+
+        Returns:
+            Path of the written file. None if the trace is disabled or the
+            file could not be written.
+        """
+        if self._tracer is None:
+            return None
+        if file is None:
+            file = self._instrument_settings.get("trace", True)
+            if file is True:
+                file = (
+                    self._output_directory()
+                    / f"trace_{self._instrument_name()}_{os.getpid()}.json"
+                )
+        try:
+            file = self._tracer.dump(file)
+        except OSError as error:
+            logger.error("Trace could not be written: %s", error)
+            return None
+        logger.info("Trace written to %s", file)
+        return file
+
+    def _instrument_name(self) -> str:
+        """Name of the instrument in the diagnostic output file names.
+
+        Returns:
+            Device or module type, or the base type of the instrument.
+        """
+        return self._device_type or self._instrument_settings["instrument"].get(
+            "base_type", "instrument"
+        )
+
+    def _output_directory(self) -> Path:
+        """Directory of the diagnostic output (statistics, profiles).
+
+        Returns:
+            Directory of the ``logger_path`` or the temporary directory.
+        """
+        logger_path = self._instrument_settings.get("logger_path", None)
+        return Path(logger_path).parent if logger_path else Path(tempfile.gettempdir())
+
+    def _measure(self, operation: str, name: str) -> t.ContextManager:
+        """Trace, measure and profile a piece of work (if enabled).
+
+        Args:
+            operation: Type of the operation (e.g. set, get, function).
+            name: Name of the quantity or function.
+
+        Returns:
+            Context manager that measures the enclosed work.
+        """
+        contexts = []
+        if self._tracer is not None:
+            contexts.append(self._tracer.measure(operation, name))
+        if self._latency is not None:
+            contexts.append(self._latency.measure(operation, name))
+        if self._profiler is not None:
+            contexts.append(self._profiler.measure(operation, name))
+        return nested(contexts)
+
+    def _operation_type(self, default: str) -> str:
+        """Type of the current Labber operation.
+
+        Args:
+            default: Type if the operation is not part of a GET_CFG or SET_CFG.
+
+        Returns:
+            ``get_cfg``, ``set_cfg`` or the default type.
+        """
+        operation = self.dOp["operation"]
+        if operation == Interface.GET_CFG:
+            return "get_cfg"
+        if operation == Interface.SET_CFG:
+            return "set_cfg"
+        return default
 
     def performSetValue(
         self,
@@ -138,7 +499,8 @@ class BaseDevice(LabberDriver):
         minute, as set by the sweep_minute configuration parameter
         defined in the section above.
 
-        TODO special treatment for sweeping required?
+        Numeric nodes are ramped to the new value in a background thread if a
+        sweep rate is specified (see ``ramp_update_rate``).
 
         Args:
             quant: Quantity that should be set.
@@ -159,44 +521,76 @@ class BaseDevice(LabberDriver):
             Value that was set. (If None Labber will automatically use the input
             value instead)
         """
-        # Start transaction if necessary
-        if "call_no" in options and not self._transaction.is_running():
-            self._transaction.start()
-        try:
-            node_info = self._get_node_info(quant.name)
-            if "call_no" in options and not node_info.get("transaction", True):
+        with self._connection_lock, self._measure(
+            self._operation_type("set"), quant.name
+        ):
+            # Collect the values of a hardware loop until the instrument is armed
+            if self._is_hardware_loop(options) and self._get_node_info(quant.name).get(
+                "hardware_loop", {}
+            ):
+                index, n_points = self.getHardwareLoopIndex(options)
                 logger.info(
-                    "%s: Transaction is not supported for this node. "
-                    "Please set value manually.",
+                    "%s: hardware loop point %d/%d: %s",
                     quant.name,
+                    index,
+                    n_points,
+                    Payload(value),
+                    extra=RATE_LIMITED,
                 )
+                self._hardware_loop.add_value(quant.name, index, n_points, value)
                 return value
-            if node_info.get("function", ""):
-                quant.setValue(False if node_info.get("trigger", False) else value)
-                function_path = node_info.get("function_path", ".")
-                function_path = self._quant_to_path(quant.name) / function_path
-                self.call_function(
-                    node_info["function"],
-                    function_path.resolve(),
+            # Start transaction if necessary
+            if "call_no" in options and not self._transaction.is_running():
+                stopped = self._ramps.stop()
+                if stopped:
+                    logger.warning("Ramps stopped by a transaction: %s", stopped)
+                with self._measure("transaction", "start"):
+                    self._transaction.start()
+            try:
+                node_info = self._get_node_info(quant.name)
+                if "call_no" in options and not node_info.get("transaction", True):
+                    logger.info(
+                        "%s: Transaction is not supported for this node. "
+                        "Please set value manually.",
+                        quant.name,
+                    )
+                    return value
+                if node_info.get("hardware_loop", {}):
+                    # single point sweep
+                    self._set_sweep_axis(
+                        quant.name, node_info["hardware_loop"], [value]
+                    )
+                    return value
+                if node_info.get("function", ""):
+                    quant.setValue(False if node_info.get("trigger", False) else value)
+                    function_path = node_info.get("function_path", ".")
+                    function_path = self._quant_to_path(quant.name) / function_path
+                    self.call_function(node_info["function"], function_path)
+                    return False if node_info.get("trigger", False) else value
+                if not quant.set_cmd:
+                    logger.info("%s: is read only and will not be set.", quant.name)
+                    return self.performGetValue(quant)
+                if sweepRate and quant.datatype == quant.DOUBLE:
+                    return self._start_ramp(quant, value, sweepRate)
+                self._ramps.stop(quant.name)
+                # Add device if necessary
+                if node_info.get("is_node_path", False) and "dev" not in value.lower():
+                    value, _ = self._raw_path_to_zi_node(value)
+                value = self._set_value_toolkit(
+                    quant, value, wait_for=node_info.get("wait_for", False)
                 )
+                if node_info.get("invalidate_uploads", False):
+                    self._uploads.invalidate()
                 return False if node_info.get("trigger", False) else value
-            if not quant.set_cmd:
-                logger.info("%s: is read only and will not be set.", quant.name)
-                return self.performGetValue(quant)
-            # Add device if necessary
-            if node_info.get("is_node_path", False) and "dev" not in value.lower():
-                value, _ = self._raw_path_to_zi_node(value)
-            value = self._set_value_toolkit(
-                quant, value, wait_for=node_info.get("wait_for", False)
-            )
-            return False if node_info.get("trigger", False) else value
-        # Stop transaction if necessary (should be ended regardless of any exceptions)
-        finally:
-            if self._transaction.is_running() and self.isFinalCall(options):
-                try:
-                    self._transaction.end()
-                except Exception as error:
-                    logger.error("Error during ending a transaction: %s", error)
+            # Stop transaction if necessary (should be ended regardless of any exceptions)
+            finally:
+                if self._transaction.is_running() and self.isFinalCall(options):
+                    try:
+                        with self._measure("transaction", "end"):
+                            self._transaction.end()
+                    except Exception as error:
+                        logger.error("Error during ending a transaction: %s", error)
+                    self._start_deferred_ramps()
 
     def performGetValue(self, quant: Quantity, options: t.Dict = {}) -> t.Any:
         """Perform the Get Value instrument operation.
@@ -212,61 +606,302 @@ class BaseDevice(LabberDriver):
 
         Returns:
             New value of the quantity.
+
+        Raises:
+            RuntimeError: If a ramp of the quantity failed.
         """
-        node_info = self._get_node_info(quant.name)
-        # Get CFG => reset function values to default
-        if self.dOp["operation"] == Interface.GET_CFG and node_info.get("function", ""):
-            logger.info("%s: reset to default", quant.name)
-            return "" if quant.datatype in [quant.STRING, quant.PATH] else 0
-        # Call function. (No function execution during GET_CFG)
-        if node_info.get("function", ""):
-            function_path = node_info.get("function_path", ".")
-            function_path = self._quant_to_path(quant.name) / function_path
-            self.call_function(
-                node_info["function"],
-                function_path.resolve(),
-            )
-        # Get value from toolkit
-        elif quant.get_cmd:
-            get_cmd = (
-                quant.get_cmd[3:]
-                if quant.get_cmd.lower().startswith("zi/")
-                else quant.get_cmd
-            )
-            # use a snapshot for the GET_CFG command
-            if self.dOp["operation"] in [Interface.GET_CFG, Interface.SET_CFG]:
-                value = None
+        self._raise_ramp_error(quant)
+        with self._connection_lock, self._measure(
+            self._operation_type("get"), quant.name
+        ):
+            # Results of a hardware loop are acquired during arm
+            if self._is_hardware_loop(options) and self._hardware_loop.has_result(
+                quant.name
+            ):
+                index, n_points = self.getHardwareLoopIndex(options)
                 try:
-                    value = self._parse_value(quant, self._snapshot.get_value(get_cmd))
-                except RuntimeError as error:
-                    logger.debug("%s", error)
-                logger.info("%s: get %s", quant.name, value)
-
-                return value if value is not None else quant.getValue()
-            # clear snapshot if GET_CFG is finished
-            self._snapshot.clear()
+                    value = self._hardware_loop.get_result(quant.name, index, n_points)
+                    return value if quant.isVector() else value[0]
+                except ValueError as error:
+                    logger.error("%s", error)
+                    return quant.getValue()
+            node_info = self._get_node_info(quant.name)
+            if node_info.get("hardware_loop", {}):
+                return quant.getValue()
+            # Get CFG => reset function values to default
+            if self.dOp["operation"] == Interface.GET_CFG and node_info.get(
+                "function", ""
+            ):
+                logger.info("%s: reset to default", quant.name)
+                return "" if quant.datatype in [quant.STRING, quant.PATH] else 0
+            # Call function. (No function execution during GET_CFG)
+            if node_info.get("function", ""):
+                function_path = node_info.get("function_path", ".")
+                function_path = self._quant_to_path(quant.name) / function_path
+                self.call_function(node_info["function"], function_path)
+            # Get value from toolkit
+            elif quant.get_cmd:
+                get_cmd = self._get_command(quant)
+                # use a snapshot for the GET_CFG command
+                if self.dOp["operation"] in [Interface.GET_CFG, Interface.SET_CFG]:
+                    value = None
+                    try:
+                        value = self._parse_value(
+                            quant, self._snapshot.get_value(get_cmd)
+                        )
+                    except RuntimeError as error:
+                        logger.debug("%s", error)
+                    logger.info(
+                        "%s: get %s", quant.name, Payload(value), extra=RATE_LIMITED
+                    )
+
+                    return value if value is not None else quant.getValue()
+                # clear snapshot if GET_CFG is finished
+                self._snapshot.clear()
+                try:
+                    value = self._parse_value(
+                        quant, self._get_node_value(get_cmd, options)
+                    )
+                    logger.info(
+                        "%s: get %s", quant.name, Payload(value), extra=RATE_LIMITED
+                    )
+                    return value if value is not None else quant.getValue()
+                except Exception as error:
+                    logger.error("%s", error)
+            return quant.getValue()
+
+    def checkIfSweeping(self, quant: Quantity, options: t.Dict = {}) -> bool:
+        """Check if a quantity is ramped to a new value.
+
+        Args:
+            quant: Quantity that is ramped.
+            options: Additional information provided by Labber.
+
+        Returns:
+            Flag if the ramp is still running.
+
+        Raises:
+            RuntimeError: If the ramp failed before reaching its target.
+        """
+        self._raise_ramp_error(quant)
+        return self._ramps.is_running(quant.name)
+
+    def _raise_ramp_error(self, quant: Quantity) -> None:
+        """Raise the error of a failed ramp of a quantity (only once).
+
+        Args:
+            quant: Quantity that was ramped.
+
+        Raises:
+            RuntimeError: If the ramp failed before reaching its target.
+        """
+        error = self._ramps.pop_error(quant.name)
+        if error is not None:
+            raise RuntimeError(f"{quant.name}: {error}") from error
+
+    def performStopSweep(self, quant: Quantity, options: t.Dict = {}) -> None:
+        """Stop the ramp of a quantity at its current value.
+
+        Args:
+            quant: Quantity that is ramped.
+            options: Additional information provided by Labber.
+        """
+        logger.info("%s: stop ramp at %s", quant.name, self._ramps.value(quant.name))
+        self._ramps.stop(quant.name)
+
+    # def initSetConfig(self) -> None:
+    #     """Run before setting values in Set Config."""
+    #     pass
+
+    def performArm(self, quant_names: t.List[str], options: t.Dict = {}) -> None:
+        """Perform the instrument arm operation.
+
+        Uploads the values of a hardware loop and acquires the results of all
+        points in one pass.
+
+        Args:
+            quant_names: Quantities that are measured.
+            options: Additional information provided by Labber.
+        """
+        with self._connection_lock:
             try:
-                value = self._parse_value(
-                    quant,
-                    self._instrument[get_cmd](parse=False, enum=False)
+                axes = self._hardware_loop.axes()
+            except ValueError as error:
+                logger.error("%s", error)
+                return
+            for quant_name, values in axes.items():
+                loop_info = self._get_node_info(quant_name)["hardware_loop"]
+                if not self._set_sweep_axis(quant_name, loop_info, values):
+                    continue
+                function_path = self._quant_to_path(quant_name) / loop_info.get(
+                    "function_path", "."
                 )
-                logger.info("%s: get %s", quant.name, value)
-                return value if value is not None else quant.getValue()
+                self.call_function(loop_info["function"], function_path)
+                for relative_quant_name in self._function_info[
+                    loop_info["function"]
+                ].get("Returns", []):
+                    result_quant = self._path_to_quant(
+                        function_path / relative_quant_name
+                    )
+                    self._hardware_loop.set_result(
+                        result_quant, self.getValue(result_quant)
+                    )
+
+    def _is_hardware_loop(self, options: t.Any) -> bool:
+        """Check if an operation is part of a hardware loop.
+
+        Args:
+            options: Additional information provided by Labber.
+
+        Returns:
+            Flag if the operation is part of a hardware loop.
+        """
+        return isinstance(options, dict) and self.isHardwareLoop(options)
+
+    def _set_sweep_axis(
+        self, quant_name: str, loop_info: t.Dict, values: t.Sequence[t.Any]
+    ) -> bool:
+        """Set the sweep axis of a hardware loop quantity.
+
+        The values are converted into the start, stop and number of points
+        nodes specified in the ``axis`` of the hardware loop info.
+
+        Args:
+            quant_name: Name of the hardware loop quantity.
+            loop_info: Hardware loop information from the settings.json file.
+            values: Values of the sweep.
+
+        Returns:
+            Flag if the axis was set.
+        """
+        try:
+            axis = dict(zip(("start", "stop", "points"), linear_axis(values)))
+        except ValueError as error:
+            logger.error("%s: %s", quant_name, error)
+            return False
+        path = self._quant_to_path(quant_name)
+        for name, relative_quant_name in loop_info.get("axis", {}).items():
+            node_path = path / relative_quant_name
+            logger.info(
+                "%s: set %s", self._path_to_quant(node_path), Payload(axis[name])
+            )
+            try:
+                with self._node_lock():
+                    self._instrument[str(node_path).lstrip("/")](axis[name])
             except Exception as error:
                 logger.error("%s", error)
-        return quant.getValue()
+                return False
+            try:
+                self.setValue(self._path_to_quant(node_path), axis[name])
+            except KeyError:
+                logger.debug("%s does not exist", self._path_to_quant(node_path))
+        return True
 
-    # def performClose(self, bError: bool = False, options: t.Dict = {}) -> None:
-    #     """Perform the close instrument connection operation."""
-    #     pass
+    def _start_ramp(self, quant: Quantity, value: float, sweep_rate: float) -> float:
+        """Ramp a node to a new value in the background.
 
-    # def initSetConfig(self) -> None:
-    #     """Run before setting values in Set Config."""
-    #     pass
+        Args:
+            quant: Quantity of the node.
+            value: Target value.
+            sweep_rate: Change per second (per minute if the quantity uses
+                ``sweep_minute``).
 
-    # def performArm(self, quant_names: str, options: t.Dict = {}) -> None:
-    #     """Perform the instrument arm operation"""
-    #     pass
+        Returns:
+            Target value.
+        """
+        if self._transaction.is_running():
+            # ramps are not part of the transaction, start them after it
+            logger.info("%s: ramp to %s after the transaction", quant.name, value)
+            self._deferred_ramps.append((quant, value, sweep_rate))
+            return value
+        rate = sweep_rate / 60 if quant.sweep_minute else sweep_rate
+        start = self._ramps.value(quant.name)
+        if start is None:
+            try:
+                with self._node_lock():
+                    start = float(
+                        self._instrument[self._get_command(quant) or quant.set_cmd]()
+                    )
+            except Exception as error:
+                logger.debug("%s: %s", quant.name, error)
+                start = float(quant.getValue())
+        logger.info("%s: ramp from %s to %s with %s/s", quant.name, start, value, rate)
+        self._ramps.start(quant.name, quant.set_cmd, start, value, rate)
+        return value
+
+    def _start_deferred_ramps(self) -> None:
+        """Start the ramps that were requested during a transaction."""
+        ramps, self._deferred_ramps = self._deferred_ramps, []
+        for quant, value, sweep_rate in ramps:
+            try:
+                self._start_ramp(quant, value, sweep_rate)
+            except Exception as error:
+                logger.error("%s: %s", quant.name, error)
+
+    def _set_ramp_values(self, steps: t.List[t.Tuple[str, float]]) -> None:
+        """Set a step of all running ramps.
+
+        The steps are set with a single call for devices. Called by the ramp
+        thread, the connection is shared with the Labber operations.
+
+        Args:
+            steps: List of (node, value) pairs.
+        """
+        with self._connection_lock:
+            if len(steps) > 1 and (
+                self._instrument_settings["instrument"].get("base_type") == "device"
+            ):
+                with self._measure("node_set", "ramp"):
+                    self._instrument.root.connection.set(
+                        [(str(self._instrument[node]), value) for node, value in steps]
+                    )
+                return
+            for node, value in steps:
+                with self._measure("node_set", node), self._node_lock():
+                    self._instrument[node](value)
+
+    def _node_lock(self) -> t.ContextManager:
+        """Lock that must be held while the nodes of the instrument are used.
+
+        The nodes of a module are guarded by the module lock since the module
+        is read by the module poller in the background (see ``ModulePoller``).
+
+        Returns:
+            Module lock for modules, a context without effect otherwise.
+        """
+        if self._instrument_settings["instrument"].get("base_type") == "module":
+            return self._module_lock
+        return contextlib.nullcontext()
+
+    def _get_node_value(self, get_cmd: str, options: t.Dict) -> t.Any:
+        """Get the raw value of a node.
+
+        The calls of a get series are batched for devices (see
+        ``GetBatchManager``).
+
+        Args:
+            get_cmd: Node path.
+            options: Additional information provided by Labber.
+
+        Returns:
+            Raw value of the node.
+        """
+        with self._measure("node_get", get_cmd), self._node_lock():
+            if (
+                self._get_batch is None
+                or not isinstance(options, dict)
+                or "call_no" not in options
+            ):
+                return self._instrument[get_cmd](parse=False, enum=False)
+            if self.isFirstCall(options) or not self._get_batch.is_running():
+                self._get_batch.start()
+            try:
+                return self._get_batch.get_value(get_cmd)
+            except KeyError:
+                return self._instrument[get_cmd](parse=False, enum=False)
+            finally:
+                if self.isFinalCall(options):
+                    self._get_batch.end()
 
     def _parse_value(self, quant: Quantity, value: t.Any) -> t.Any:
         """Parse the value received from toolkit for a node.
@@ -280,7 +915,8 @@ class BaseDevice(LabberDriver):
         """
         if isinstance(value, dict):
             if "x" in value and "y" in value:
-                return complex(value["x"], value["y"])
+                # samples are either scalars or single element arrays
+                return complex(np.ravel(value["x"])[0], np.ravel(value["y"])[0])
             if "dio" in value:
                 return value["dio"][0]
             logger.error("Unknown data received %s", value)
@@ -290,20 +926,17 @@ class BaseDevice(LabberDriver):
             value = str(value)
         return value
 
-    def _get_session(
+    def _data_server_address(
         self, data_server_info: t.Dict[str, t.Any], base_type: str
-    ) -> Session:
-        """Return a Session to the dataserver.
-
-        One single session to each data server is reused per default in Labber.
-        The "shared_session" option in the settings can disable this behavior.
+    ) -> t.Tuple[str, int, bool]:
+        """Address of the data server.
 
         Args:
             data_server_info: settings info for the Data Server.
             base_type: BaseType of the Labber Instruement.
 
         Returns:
-            Valid toolkit Session object.
+            Host, port and flag if the data server is for hf2 devices.
         """
         target_host = data_server_info.get("host", "localhost")
         target_hf2 = data_server_info.get("hf2", False)
@@ -315,18 +948,79 @@ class BaseDevice(LabberDriver):
             target_host = split_raw_server[0]
             if len(split_raw_server) > 1:
                 target_port = int(split_raw_server[1])
+        return target_host, target_port, target_hf2
+
+    def _clone_connection(self) -> "zhinst.core.ziDAQServer":
+        """Open a separate connection to the data server of the session.
+
+        Older zhinst-toolkit versions have no ``clone_underlying_session``, the
+        connection is created with the same arguments as toolkit uses instead.
+
+        Returns:
+            New connection to the data server.
+        """
+        clone = getattr(self._session, "clone_underlying_session", None)
+        if clone is not None:
+            return clone()
+        host, port, hf2 = self._data_server_address(
+            self._instrument_settings["data_server"],
+            self._instrument_settings["instrument"].get("base_type", "DataServer"),
+        )
+        return zhinst.core.ziDAQServer(host, port, 1 if hf2 else 6)
+
+    def _get_session(
+        self, data_server_info: t.Dict[str, t.Any], base_type: str
+    ) -> Session:
+        """Return a Session to the dataserver.
+
+        One single session to each data server is reused per default in Labber.
+        The "shared_session" option in the settings can disable this behavior
+        or share the session with other processes through the session broker.
+
+        Args:
+            data_server_info: settings info for the Data Server.
+            base_type: BaseType of the Labber Instruement.
+
+        Returns:
+            Valid toolkit Session object.
+        """
+        target_host, target_port, target_hf2 = self._data_server_address(
+            data_server_info, base_type
+        )
         logger.info("Data Server Session %s:%s", target_host, target_port)
         if data_server_info.get("shared_session", True):
             for (host, port), session in created_sessions.items():
                 if target_host == host and target_port == port:
                     return session
-        new_session = Session(target_host, target_port, hf2=target_hf2)
+        kwargs = {}
+        if data_server_info.get("shared_session", True) == "broker":
+            if self._instrument_settings["instrument"].get("base_type") == "module":
+                # modules run in the process of the session
+                logger.info("LabOne modules do not support the session broker.")
+            else:
+                kwargs["connection"] = connect_broker(
+                    target_host, target_port, target_hf2
+                )
+        cache_directory = self._instrument_settings.get("node_doc_cache", False)
+        if cache_directory:
+            if "connection" not in kwargs:
+                # same connection as toolkit would create for the session
+                kwargs["connection"] = zhinst.core.ziDAQServer(
+                    target_host, target_port, 1 if target_hf2 else 6
+                )
+            kwargs["connection"] = CachedNodeDocConnection(
+                kwargs["connection"],
+                NodeDocCache(
+                    default_directory() if cache_directory is True else cache_directory
+                ),
+            )
+        new_session = Session(target_host, target_port, hf2=target_hf2, **kwargs)
         created_sessions[(target_host, target_port)] = new_session
         return new_session
 
     def _create_instrument(
         self, instrument_info: t.Dict[str, t.Any]
-    ) -> t.Union[Session, DeviceType, ModuleType]:
+    ) -> t.Union[Session, "DeviceType", "ModuleType"]:
         """Create a connection through toolkit to the Instrument.
 
         Instrument in this case means a Labber instrument which can be a
@@ -370,7 +1064,21 @@ class BaseDevice(LabberDriver):
         logger.info("Created Instrument for Device %s", self.comCfg.getAddressString())
         return self._session.connect_device(self.comCfg.getAddressString())
 
-    def _quant_to_path(self, quant_name: str) -> Path:
+    @staticmethod
+    def _get_command(quant: Quantity) -> str:
+        """Get the node path of the get command of a quantity.
+
+        Args:
+            quant: Labber quantity.
+
+        Returns:
+            Toolkit node path.
+        """
+        if quant.get_cmd.lower().startswith("zi/"):
+            return quant.get_cmd[3:]
+        return quant.get_cmd
+
+    def _quant_to_path(self, quant_name: str) -> NodePath:
         """Convert Quantity name into its path representation
 
         Args:
@@ -379,20 +1087,20 @@ class BaseDevice(LabberDriver):
         Returns:
             Path (/ seperated string)
         """
+        return self._node_quant_map.to_path(quant_name)
 
-        return Path(
-            "/" + "/".join(quant_name.lower().split(self._path_seperator))
-        ).resolve()
+    def _path_to_quant(self, quant_path: NodePath) -> str:
+        """Convert a path into the name of its Quantity.
 
-    def _path_to_quant(self, quant_path: Path) -> str:
-        try:
-            return self._node_quant_map[quant_path.resolve()]
-        except KeyError:
-            name = self._path_seperator.join(quant_path.parts[1:])
-            self._node_quant_map[name] = name
-            return name
+        Args:
+            quant_path: Path of the Quant
 
-    def _get_node_info(self, quant_name: t.Union[str, Path]) -> t.Dict[str, t.Any]:
+        Returns:
+            Name of the Quant
+        """
+        return self._node_quant_map.to_quant(quant_path)
+
+    def _get_node_info(self, quant_name: t.Union[str, NodePath]) -> t.Dict[str, t.Any]:
         """Get the node info for a Quantity
 
         If there is no Info available the result will be an empty dictionary.
@@ -405,14 +1113,10 @@ class BaseDevice(LabberDriver):
         """
         node_path = (
             quant_name
-            if isinstance(quant_name, Path)
+            if isinstance(quant_name, NodePath)
             else self._quant_to_path(quant_name)
         )
-        node_path = "/" + "/".join(node_path.parts[1:]).lower()
-        for parent_node, node_info in self._node_info.items():
-            if fnmatch.fnmatch(node_path, parent_node):
-                return node_info.get("driver", {})
-        return {}
+        return self._node_info.get(node_path.lower())
 
     def _set_value_toolkit(
         self,
@@ -436,32 +1140,23 @@ class BaseDevice(LabberDriver):
             # get enumerated value if there is one
             if quant.cmd_def:
                 value = quant.cmd_def[quant.combo_defs.index(value)]
-            logger.info("%s: set %s", quant.name, value)
-            self._instrument[quant.set_cmd](value)
+            logger.info("%s: set %s", quant.name, Payload(value), extra=RATE_LIMITED)
+            with self._measure("node_set", quant.set_cmd), self._node_lock():
+                self._instrument[quant.set_cmd](value)
             if wait_for and not self._transaction.is_running():
-                self._instrument[quant.set_cmd].wait_for_state_change(value)
+                with self._node_lock():
+                    self._instrument[quant.set_cmd].wait_for_state_change(value)
         except Exception as error:
             logger.error("%s", error)
 
-    @staticmethod
-    def _csv_row_to_vector(csv_row: t.List[str]) -> t.Optional[NumpyArray]:
-        """Convert a csv row into a numpy array.
-
-        Args:
-            csv_row: Parsed CSV row
-        Returns:
-            Numpy array.
-        """
-        if not csv_row:
-            return None
-        datatype = type(eval(csv_row[0]))
-        return np.array(csv_row, dtype=datatype.__name__)
-
-    @staticmethod
     def _import_waveforms(
-        waves1: Path, waves2: Path = None, markers: Path = None
+        self, waves1: Path, waves2: Path = None, markers: Path = None
     ) -> Waveforms:
-        """Import Waveforms from CSV files.
+        """Import Waveforms from CSV or numpy (.npy, .npz) files.
+
+        The parsed waveforms are cached until one of the files changes.
+        Memory-mapped .npy files are not cached since they do not need to be
+        parsed and an open mapping would lock the file on Windows.
 
         Args:
             waves1: csv for real part waves
@@ -471,32 +1166,79 @@ class BaseDevice(LabberDriver):
         Returns:
             Waveform object.
         """
-        wave0_reader = csv.reader(
-            waves1.open("r", newline=""), delimiter=",", quotechar="|"
-        )
-        wave1_reader = repeat([])
-        if waves2 and waves2.exists():
-            wave1_reader = csv.reader(
-                waves2.open("r", newline=""), delimiter=",", quotechar="|"
-            )
-        marker_reader = repeat([])
-        if markers and markers.exists():
-            marker_reader = csv.reader(
-                markers.open("r", newline=""), delimiter=",", quotechar="|"
-            )
+        files = (waves1, waves2, markers)
+        if any(file and file.suffix.lower() == ".npy" for file in files):
+            with self._measure("parse", waves1.name):
+                return import_waveforms(waves1, waves2, markers)
+        return self._load_file(files, lambda: import_waveforms(*files))
+
+    def _load_file(
+        self, files: t.Sequence[t.Optional[Path]], loader: t.Callable[[], t.Any]
+    ) -> t.Any:
+        """Load the parsed content of files through the file cache.
 
-        waves = Waveforms()
-        for i, row in enumerate(zip(wave0_reader, wave1_reader, marker_reader)):
-            if not row[0]:
-                continue
-            waves[i] = (
-                BaseDevice._csv_row_to_vector(row[0]),
-                BaseDevice._csv_row_to_vector(row[1]),
-                BaseDevice._csv_row_to_vector(row[2]),
+        Within ``preloaded_files`` every set of files is only parsed once and
+        the result is kept until the end of the block (also if the file cache
+        is disabled or too small).
+
+        Args:
+            files: Files that are parsed by the loader.
+            loader: Function that parses the files.
+
+        Returns:
+            Result of the loader.
+        """
+
+        def load() -> t.Any:
+            with self._measure("parse", ", ".join(file.name for file in files if file)):
+                return loader()
+
+        preloaded = self._preloaded
+        if preloaded is None:
+            return self._load_cached(files, load)
+        key, _ = file_key(files)
+        with self._preload_lock:
+            future = preloaded.get(key)
+            owner = future is None
+            if owner:
+                future = preloaded[key] = Future()
+        if not owner:
+            # parsed by another thread (or an earlier call)
+            return future.result()
+        try:
+            result = self._load_cached(files, load)
+        except BaseException as error:
+            with self._preload_lock:
+                # parse again on the next call to report the error there
+                preloaded.pop(key, None)
+            future.set_exception(error)
+            raise
+        future.set_result(result)
+        return result
+
+    def _load_cached(
+        self, files: t.Sequence[t.Optional[Path]], loader: t.Callable[[], t.Any]
+    ) -> t.Any:
+        """Load the parsed content of files through the file cache.
+
+        Args:
+            files: Files that are parsed by the loader.
+            loader: Function that parses the files.
+
+        Returns:
+            Result of the loader.
+        """
+        misses = self._file_cache.misses
+        result = self._file_cache.load(files, loader)
+        if self._file_cache.misses != misses:
+            logger.debug(
+                "%s: file cache miss (%s)",
+                ", ".join(str(file) for file in files if file),
+                self._file_cache.stats,
             )
-        return waves
+        return result
 
-    def _get_quant_value(self, quant_path: Path) -> t.Any:
+    def _get_quant_value(self, quant_path: NodePath) -> t.Any:
         """Get Value from a Quantity.
 
         The raw value is processed according to the node info.
@@ -512,34 +1254,94 @@ class BaseDevice(LabberDriver):
         quant_name = self._path_to_quant(quant_path)
         quant_value = self.getValue(quant_name)
         call_empty = quant_info.get("call_empty", True)
+        if quant_type not in FILE_TYPES:
+            return quant_value, call_empty
+        try:
+            return self._load_quant_file(quant_type, Path(quant_value)), call_empty
+        except IOError as error:
+            logger.error("%s", error)
         if quant_type == "JSON":
-            try:
-                with open(Path(quant_value), "r") as file:
-                    return json.loads(file.read()), call_empty
-            except IOError as error:
-                logger.error("%s", error)
-                return {}, call_empty
+            return {}, call_empty
         if quant_type == "TEXT":
-            try:
-                with open(Path(quant_value), "r") as file:
-                    return file.read(), call_empty
-            except IOError as error:
-                logger.error("%s", error)
-                return "", call_empty
+            return "", call_empty
         if quant_type == "CSV":
-            try:
-                return self._import_waveforms(Path(quant_value)), call_empty
-            except IOError as error:
-                logger.error("%s", error)
-                return Waveforms(), call_empty
-        if quant_type == "CSVARRAY":
-            try:
-                waveform = self._import_waveforms(Path(quant_value))
-                return waveform[0][0], call_empty
-            except IOError as error:
-                logger.error("%s", error)
-                return np.array([], dtype=complex), call_empty
-        return quant_value, call_empty
+            return Waveforms(), call_empty
+        return np.array([], dtype=complex), call_empty
+
+    def _load_quant_file(self, quant_type: str, file: Path) -> t.Any:
+        """Load the content of a file quantity.
+
+        Args:
+            quant_type: Type of the quantity (see ``FILE_TYPES``).
+            file: Path of the file.
+
+        Returns:
+            Parsed content of the file.
+
+        Raises:
+            IOError: If the file can not be read.
+        """
+        if quant_type == "JSON":
+            return self._load_file([file], lambda: json.loads(file.read_text()))
+        if quant_type == "TEXT":
+            return self._load_file([file], file.read_text)
+        waveforms = self._import_waveforms(file)
+        return waveforms if quant_type == "CSV" else waveforms[0][0]
+
+    def function_loaders(
+        self, name: str, path: NodePath
+    ) -> t.List[t.Callable[[], t.Any]]:
+        """Get the loaders of the input files of a function.
+
+        Within ``preloaded_files`` the loaders read and parse the files for
+        the later call of the function, so that the call does not need to
+        parse them. Unlike the function itself they can be run in parallel in
+        worker threads. Files that are not parsed in advance (.npy files and
+        pipelined waveforms) have no loader.
+
+        Args:
+            name: Internal name of the function.
+            path: Path of the toolkit function.
+
+        Returns:
+            Loaders of the input files.
+        """
+        func_info = self._function_info.get(name, {})
+        loaders = []
+        for relative_quant_name in func_info.get("Args", {}).values():
+            files = None
+            if "pipeline" in func_info or isinstance(relative_quant_name, list):
+                files = self._get_waveform_files(path, relative_quant_name)
+            if files is not None:
+                cached = not any(
+                    file and file.suffix.lower() == ".npy" for file in files
+                ) and not ("pipeline" in func_info and self._use_pipeline(files))
+                if files[0] and cached:
+                    loaders.append(functools.partial(self._import_waveforms, *files))
+                continue
+            quant_path = path / relative_quant_name
+            quant_type = self._get_node_info(quant_path).get("type", "default")
+            if quant_type in FILE_TYPES:
+                file = Path(self.getValue(self._path_to_quant(quant_path)))
+                if file.suffix.lower() != ".npy":
+                    loaders.append(
+                        functools.partial(self._load_quant_file, quant_type, file)
+                    )
+        return loaders
+
+    @contextlib.contextmanager
+    def preloaded_files(self) -> t.Iterator[None]:
+        """Keep the parsed input files until the end of the block.
+
+        Files that are parsed within the block (e.g. by the loaders of
+        ``function_loaders``) are handed to all later uses within the block
+        without parsing them again, independent of the file cache.
+        """
+        self._preloaded = {}
+        try:
+            yield
+        finally:
+            self._preloaded = None
 
     def _get_toolkit_function(self, path_list: t.List[str]) -> t.Callable:
         """Convert a function path into a toolkit function object.
@@ -559,7 +1361,7 @@ class BaseDevice(LabberDriver):
                 function = getattr(function, name.lower())
         return function
 
-    def call_function(self, name: str, path: Path) -> None:
+    def call_function(self, name: str, path: NodePath) -> None:
         """Call an process a function.
 
         If this function is called within a transaction the execution is
@@ -584,20 +1386,21 @@ class BaseDevice(LabberDriver):
             self._transaction.add_function(name, path)
             return
 
-        if name == "module_subscribe":
-            return self._call_module_subscribe(
-                Path(func_info.get("signals", "/signal/*"))
-            )
-        if name == "module_read":
-            return self._call_module_read(
-                Path(func_info.get("signals", "/signal/*")),
-                Path(func_info.get("result", "/result/*")),
-            )
-        if name == "module_clear":
-            return self._call_module_clear(Path(func_info.get("result", "/result/*")))
-        if name == "module_execute":
-            return self._call_module_execute()
-        return self._call_toolkit_function(path, func_info)
+        with self._measure("function", name):
+            if name == "module_subscribe":
+                return self._call_module_subscribe(
+                    func_info.get("signals", "/signal/*")
+                )
+            if name == "module_read":
+                return self._call_module_read(
+                    func_info.get("signals", "/signal/*"),
+                    func_info.get("result", "/result/*"),
+                )
+            if name == "module_clear":
+                return self._call_module_clear(func_info.get("result", "/result/*"))
+            if name == "module_execute":
+                return self._call_module_execute()
+            return self._call_toolkit_function(path, func_info)
 
     def _raw_path_to_zi_node(self, raw: str) -> t.Tuple[str, str]:
         """Convert a raw input path value into zi node
@@ -623,7 +1426,7 @@ class BaseDevice(LabberDriver):
             path = f"/{self.comCfg.getAddressString().lower()}/{path}"
         return path, signal
 
-    def _call_module_subscribe(self, signals: Path) -> None:
+    def _call_module_subscribe(self, signals: str) -> None:
         """Subscribe to signal nodes in module.
 
         First all nodes will be unsubscribed and than the new ones will be
@@ -633,18 +1436,29 @@ class BaseDevice(LabberDriver):
             signals: Wildcard path for all signal quantities that should be
                 subscribed.
         """
-        self._instrument.raw_module.unsubscribe("*")
+        with self._module_lock:
+            self._instrument.raw_module.unsubscribe("*")
         logger.info(f"unsubscribed all nodes")
-        for signal_path in fnmatch.filter(
-            map(str, self._node_quant_map), signals.resolve()
-        ):
-            quant_name = self._node_quant_map[Path(signal_path)]
-            quant_value, _ = self._raw_path_to_zi_node(
-                self.getValue(quant_name).lower()
+        for quant_name in self._signal_table.quants(signals):
+            quant_value, _ = self._signal_table.parse(
+                quant_name, self.getValue(quant_name)
             )
             if quant_value:
-                self._instrument.raw_module.subscribe(quant_value)
+                with self._module_lock:
+                    self._instrument.raw_module.subscribe(quant_value)
                 logger.info("subscribed to node %s", quant_value)
+        if self._accumulators:
+            # the accumulated data belongs to the previous signals
+            read_info = self._function_info.get("module_read", {})
+            self._update_accumulated_paths(
+                self._signal_table.entries(
+                    read_info.get("signals", "/signal/*"),
+                    read_info.get("result", "/result/*"),
+                    self.getValue,
+                )
+            )
+            for buffer in self._accumulators.values():
+                buffer.clear()
 
     @staticmethod
     def _get_signal_result(result: t.Dict, signal: str = None) -> t.Any:
@@ -673,13 +1487,47 @@ class BaseDevice(LabberDriver):
             signal_result = result["x"]
         return signal_result
 
-    def _call_module_read(self, signals: Path, results: Path) -> None:
+    def _update_accumulated_paths(self, entries: t.List[SignalEntry]) -> None:
+        """Update the node paths of the accumulated result quantities.
+
+        Args:
+            entries: Pairing of the signal and result quantities.
+        """
+        accumulated_paths = {}
+        for entry in entries:
+            if entry.result_quant in self._accumulators and entry.path:
+                accumulated_paths.setdefault(entry.path, []).append(
+                    (entry.option, self._accumulators[entry.result_quant])
+                )
+        # replaced at once since it is used by the background thread
+        self._accumulated_paths = accumulated_paths
+
+    def _accumulate_results(self, poll_result: t.Dict[str, t.Any]) -> None:
+        """Append all chunks of a module read to the accumulated results.
+
+        Args:
+            poll_result: Result of the module read (flat dictionary).
+        """
+        for path, targets in self._accumulated_paths.items():
+            for chunk in iter_chunks(poll_result.get(path, None)):
+                for option, buffer in targets:
+                    signal_result = self._get_signal_result(chunk, option)
+                    if signal_result is not None:
+                        buffer.append(signal_result)
+
+    def _call_module_read(self, signals: str, results: str) -> None:
         """Read the results of a module and update the result arrays.
 
-        Calls poll on the module. The results are updated with the data that
+        Calls poll on the module or uses the latest results of the background
+        thread (see ``module_poll_interval``). Results of the background thread
+        are only applied once (results of nodes without new data since the
+        last read are skipped). The results are updated with the data that
         matches the signal pathes. Meaning the signals must be subscribed before
         calling this function in order to get data.
 
+        Result quantities listed in ``module_accumulate`` get all data received
+        since the signals were subscribed instead of only the latest one.
+
         If the result does not contain data for a signal the coresponding result
         will be left unchanged. (See _call_module_clear for clearing the results.)
 
@@ -687,34 +1535,48 @@ class BaseDevice(LabberDriver):
             signals: Wildcard path for all signal quantities
             signals: Wildcard path for all result array quantities.
         """
-        poll_result = self._instrument.raw_module.read(flat=True)
-        logger.debug("Get module results: %s", poll_result)
+        entries = self._signal_table.entries(signals, results, self.getValue)
+        if self._accumulators:
+            self._update_accumulated_paths(entries)
+        if self._module_poller is not None:
+            # new results of the background thread (already accumulated)
+            sequence, poll_result = self._module_poller.read(self._module_sequence)
+            if sequence == self._module_sequence:
+                logger.debug("No new module results since read %d", sequence)
+                return
+            self._module_sequence = sequence
+        else:
+            with self._measure("module", "read"), self._module_lock:
+                poll_result = self._instrument.raw_module.read(flat=True)
+            if self._accumulators:
+                self._accumulate_results(poll_result)
+        logger.debug("Get module results: %s", Payload(poll_result))
         if poll_result:
             # Loop through all signals and update values if they are available
-            signal_paths = fnmatch.filter(
-                map(str, self._node_quant_map), signals.resolve()
-            )
-            result_paths = fnmatch.filter(
-                map(str, self._node_quant_map), results.resolve()
-            )
-            for signal, result in zip(signal_paths, result_paths):
-                signal_quant = self._node_quant_map[Path(signal)]
-                signal_value, option = self._raw_path_to_zi_node(
-                    self.getValue(signal_quant).lower()
-                )
+            for entry in entries:
+                if entry.result_quant in self._accumulators:
+                    signal_result = self._accumulators[entry.result_quant].values()
+                    logger.info(
+                        "%s: accumulated %d samples",
+                        entry.result_quant,
+                        len(signal_result),
+                        extra=RATE_LIMITED,
+                    )
+                    self.setValue(entry.result_quant, signal_result)
+                    continue
                 # Get result for current node.
-                signal_result = poll_result.get(signal_value, None)
+                signal_result = poll_result.get(entry.path, None)
                 # the Labber driver only uses the latest result
                 while isinstance(signal_result, list):
                     signal_result = signal_result[-1]
                 if signal_result:
                     available_options = list(signal_result.keys())
-                    signal_result = self._get_signal_result(signal_result, option)
+                    signal_result = self._get_signal_result(signal_result, entry.option)
                     if signal_result is None:
                         logger.error(
                             "Valid signal for %s needed. Must be one of %s. \
                                 Use node/path::signal to specify a signal",
-                            re.sub(r"[a-zA-Z]:", "", signal.replace("\\", "/")),
+                            self._quant_to_path(entry.signal_quant),
                             available_options,
                         )
                         continue
@@ -723,11 +1585,15 @@ class BaseDevice(LabberDriver):
                         signal_result[-1] if signal_result.ndim > 1 else signal_result
                     )
 
-                    result_quant = self._node_quant_map[Path(result)]
-                    logger.info("%s: received %s", result_quant, signal_result[-10:])
-                    self.setValue(result_quant, signal_result)
+                    logger.info(
+                        "%s: received %s",
+                        entry.result_quant,
+                        Payload(signal_result),
+                        extra=RATE_LIMITED,
+                    )
+                    self.setValue(entry.result_quant, signal_result)
 
-    def _call_module_clear(self, results: Path) -> None:
+    def _call_module_clear(self, results: str) -> None:
         """Clears the data on all result quantities.
 
         Necessary since the read function only updates the result quantities
@@ -737,10 +1603,10 @@ class BaseDevice(LabberDriver):
             signals: Wildcard path for all result array quantities.
         """
         logger.info("Clear module results")
-        result_paths = fnmatch.filter(map(str, self._node_quant_map), results.resolve())
-        for result_path in result_paths:
-            quant_name = self._node_quant_map[Path(result_path)]
+        for quant_name in self._signal_table.quants(results):
             quant = self.getQuantity(quant_name)
+            if quant_name in self._accumulators:
+                self._accumulators[quant_name].clear()
             if quant.datatype == quant.VECTOR:
                 self.setValue(quant_name, np.array([]))
         return
@@ -756,17 +1622,109 @@ class BaseDevice(LabberDriver):
         """
         enable = self.getValue("Enable")
         if self.dOp["operation"] in [Interface.GET_CFG, Interface.GET]:
-            value = not self._instrument.raw_module.finished()
+            with self._module_lock:
+                value = not self._instrument.raw_module.finished()
             self.setValue("Enable", value)
             logger.info("Enable: get %s", value)
         elif enable:
             logger.info("Enable: set 1")
-            self._instrument.raw_module.execute()
+            with self._module_lock:
+                self._instrument.raw_module.execute()
         else:
             logger.info("Enable: set 0")
-            self._instrument.raw_module.finish()
+            with self._module_lock:
+                self._instrument.raw_module.finish()
+
+    def _get_waveform_files(
+        self, path: NodePath, relative_quant_name: t.Union[str, t.List[str]]
+    ) -> t.Optional[t.Tuple[t.Optional[Path], ...]]:
+        """Get the waveform files of a function argument.
+
+        Args:
+            path: Path of the toolkit function.
+            relative_quant_name: Quantity of the argument (relative path to
+                the function path). A list of quantities (waves1, waves2,
+                markers) or a single CSV quantity.
+
+        Returns:
+            (waves1, waves2, markers) files. None if the argument is not a
+            waveform.
+        """
+        if isinstance(relative_quant_name, list):
+            waveform_paths = {}
+            for relative_quant_name_el in relative_quant_name:
+                quant_path = path / relative_quant_name_el
+                path_value = self.getValue(self._path_to_quant(quant_path))
+                waveform_paths[quant_path.name] = (
+                    None if str(path_value) in [".", ""] else Path(path_value)
+                )
+            return tuple(
+                waveform_paths.get(name) for name in ("waves1", "waves2", "markers")
+            )
+        quant_path = path / relative_quant_name
+        if self._get_node_info(quant_path).get("type", "") != "CSV":
+            return None
+        path_value = self.getValue(self._path_to_quant(quant_path))
+        return (Path(path_value), None, None)
+
+    def _use_pipeline(self, files: t.Tuple[t.Optional[Path], ...]) -> bool:
+        """Check if waveform files should be uploaded in a pipeline.
+
+        Only large CSV files are pipelined. Smaller files are parsed at once and
+        benefit from the file cache instead.
+
+        Args:
+            files: (waves1, waves2, markers) files.
 
-    def _call_toolkit_function(self, path: Path, func_info: t.Dict) -> None:
+        Returns:
+            Flag if the files are uploaded in a pipeline.
+        """
+        if self._instrument_settings.get("waveform_pipeline_slots", PIPELINE_SLOTS) < 1:
+            return False
+        if files[0] is None or any(
+            file and file.suffix.lower() in BINARY_SUFFIXES for file in files
+        ):
+            return False
+        key, size = file_key(files)
+        return key[0][1] >= 0 and size >= PIPELINE_MIN_SIZE
+
+    def _call_pipelined(
+        self,
+        function: t.Callable,
+        kwargs: t.Dict[str, t.Any],
+        arg_name: str,
+        files: t.Tuple[t.Optional[Path], ...],
+        next_kwargs: t.Dict[str, t.Any],
+    ) -> None:
+        """Call a waveform function while the waveforms are still parsed.
+
+        The waveforms are parsed in chunks in a worker thread. Each chunk is
+        passed to the function while the next one is parsed.
+
+        Args:
+            function: Toolkit function.
+            kwargs: Keyword arguments of the function (without the waveforms).
+            arg_name: Name of the waveform argument.
+            files: (waves1, waves2, markers) files.
+            next_kwargs: Additional keyword arguments for all but the first
+                chunk (e.g. to not clear the already uploaded waveforms).
+        """
+        slots = self._instrument_settings.get("waveform_pipeline_slots", PIPELINE_SLOTS)
+        # one chunk is parsed, one is pending and one is uploaded
+        chunks = measure_iter(
+            self._measure,
+            "parse",
+            files[0].name,
+            iter_waveform_chunks(*files, chunk_size=max(slots // 3, 1)),
+        )
+        first = True
+        for chunk in pipelined(chunks):
+            function(**kwargs, **{arg_name: chunk}, **({} if first else next_kwargs))
+            first = False
+        if first:
+            function(**kwargs, **{arg_name: Waveforms()})
+
+    def _call_toolkit_function(self, path: NodePath, func_info: t.Dict) -> None:
         """Calls a toolkit function
 
         This function can handle both input and return arguments. Both of them
@@ -783,23 +1741,22 @@ class BaseDevice(LabberDriver):
                 the function.
         """
         kwargs = {}
+        pipeline = None
         for arg_name, relative_quant_name in func_info.get("Args").items():
+            files = None
+            if "pipeline" in func_info or isinstance(relative_quant_name, list):
+                files = self._get_waveform_files(path, relative_quant_name)
+            if files and "pipeline" in func_info and self._use_pipeline(files):
+                pipeline = (arg_name, files)
+                continue
             if isinstance(relative_quant_name, list):
-                waveform_paths = {}
-                for relative_quant_name_el in relative_quant_name:
-                    quant_path = (path / relative_quant_name_el).resolve()
-                    quant_name = self._path_to_quant(quant_path)
-                    path_value = self.getValue(quant_name)
-                    waveform_paths[quant_path.stem] = (
-                        None if str(path_value) in [".", ""] else Path(path_value)
-                    )
                 try:
-                    kwargs[arg_name] = self._import_waveforms(**waveform_paths)
+                    kwargs[arg_name] = self._import_waveforms(*files)
                 except IOError as error:
                     logger.error("%s", error)
                     kwargs[arg_name] = Waveforms()
             else:
-                quant_name = (path / relative_quant_name).resolve()
+                quant_name = path / relative_quant_name
                 kwargs[arg_name], call_empty = self._get_quant_value(quant_name)
                 if not call_empty and not kwargs[arg_name]:
                     logger.warning(
@@ -809,20 +1766,55 @@ class BaseDevice(LabberDriver):
                     )
                     return
 
-        function = self._get_toolkit_function(path.parts[1:])
+        function = self._get_toolkit_function(path.parts)
+
+        # Skip uploads that are identical to the last one
+        digest = None
+        if func_info.get("deduplicate", False):
+            # pipelined waveforms are identified by their files
+            digest = content_hash(
+                {**kwargs, pipeline[0]: file_key(pipeline[1])[0]}
+                if pipeline
+                else kwargs
+            )
+            if self._uploads.is_uploaded(path, digest):
+                logger.info(
+                    "%s: skipped, content is identical to the last upload",
+                    self._path_to_quant(path),
+                )
+                return
+        # e.g. a new sequencer program invalidates the uploads of its core
+        if func_info.get("invalidate_uploads", False):
+            self._uploads.invalidate(path.parent)
 
-        logger.info("%s: call with %s", self._path_to_quant(path), kwargs)
+        logger.info(
+            "%s: call with %s",
+            self._path_to_quant(path),
+            Payload(kwargs),
+            extra=RATE_LIMITED,
+        )
         try:
-            return_values = function(**kwargs)
+            if pipeline:
+                return_values = self._call_pipelined(
+                    function, kwargs, *pipeline, func_info["pipeline"]
+                )
+            else:
+                return_values = function(**kwargs)
         except Exception as error:
             logger.error("%s", error)
+            self._uploads.invalidate(path)
             return
+        if digest:
+            self._uploads.record(path, digest)
         logger.info(
-            "%s: returned %s", self._path_to_quant(path), str(return_values)[-10:]
+            "%s: returned %s",
+            self._path_to_quant(path),
+            Payload(return_values),
+            extra=RATE_LIMITED,
         )
 
         for relative_quant_name in func_info.get("Returns"):
-            quant_path = (path / relative_quant_name).resolve()
+            quant_path = path / relative_quant_name
             quant_name = self._path_to_quant(quant_path)
             info = self._get_node_info(quant_path).get("return_value", "")
             try:
@@ -0,0 +1,113 @@
+"""Cache for the parsed content of input files."""
+import os
+import threading
+import typing as t
+from collections import OrderedDict
+from pathlib import Path
+
+FileKey = t.Tuple[t.Optional[t.Tuple[str, int, int]], ...]
+
+
+def file_key(files: t.Sequence[t.Optional[Path]]) -> t.Tuple[FileKey, int]:
+    """Key and total size for a set of files.
+
+    Missing files are part of the key so that creating them invalidates
+    the key.
+
+    Args:
+        files: Files that are parsed together.
+
+    Returns:
+        Key of the files and the total size of the files.
+    """
+    key = []
+    size = 0
+    for file in files:
+        if file is None:
+            key.append(None)
+            continue
+        try:
+            stat = os.stat(file)
+        except OSError:
+            key.append((str(file), -1, -1))
+            continue
+        key.append((str(file), stat.st_size, stat.st_mtime_ns))
+        size += stat.st_size
+    return tuple(key), size
+
+
+class FileCache:
+    """Least recently used cache for parsed files.
+
+    The results are cached per set of files. An entry is identified by the path,
+    size and modification time of each file, so unchanged files only cost a
+    ``stat`` call. The cache is bounded by the total size of the cached files.
+
+    The cached results are shared between calls and must not be modified.
+    The cache can be used from multiple threads.
+
+    Args:
+        max_bytes: Maximum total size of the cached files in bytes. A value
+            of 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(
+        self, files: t.Sequence[t.Optional[Path]], loader: t.Callable[[], t.Any]
+    ) -> t.Any:
+        """Get the parsed content of a set of files.
+
+        Args:
+            files: Files that are parsed by the loader.
+            loader: Function that parses the files. Only called if there is no
+                valid cache entry. Exceptions are not cached.
+
+        Returns:
+            Result of the loader.
+        """
+        if not self._max_bytes:
+            return loader()
+        key, size = file_key(files)
+        with self._lock:
+            try:
+                value = self._entries[key][0]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = loader()
+        if size > self._max_bytes:
+            return value
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._size += size
+            while self._size > self._max_bytes:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._size -= old_size
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def stats(self) -> t.Dict[str, int]:
+        """Diagnostic information about the cache usage."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
@@ -0,0 +1,122 @@
+"""Labber hardware loop helper."""
+import typing as t
+
+import numpy as np
+
+
+def linear_axis(values: np.ndarray) -> t.Tuple[float, float, int]:
+    """Convert the values of a sweep into a linear axis.
+
+    Args:
+        values: Values of the sweep.
+
+    Returns:
+        start, stop, number of points
+
+    Raises:
+        ValueError: If the values are not equally spaced.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) > 2 and not np.allclose(
+        np.diff(values), values[1] - values[0], rtol=1e-6, atol=0
+    ):
+        raise ValueError("Only equally spaced values can be swept in hardware.")
+    return float(values[0]), float(values[-1]), len(values)
+
+
+class HardwareLoop:
+    """Values and results of a Labber hardware loop.
+
+    In a hardware loop Labber first sets all values of the stepped quantity,
+    then arms the instrument and finally gets the results point by point. The
+    values are collected until the instrument is armed. The results are
+    acquired in one pass and served for every point afterwards.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._results = {}
+
+    def add_value(
+        self, quant_name: str, index: int, n_points: int, value: t.Any
+    ) -> None:
+        """Add a value of a stepped quantity.
+
+        Args:
+            quant_name: Name of the stepped quantity.
+            index: Index of the point in the loop.
+            n_points: Number of points in the loop.
+            value: Value of the point.
+        """
+        values = self._values.get(quant_name)
+        if values is None or len(values) != n_points:
+            values = [None] * n_points
+            self._values[quant_name] = values
+        values[index] = value
+        # results of a previous loop are outdated
+        self._results.clear()
+
+    def axes(self) -> t.Dict[str, np.ndarray]:
+        """Get the values of all stepped quantities.
+
+        Returns:
+            Values of the stepped quantities.
+
+        Raises:
+            ValueError: If a value of a stepped quantity is missing.
+        """
+        axes = {}
+        for quant_name, values in self._values.items():
+            if any(value is None for value in values):
+                raise ValueError(f"{quant_name}: Not all values of the loop are set.")
+            axes[quant_name] = np.array(values)
+        return axes
+
+    def set_result(self, quant_name: str, value: np.ndarray) -> None:
+        """Store the acquired result of a quantity for all points.
+
+        Args:
+            quant_name: Name of the result quantity.
+            value: Result for all points. Split into equally sized parts, one
+                for every point.
+        """
+        self._results[quant_name] = np.asarray(value)
+
+    def has_result(self, quant_name: str) -> bool:
+        """Check if there is an acquired result for a quantity.
+
+        Args:
+            quant_name: Name of the result quantity.
+
+        Returns:
+            Flag if there is an acquired result.
+        """
+        return quant_name in self._results
+
+    def get_result(self, quant_name: str, index: int, n_points: int) -> np.ndarray:
+        """Get the acquired result of a quantity for a single point.
+
+        Args:
+            quant_name: Name of the result quantity.
+            index: Index of the point in the loop.
+            n_points: Number of points in the loop.
+
+        Returns:
+            Result of the point.
+
+        Raises:
+            KeyError: If there is no result for the quantity.
+            ValueError: If the result does not match the number of points.
+        """
+        value = self._results[quant_name]
+        if value.size % n_points:
+            raise ValueError(
+                f"{quant_name}: Result with {value.size} values does not match "
+                f"the {n_points} points of the loop."
+            )
+        return np.reshape(value, (n_points, -1))[index]
+
+    def clear(self) -> None:
+        """Remove all values and results."""
+        self._values.clear()
+        self._results.clear()
@@ -1,36 +1,342 @@
+"""Logging setup and helpers of the Labber drivers."""
+import atexit
+import copy
+import hashlib
 import logging
+import queue
 import sys
+import threading
+import time
 import typing as t
-from logging.handlers import RotatingFileHandler
+from collections.abc import Mapping
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import numpy as np
+from zhinst.toolkit import Waveforms
+
+# Maximum length of a rendered log argument
+MAX_LENGTH = 200
+# Number of elements that are rendered for sequences and dictionaries
+MAX_ITEMS = 8
+# Default number of messages per second of every rate limited message
+RATE_LIMIT = 10
+# Pass as ``extra`` to rate limit a message (e.g. on hot paths)
+RATE_LIMITED = {"rate_limited": True}
+
+
+def _array_hash(*arrays: np.ndarray) -> str:
+    """Short hash of the content of numpy arrays.
+
+    Args:
+        arrays: Numpy arrays.
+
+    Returns:
+        Hash as hex string.
+    """
+    digest = hashlib.blake2b(digest_size=4)
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+
+def _shorten(text: str, max_length: int) -> str:
+    """Limit the length of a text."""
+    return text if len(text) <= max_length else text[: max_length - 3] + "..."
+
+
+def _summarize_items(
+    items: t.Iterable[str], count: int, brackets: str, max_length: int
+) -> str:
+    """Join rendered items until the maximum length is reached.
+
+    Args:
+        items: Rendered items (consumed lazily).
+        count: Total number of items.
+        brackets: Opening and closing bracket.
+        max_length: Maximum length of the result.
+
+    Returns:
+        Joined items.
+    """
+    parts = []
+    length = 0
+    for item in items:
+        if len(parts) >= MAX_ITEMS or length > max_length:
+            break
+        parts.append(item)
+        length += len(item) + 2
+    if len(parts) < count:
+        parts.append(f"... ({count} items)")
+    return _shorten(brackets[0] + ", ".join(parts) + brackets[1], max_length)
+
+
+def summarize(value: t.Any, max_length: int = MAX_LENGTH) -> str:
+    """Render a value for a log message without stringifying large payloads.
+
+    Numpy arrays and waveforms are summarized by their shape, dtype and a hash
+    of their content. Only the first elements of sequences and dictionaries
+    are rendered.
+
+    Args:
+        value: Value to render.
+        max_length: Maximum length of the result.
+
+    Returns:
+        Rendered value.
+    """
+    if isinstance(value, np.ndarray):
+        if value.size <= MAX_ITEMS:
+            return _shorten(str(value), max_length)
+        return (
+            f"array(shape={value.shape}, dtype={value.dtype}, "
+            f"hash={_array_hash(value)})"
+        )
+    if isinstance(value, Waveforms):
+        slots = sorted(value.keys())
+        waves = [
+            wave
+            for slot in slots
+            for wave in value[slot]
+            if isinstance(wave, np.ndarray)
+        ]
+        return _shorten(
+            f"Waveforms(slots={slots}, samples={sum(len(w) for w in waves)}, "
+            f"hash={_array_hash(*waves)})",
+            max_length,
+        )
+    if isinstance(value, (str, bytes)):
+        return _shorten(str(value[: max_length + 1]), max_length)
+    if isinstance(value, Mapping):
+        items = (
+            f"{key!r}: {summarize(item, max_length // 2)}"
+            for key, item in value.items()
+        )
+        return _summarize_items(items, len(value), "{}", max_length)
+    if isinstance(value, (list, tuple)):
+        items = (summarize(item, max_length // 2) for item in value)
+        return _summarize_items(items, len(value), "[]", max_length)
+    return _shorten(str(value), max_length)
+
+
+class Payload:
+    """Log argument that is only summarized if the message is emitted.
+
+    Args:
+        value: Value to log (see ``summarize``).
+        max_length: Maximum length of the rendered value.
+    """
+
+    __slots__ = ("value", "max_length")
+
+    def __init__(self, value: t.Any, max_length: int = MAX_LENGTH):
+        self.value = value
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        return summarize(self.value, self.max_length)
+
+    __repr__ = __str__
+
+
+class RateLimitFilter(logging.Filter):
+    """Limit the number of emitted messages per interval.
+
+    Only records that are logged with ``extra=RATE_LIMITED`` are limited. Every
+    message (format string) is limited on its own, per value of its first
+    argument if that is a string (e.g. the name of the quantity, so that a
+    ``GET_CFG`` still logs every quantity). The number of suppressed
+    messages is added to the next emitted record (``suppressed`` attribute)
+    and appended to the message by the formatter of ``configure_logger``.
+
+    Args:
+        rate: Maximum number of messages per interval. 0 disables the limit.
+        interval: Interval in seconds.
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT, interval: float = 1.0):
+        super().__init__()
+        self.rate = rate
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or not getattr(record, "rate_limited", False):
+            return True
+        # the filter is shared by several handlers, a record is counted once
+        emitted = getattr(record, "rate_limit_emitted", None)
+        if emitted is not None:
+            return emitted
+        record.rate_limit_emitted = self._count(record)
+        return record.rate_limit_emitted
+
+    def _count(self, record: logging.LogRecord) -> bool:
+        """Count a record in the window of its message.
+
+        Args:
+            record: Rate limited record.
+
+        Returns:
+            Flag if the record is emitted.
+        """
+        args = record.args
+        subject = args[0] if isinstance(args, tuple) and args else None
+        key = (record.name, record.msg, subject if isinstance(subject, str) else None)
+        now = time.monotonic()
+        with self._lock:
+            start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+            if count >= self.rate:
+                self._windows[key] = (start, count, suppressed + 1)
+                return False
+            self._windows[key] = (start, count + 1, 0)
+        record.suppressed = suppressed
+        return True
+
+
+class _Formatter(logging.Formatter):
+    """Formatter that appends the number of suppressed messages."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves the formatting to the listener thread.
+
+    The default ``QueueHandler`` renders the message before it is queued. The
+    records are only used within the process, so only the ``Payload``
+    arguments are summarized before queueing (the value may be changed or
+    reused by the caller afterwards). The message is formatted by the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if isinstance(args, Mapping):
+            if any(isinstance(arg, Payload) for arg in args.values()):
+                record = copy.copy(record)
+                record.args = {
+                    key: str(arg) if isinstance(arg, Payload) else arg
+                    for key, arg in args.items()
+                }
+        elif args and any(isinstance(arg, Payload) for arg in args):
+            record = copy.copy(record)
+            record.args = tuple(
+                str(arg) if isinstance(arg, Payload) else arg for arg in args
+            )
+        return record
+
+
+class _LoggerSetup(t.NamedTuple):
+    """Handlers installed on a logger by ``configure_logger``."""
+
+    key: t.Tuple[t.Optional[str], bool]
+    handlers: t.List[logging.Handler]
+    installed: t.List[logging.Handler]
+    listener: t.Optional[QueueListener]
+    rate_filter: RateLimitFilter
+
+
+_setups: t.Dict[str, _LoggerSetup] = {}
+_setup_lock = threading.Lock()
+
+
+def _remove_setup(logger_: logging.Logger) -> None:
+    """Remove the handlers installed by ``configure_logger`` from a logger.
+
+    Queued records are written before the handlers are closed.
+
+    Args:
+        logger_: Logger
+    """
+    setup = _setups.pop(logger_.name, None)
+    if setup is None:
+        return
+    for handler in setup.installed:
+        logger_.removeHandler(handler)
+    if setup.listener is not None:
+        setup.listener.stop()
+    for handler in setup.handlers:
+        handler.close()
+
+
+@atexit.register
+def _stop_listeners() -> None:
+    """Write all queued records at exit."""
+    with _setup_lock:
+        for name in list(_setups):
+            _remove_setup(logging.getLogger(name))
 
 
 def configure_logger(
-    logger_: logging.Logger, level: int, filepath: t.Optional[str] = None
+    logger_: logging.Logger,
+    level: int,
+    filepath: t.Optional[str] = None,
+    rate_limit: float = RATE_LIMIT,
+    asynchronous: bool = False,
 ) -> None:
     """Configure logger.
 
     Setup formatter
     Log to std out
     Configure rotating file handler to keep logging file size reasonable.
+    Limit the rate of hot messages.
+
+    The handlers are only installed once per logger. Calling the function again
+    only updates the level and the rate limit, unless the file path or the mode
+    changed. The handlers also write the records of all child loggers (e.g.
+    configure the package logger to include the records of all modules). The
+    rate limit is therefore applied by the handlers.
+
+    In asynchronous mode the records are passed through a queue. Formatting and
+    writing the messages is done by a background thread.
 
     Args:
         logger_: Logger
         level: Log level
         filepath: Logging filepath
+        rate_limit: Messages per second of every rate limited message.
+            0 disables the limit.
+        asynchronous: Flag if the messages are written by a background thread.
     """
-    # Set up logger
-    formatter = logging.Formatter(
-        "[%(asctime)s] %(levelname)s: %(message).200s",
-        datefmt="%a, %d %b %Y %H:%M:%S",
-    )
-    # always log to std out
-    std_out_handler = logging.StreamHandler(sys.stdout)
-    std_out_handler.setFormatter(formatter)
-    logger_.addHandler(std_out_handler)
-    # log to path if specified
-    if filepath:
-        # Maximum of 5 MB log files.
-        file_handler = RotatingFileHandler(filepath, maxBytes=int(5e6), backupCount=10)
-        file_handler.setFormatter(formatter)
-        logger_.addHandler(file_handler)
+    key = (str(filepath) if filepath else None, bool(asynchronous))
+    with _setup_lock:
+        setup = _setups.get(logger_.name)
+        if setup is None or setup.key != key:
+            _remove_setup(logger_)
+            # Set up logger
+            formatter = _Formatter(
+                "[%(asctime)s] %(levelname)s: %(message).200s",
+                datefmt="%a, %d %b %Y %H:%M:%S",
+            )
+            # always log to std out
+            handlers = [logging.StreamHandler(sys.stdout)]
+            # log to path if specified
+            if filepath:
+                # Maximum of 5 MB log files.
+                handlers.append(
+                    RotatingFileHandler(filepath, maxBytes=int(5e6), backupCount=10)
+                )
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            listener = None
+            installed = handlers
+            if asynchronous:
+                records = queue.SimpleQueue()
+                installed = [_DeferredQueueHandler(records)]
+                listener = QueueListener(records, *handlers)
+                listener.start()
+            # one filter for all handlers, a message is counted only once
+            rate_filter = RateLimitFilter(rate_limit)
+            for handler in installed:
+                handler.addFilter(rate_filter)
+                logger_.addHandler(handler)
+            setup = _LoggerSetup(key, handlers, installed, listener, rate_filter)
+            _setups[logger_.name] = setup
+    setup.rate_filter.rate = rate_limit
     logger_.setLevel(level)
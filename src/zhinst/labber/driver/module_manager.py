@@ -0,0 +1,358 @@
+"""Helper for the signal and result quantities of LabOne modules."""
+import fnmatch
+import logging
+import threading
+import typing as t
+
+import numpy as np
+
+from zhinst.labber.driver.node_path import QuantPathMap
+from zhinst.labber.driver.profiling import Measure, no_measure
+
+logger = logging.getLogger(__name__)
+
+
+class SignalEntry(t.NamedTuple):
+    """Pairing of a signal quantity with its result quantity.
+
+    Attributes:
+        signal_quant: Name of the signal quantity.
+        result_quant: Name of the result quantity.
+        path: Subscribable node path of the signal.
+        option: Signal in the module result (empty if none is specified).
+    """
+
+    signal_quant: str
+    result_quant: str
+    path: str
+    option: str
+
+
+def iter_chunks(result: t.Any) -> t.Iterator[t.Dict[str, t.Any]]:
+    """Iterate over all chunks of a module result.
+
+    Args:
+        result: Result of a node in the module read (nested lists of chunks).
+
+    Yields:
+        Chunks from the oldest to the newest one.
+    """
+    if isinstance(result, list):
+        for element in result:
+            yield from iter_chunks(element)
+    elif result:
+        yield result
+
+
+class SignalTable:
+    """Precomputed pairing of the signal and result quantities of a module.
+
+    The wildcard paths are matched against the quantities only once. The
+    values of the signal quantities are parsed again only if they change.
+
+    Args:
+        quant_map: Mapping between quantity names and node paths.
+        parse: Function that converts the value of a signal quantity into the
+            subscribable node path and the signal in the result.
+    """
+
+    def __init__(
+        self,
+        quant_map: QuantPathMap,
+        parse: t.Callable[[str], t.Tuple[str, str]],
+    ):
+        self._quant_map = quant_map
+        self._parse = parse
+        self._size = len(quant_map)
+        self._matches = {}
+        self._pairs = {}
+        self._parsed = {}
+
+    def _check_quants(self) -> None:
+        """Drop the matches if quantities were added to the map."""
+        if len(self._quant_map) != self._size:
+            self._size = len(self._quant_map)
+            self._matches.clear()
+            self._pairs.clear()
+
+    def quants(self, pattern: str) -> t.List[str]:
+        """Get the quantities that match a wildcard path.
+
+        Args:
+            pattern: Wildcard path.
+
+        Returns:
+            Names of the matching quantities.
+        """
+        self._check_quants()
+        if pattern not in self._matches:
+            self._matches[pattern] = [
+                self._quant_map[path]
+                for path in fnmatch.filter(self._quant_map, pattern)
+            ]
+        return self._matches[pattern]
+
+    def parse(self, signal_quant: str, value: str) -> t.Tuple[str, str]:
+        """Get the node path and the signal of a signal quantity.
+
+        Args:
+            signal_quant: Name of the signal quantity.
+            value: Current value of the signal quantity.
+
+        Returns:
+            subscribable node path, specified signal (empty if none is specified)
+        """
+        cached = self._parsed.get(signal_quant)
+        if cached is None or cached[0] != value:
+            cached = (value, self._parse(value.lower()))
+            self._parsed[signal_quant] = cached
+        return cached[1]
+
+    def entries(
+        self, signals: str, results: str, get_value: t.Callable[[str], str]
+    ) -> t.List[SignalEntry]:
+        """Get the pairing of the signal and result quantities.
+
+        Args:
+            signals: Wildcard path for all signal quantities.
+            results: Wildcard path for all result quantities.
+            get_value: Function that returns the value of a quantity.
+
+        Returns:
+            Pairing of the signal and result quantities.
+        """
+        self._check_quants()
+        key = (signals, results)
+        if key not in self._pairs:
+            self._pairs[key] = list(zip(self.quants(signals), self.quants(results)))
+        return [
+            SignalEntry(
+                signal_quant,
+                result_quant,
+                *self.parse(signal_quant, get_value(signal_quant)),
+            )
+            for signal_quant, result_quant in self._pairs[key]
+        ]
+
+
+class ModulePoller:
+    """Background thread that reads the results of a LabOne module.
+
+    The module is read at a fixed interval. New results are collected in a
+    back buffer, which is swapped with the front buffer once it is complete.
+    Readers get the front buffer immediately and never wait on the module.
+
+    Every front buffer has a sequence number that is increased with each
+    swap. Readers pass the last sequence number they used to ``read`` to only
+    get the results that were updated since.
+
+    The module is only read while holding ``module_lock``. Other threads must
+    hold the same lock while they use the module (e.g. execute or subscribe).
+
+    Args:
+        module: Raw LabOne module.
+        interval: Time in seconds between two reads.
+        callback: Function that is called in the thread with every new result
+            (e.g. to accumulate all chunks of a result).
+        measure: Function that measures the duration of the reads (see
+            ``zhinst.labber.driver.profiling``).
+        module_lock: Lock that guards all calls of the module. A new lock is
+            created if not specified.
+    """
+
+    def __init__(
+        self,
+        module: t.Any,
+        interval: float,
+        callback: t.Optional[t.Callable[[t.Dict[str, t.Any]], None]] = None,
+        measure: Measure = no_measure,
+        module_lock: t.Optional[threading.Lock] = None,
+    ):
+        self._module = module
+        self._measure = measure
+        self._interval = interval
+        self._callback = callback
+        self.module_lock = module_lock or threading.Lock()
+        self._front = {}
+        self._updated = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the background thread."""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="zhinst-labber-module-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and wait until it is finished."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def is_running(self) -> bool:
+        """Flag if the background thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        """Read the module until the thread is stopped."""
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self._interval)
+
+    def poll(self) -> bool:
+        """Read the module once and publish the new results.
+
+        Results of nodes without new data are kept from the previous read.
+
+        Returns:
+            Flag if new results were published.
+        """
+        try:
+            with self._measure("module", "poll"), self.module_lock:
+                result = self._module.read(flat=True)
+        except Exception as error:
+            logger.error("Reading the module failed: %s", error)
+            return False
+        if not result:
+            return False
+        if self._callback is not None:
+            try:
+                self._callback(result)
+            except Exception as error:
+                logger.error("Processing the module result failed: %s", error)
+        # the front buffer is never modified once it is published
+        back = dict(self._front)
+        back.update(result)
+        updated = dict(self._updated)
+        updated.update(dict.fromkeys(result, self._sequence + 1))
+        with self._lock:
+            self._front = back
+            self._updated = updated
+            self._sequence += 1
+        return True
+
+    def read(self, since: t.Optional[int] = None) -> t.Tuple[int, t.Dict[str, t.Any]]:
+        """Get the latest complete results.
+
+        Args:
+            since: Sequence number of a previous read. Only the results that
+                were updated after that read are returned. Defaults to all
+                results.
+
+        Returns:
+            Sequence number, results (flat dictionary of the module read).
+        """
+        with self._lock:
+            sequence, front, updated = self._sequence, self._front, self._updated
+        if since is None:
+            return sequence, front
+        return sequence, {
+            path: value for path, value in front.items() if updated[path] > since
+        }
+
+
+class RingBuffer:
+    """Growable ring buffer with a maximum size.
+
+    The memory is allocated as needed (doubling the size) up to the maximum
+    size. Once the buffer is full the oldest values are overwritten. The
+    buffer can be used from multiple threads.
+
+    Args:
+        max_size: Maximum number of values.
+        initial_size: Number of values that are allocated initially.
+    """
+
+    def __init__(self, max_size: int, initial_size: int = 1024):
+        self._max_size = max(int(max_size), 1)
+        self._initial_size = max(min(int(initial_size), self._max_size), 1)
+        self._data = None
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def max_size(self) -> int:
+        """Maximum number of values."""
+        return self._max_size
+
+    def _ordered(self) -> np.ndarray:
+        """Values from the oldest to the newest one."""
+        end = self._start + self._size
+        if end <= len(self._data):
+            return self._data[self._start : end]
+        return np.concatenate(
+            (self._data[self._start :], self._data[: end - len(self._data)])
+        )
+
+    def _reserve(self, size: int, dtype: np.dtype) -> None:
+        """Allocate memory for at least ``size`` values (up to the maximum)."""
+        if self._data is None:
+            capacity = self._initial_size
+            while capacity < size and capacity < self._max_size:
+                capacity *= 2
+            self._data = np.empty(min(capacity, self._max_size), dtype=dtype)
+            return
+        dtype = np.result_type(self._data.dtype, dtype)
+        capacity = len(self._data)
+        while capacity < size and capacity < self._max_size:
+            capacity *= 2
+        capacity = min(capacity, self._max_size)
+        if capacity != len(self._data) or dtype != self._data.dtype:
+            data = np.empty(capacity, dtype=dtype)
+            data[: self._size] = self._ordered()
+            self._data = data
+            self._start = 0
+
+    def append(self, values: np.ndarray) -> None:
+        """Append values to the buffer.
+
+        Args:
+            values: Values (multi-dimensional arrays are flattened).
+        """
+        values = np.ravel(values)
+        if not values.size:
+            return
+        with self._lock:
+            self._reserve(self._size + values.size, values.dtype)
+            capacity = len(self._data)
+            if values.size >= capacity:
+                self._data[:] = values[-capacity:]
+                self._start = 0
+                self._size = capacity
+                return
+            end = (self._start + self._size) % capacity
+            first = min(values.size, capacity - end)
+            self._data[end : end + first] = values[:first]
+            self._data[: values.size - first] = values[first:]
+            overflow = max(self._size + values.size - capacity, 0)
+            self._start = (self._start + overflow) % capacity
+            self._size += values.size - overflow
+
+    def values(self) -> np.ndarray:
+        """Get a copy of all values from the oldest to the newest one.
+
+        Returns:
+            Values of the buffer.
+        """
+        with self._lock:
+            if self._data is None:
+                return np.array([])
+            return np.array(self._ordered())
+
+    def clear(self) -> None:
+        """Remove all values (the allocated memory is kept)."""
+        with self._lock:
+            self._start = 0
+            self._size = 0
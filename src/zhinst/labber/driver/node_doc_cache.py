@@ -0,0 +1,153 @@
+"""On-disk cache of the node documentation of devices."""
+import hashlib
+import logging
+import os
+import re
+import sys
+import tempfile
+import typing as t
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Path of the listNodesJSON call for all nodes of a device
+DEVICE_NODES = re.compile(r"/?(dev\w+)/\*", re.IGNORECASE)
+
+
+def default_directory() -> Path:
+    """Default directory of the cache of the current user.
+
+    Returns:
+        Cache directory.
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", tempfile.gettempdir())
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(base) / "zhinst-labber" / "nodedoc"
+
+
+class NodeDocCache:
+    """On-disk cache of the node documentation of devices.
+
+    The node documentation only changes with the device type, the installed
+    options, the firmware and the LabOne version. These values are read from
+    the data server (a few small gets) to decide if a cached documentation is
+    still valid. The cache is not used if one of them can not be read.
+
+    Args:
+        directory: Directory of the cache.
+    """
+
+    def __init__(self, directory: t.Union[str, Path]):
+        self._directory = Path(directory)
+
+    def key(self, connection: t.Any, serial: str) -> t.Optional[str]:
+        """Get the key of the current node documentation of a device.
+
+        Args:
+            connection: Connection to the data server.
+            serial: Serial of the device.
+
+        Returns:
+            Key of the node documentation. None if the versions of the device
+            can not be read.
+        """
+        serial = serial.lower()
+        try:
+            versions = [
+                serial,
+                str(connection.getString(f"/{serial}/features/devtype")),
+                str(connection.getString(f"/{serial}/features/options")),
+                str(connection.getInt(f"/{serial}/system/fwrevision")),
+                str(connection.getInt("/zi/about/revision")),
+            ]
+        except Exception as error:
+            logger.debug("Versions of %s can not be read: %s", serial, error)
+            return None
+        digest = hashlib.blake2b("\n".join(versions).encode(), digest_size=8)
+        return f"{serial}_{digest.hexdigest()}"
+
+    def load(self, key: str) -> t.Optional[str]:
+        """Load a node documentation.
+
+        Args:
+            key: Key of the node documentation.
+
+        Returns:
+            Node documentation (JSON) or None if it is not cached.
+        """
+        try:
+            return (self._directory / f"{key}.json").read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def store(self, key: str, nodes_json: str) -> None:
+        """Store a node documentation.
+
+        Outdated documentations of the same device are removed.
+
+        Args:
+            key: Key of the node documentation.
+            nodes_json: Node documentation (JSON).
+        """
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            serial = key.split("_")[0]
+            for outdated in self._directory.glob(f"{serial}_*.json"):
+                outdated.unlink()
+            # write atomically since several drivers may open at once
+            file = self._directory / f"{key}.json"
+            temp_file = file.with_suffix(f".{os.getpid()}.tmp")
+            temp_file.write_text(nodes_json, encoding="utf-8")
+            os.replace(temp_file, file)
+        except OSError as error:
+            logger.warning("Node documentation could not be cached: %s", error)
+
+
+class CachedNodeDocConnection:
+    """Data server connection that uses the cached node documentation.
+
+    Wraps a connection (e.g. ``zhinst.core.ziDAQServer``) and forwards all
+    calls. Only the node documentation of complete devices (``listNodesJSON``
+    of ``/devXXXX/*``) is read from the cache.
+
+    Args:
+        connection: Connection to the data server.
+        cache: Cache of the node documentation.
+    """
+
+    def __init__(self, connection: t.Any, cache: NodeDocCache):
+        self._connection = connection
+        self._cache = cache
+
+    def __getattr__(self, name: str) -> t.Any:
+        value = getattr(self._connection, name)
+        if callable(value):
+            # later lookups do not pass through __getattr__
+            setattr(self, name, value)
+        return value
+
+    def listNodesJSON(self, path: str, *args, **kwargs) -> str:
+        """List the nodes and their documentation.
+
+        Args:
+            path: Path of the nodes.
+            args: Additional arguments of ``listNodesJSON``.
+            kwargs: Additional keyword arguments of ``listNodesJSON``.
+
+        Returns:
+            Node documentation (JSON).
+        """
+        match = DEVICE_NODES.fullmatch(path)
+        if match is None or args or kwargs:
+            return self._connection.listNodesJSON(path, *args, **kwargs)
+        key = self._cache.key(self._connection, match.group(1))
+        if key is None:
+            return self._connection.listNodesJSON(path)
+        nodes_json = self._cache.load(key)
+        if nodes_json is None:
+            logger.info("Node documentation of %s is not cached", match.group(1))
+            nodes_json = self._connection.listNodesJSON(path)
+            self._cache.store(key, nodes_json)
+        return nodes_json
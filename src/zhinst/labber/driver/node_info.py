@@ -0,0 +1,55 @@
+"""Precompiled lookup of the driver information for node paths."""
+import fnmatch
+import re
+import typing as t
+
+
+class NodeInfoIndex:
+    """Index for the driver information of the quants in the settings.
+
+    The quants section of the settings file maps unix shell-style wildcard
+    patterns to the information about a node. All patterns are compiled into
+    a single regular expression that preserves the first-match semantic of the
+    pattern order. The resolved driver information for each node path is cached
+    so that repeated lookups do not need to match the patterns again.
+
+    Args:
+        node_info: Ordered mapping between path patterns and the node info.
+    """
+
+    def __init__(self, node_info: t.Dict[str, t.Dict[str, t.Any]]):
+        self._driver_info = [info.get("driver", {}) for info in node_info.values()]
+        self._pattern = re.compile(
+            "|".join(
+                f"(?P<p{index}>{fnmatch.translate(pattern)})"
+                for index, pattern in enumerate(node_info)
+            )
+        )
+        self._cache = {}
+
+    def __len__(self) -> int:
+        return len(self._driver_info)
+
+    def get(self, node_path: str) -> t.Dict[str, t.Any]:
+        """Get the driver information for a node path.
+
+        If there is no information available the result will be an empty
+        dictionary.
+
+        Args:
+            node_path: Lower case path of the node (e.g. /awgs/0/waves1)
+
+        Returns:
+            Driver information of the first pattern that matches the path.
+        """
+        try:
+            return self._cache[node_path]
+        except KeyError:
+            pass
+        driver_info = {}
+        if self._driver_info:
+            match = self._pattern.match(node_path)
+            if match:
+                driver_info = self._driver_info[int(match.lastgroup[1:])]
+        self._cache[node_path] = driver_info
+        return driver_info
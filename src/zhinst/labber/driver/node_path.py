@@ -0,0 +1,125 @@
+"""Pure string representation of node paths and their quantities."""
+import posixpath
+import typing as t
+
+
+class NodePath(str):
+    """Absolute ``/`` separated path of a node or function.
+
+    Unlike ``pathlib.Path`` the path is a pure string operation and never
+    touches the filesystem. Joining a relative path with ``/`` resolves ``.``
+    and ``..`` parts.
+
+    Args:
+        path: Absolute path (e.g. /awgs/0/waves1)
+    """
+
+    def __new__(cls, path: str = "/") -> "NodePath":
+        return super().__new__(cls, posixpath.normpath("/" + path.lstrip("/")))
+
+    def __truediv__(self, relative: str) -> "NodePath":
+        return NodePath(posixpath.join(self, relative))
+
+    @property
+    def parts(self) -> t.Tuple[str, ...]:
+        """Path components without the root (e.g. ("awgs", "0", "waves1"))"""
+        return tuple(part for part in self.split("/") if part)
+
+    @property
+    def name(self) -> str:
+        """Last component of the path."""
+        return posixpath.basename(self)
+
+    @property
+    def parent(self) -> "NodePath":
+        """Parent path."""
+        return NodePath(posixpath.dirname(self))
+
+
+class QuantPathMap:
+    """Bidirectional mapping between Labber quantity names and node paths.
+
+    The quantity name is converted into its path representation by splitting it
+    at the Labber delimiter. Unknown entries are converted on first access and
+    stored for later use.
+
+    Args:
+        delimiter: Labber delimiter between the path components.
+        quant_names: Quantity names that are added to the map.
+    """
+
+    def __init__(self, delimiter: str, quant_names: t.Iterable[str] = ()):
+        self._delimiter = delimiter
+        self._to_path = {}
+        self._to_quant = {}
+        for quant_name in quant_names:
+            self.add(quant_name)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._to_quant
+
+    def __getitem__(self, path: str) -> str:
+        return self._to_quant[path]
+
+    def __setitem__(self, path: str, quant_name: str) -> None:
+        path = NodePath(path)
+        self._to_quant[path] = quant_name
+        self._to_path[quant_name] = path
+
+    def __iter__(self) -> t.Iterator[NodePath]:
+        return iter(self._to_quant)
+
+    def __len__(self) -> int:
+        return len(self._to_quant)
+
+    def _convert(self, quant_name: str) -> NodePath:
+        """Convert a quantity name into its path representation."""
+        return NodePath("/".join(quant_name.lower().split(self._delimiter)))
+
+    def add(self, quant_name: str) -> NodePath:
+        """Add a quantity to the map.
+
+        Args:
+            quant_name: Name of the quantity.
+
+        Returns:
+            Path of the quantity.
+        """
+        path = self._convert(quant_name)
+        self[path] = quant_name
+        return path
+
+    def to_path(self, quant_name: str) -> NodePath:
+        """Convert a quantity name into its path.
+
+        Args:
+            quant_name: Name of the quantity.
+
+        Returns:
+            Path of the quantity.
+        """
+        try:
+            return self._to_path[quant_name]
+        except KeyError:
+            path = self._convert(quant_name)
+            self._to_path[quant_name] = path
+            return path
+
+    def to_quant(self, path: str) -> str:
+        """Convert a path into the quantity name.
+
+        If no quantity is known for the path the name is derived from the path
+        components.
+
+        Args:
+            path: Path of the quantity.
+
+        Returns:
+            Name of the quantity.
+        """
+        try:
+            return self._to_quant[path]
+        except KeyError:
+            name = self._delimiter.join(NodePath(path).parts)
+            self._to_quant[path] = name
+            return name
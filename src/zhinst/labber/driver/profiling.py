@@ -0,0 +1,401 @@
+"""Timing instrumentation and profiling of the driver operations."""
+import bisect
+import collections
+import contextlib
+import cProfile
+import csv
+import fnmatch
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the histogram buckets (4 per decade, 1us - 100s).
+# Durations above the last bound are counted in an additional overflow bucket.
+BUCKETS = tuple(10 ** (exponent / 4) for exponent in range(-24, 9))
+# Percentiles that are part of the summary
+PERCENTILES = (50, 90, 99)
+# Supported formats of the dumped statistics
+FORMATS = ("json", "csv")
+# Labber operation types that can be profiled
+PROFILE_OPERATIONS = ("SET", "GET", "SET_CFG", "GET_CFG")
+# Default maximum number of profile files
+MAX_PROFILES = 20
+
+# Function that returns a context manager which measures a piece of work
+# (operation type, name)
+Measure = t.Callable[[str, str], t.ContextManager]
+T = t.TypeVar("T")
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def no_measure(operation: str, name: str) -> t.ContextManager:
+    """Measure function that does nothing.
+
+    Args:
+        operation: Type of the operation.
+        name: Name of the quantity or function.
+
+    Returns:
+        Context manager without any effect.
+    """
+    return _NULL_CONTEXT
+
+
+@contextlib.contextmanager
+def _nested(contexts: t.List[t.ContextManager]) -> t.Iterator[None]:
+    """Enter several context managers."""
+    with contextlib.ExitStack() as stack:
+        for context in contexts:
+            stack.enter_context(context)
+        yield
+
+
+def nested(contexts: t.List[t.ContextManager]) -> t.ContextManager:
+    """Combine the context managers of several measure functions.
+
+    Args:
+        contexts: Context managers (outermost first).
+
+    Returns:
+        Context manager that enters all context managers.
+    """
+    if not contexts:
+        return _NULL_CONTEXT
+    if len(contexts) == 1:
+        return contexts[0]
+    return _nested(contexts)
+
+
+def measure_iter(
+    measure: Measure, operation: str, name: str, items: t.Iterable[T]
+) -> t.Iterator[T]:
+    """Measure the production of every item of an iterable.
+
+    The items are measured in the thread that consumes the iterator (e.g.
+    the worker thread of a pipeline).
+
+    Args:
+        measure: Measure function.
+        operation: Type of the operation.
+        name: Name of the work (e.g. file name).
+        items: Iterable that produces the items.
+
+    Yields:
+        Items of the iterable.
+    """
+    done = object()
+    iterator = iter(items)
+    while True:
+        with measure(operation, name):
+            item = next(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+class LatencyHistogram:
+    """Histogram of durations with fixed buckets (see ``BUCKETS``).
+
+    Only the bucket counts are stored, the memory usage does not grow with the
+    number of measurements.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, duration: float) -> None:
+        """Add a measured duration.
+
+        Args:
+            duration: Duration in seconds.
+        """
+        self.counts[bisect.bisect_left(BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+
+    def percentile(self, percent: float) -> float:
+        """Estimate a percentile of the durations.
+
+        Args:
+            percent: Percentile (0 - 100).
+
+        Returns:
+            Upper bound of the bucket that contains the percentile (limited to
+            the maximum duration). 0 if there are no measurements.
+        """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100) or 1
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        bound = BUCKETS[index] if index < len(BUCKETS) else math.inf
+        return min(bound, self.max)
+
+    def summary(self) -> t.Dict[str, float]:
+        """Summary of the measured durations.
+
+        Returns:
+            Count, total, mean, min, max and percentiles (in seconds).
+        """
+        summary = {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}"] = self.percentile(percent)
+        return summary
+
+
+class LatencyRecorder:
+    """Collects the durations of the driver operations.
+
+    The durations are aggregated into a ``LatencyHistogram`` per operation
+    type (e.g. set, get, function) and name (e.g. quantity or function name).
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def add(self, operation: str, name: str, duration: float) -> None:
+        """Add a measured duration.
+
+        Args:
+            operation: Type of the operation.
+            name: Name of the quantity or function.
+            duration: Duration in seconds.
+        """
+        key = (operation, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.add(duration)
+
+    @contextlib.contextmanager
+    def measure(self, operation: str, name: str) -> t.Iterator[None]:
+        """Measure the duration of a piece of work (see ``Measure``).
+
+        Args:
+            operation: Type of the operation.
+            name: Name of the quantity or function.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(operation, name, time.perf_counter() - start)
+
+    def histograms(self) -> t.Dict[t.Tuple[str, str], LatencyHistogram]:
+        """Get the histograms of all operations.
+
+        Returns:
+            Histograms by operation type and name.
+        """
+        with self._lock:
+            return dict(self._histograms)
+
+    def clear(self) -> None:
+        """Remove all measurements."""
+        with self._lock:
+            self._histograms.clear()
+
+    def dump(self, file: t.Union[str, Path], format: str = "json") -> Path:
+        """Write the statistics of all operations to a file.
+
+        JSON contains the summary and the non empty buckets of every
+        histogram. CSV contains one row with the summary per operation.
+
+        Args:
+            file: File path. The suffix is replaced by the format.
+            format: ``json`` or ``csv``.
+
+        Returns:
+            Path of the written file.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format {format}. Must be one of {FORMATS}.")
+        file = Path(file).with_suffix(f".{format}")
+        histograms = sorted(self.histograms().items())
+        rows = [
+            {"operation": operation, "name": name, **histogram.summary()}
+            for (operation, name), histogram in histograms
+        ]
+        if format == "csv":
+            with file.open("w", newline="", encoding="utf-8") as csv_file:
+                fields = ["operation", "name", *LatencyHistogram().summary()]
+                writer = csv.DictWriter(csv_file, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+            return file
+        for row, (_, histogram) in zip(rows, histograms):
+            row["buckets"] = {
+                f"{BUCKETS[index]:.3g}" if index < len(BUCKETS) else "inf": count
+                for index, count in enumerate(histogram.counts)
+                if count
+            }
+        file.write_text(json.dumps({"operations": rows}, indent=2), encoding="utf-8")
+        return file
+
+
+class ProfileCapture:
+    """Captures ``cProfile`` profiles of selected driver operations.
+
+    One ``.pstats`` file is written per captured operation. Only one operation
+    is profiled at a time, operations that start while another one is being
+    profiled (nested or in other threads) are not captured.
+
+    Args:
+        directory: Directory of the profile files.
+        operations: Labber operation types (see ``PROFILE_OPERATIONS``). Only
+            the set and get operations of these types are captured.
+        quants: Glob patterns of quantity names. Set and get operations of
+            matching quantities are captured (limited to ``operations`` if
+            specified).
+        functions: Glob patterns of function names (e.g.
+            ``awg/write_to_waveform_memory``). Calls of matching functions
+            are captured.
+        max_files: Maximum number of profile files.
+        rotate: Flag if the oldest profile file is removed once the maximum
+            number is reached. Otherwise no further operations are captured.
+
+    Raises:
+        ValueError: If an operation type is not supported.
+    """
+
+    def __init__(
+        self,
+        directory: t.Union[str, Path],
+        operations: t.Iterable[str] = (),
+        quants: t.Iterable[str] = (),
+        functions: t.Iterable[str] = (),
+        max_files: int = MAX_PROFILES,
+        rotate: bool = True,
+    ):
+        self._directory = Path(directory)
+        self._operations = {operation.upper() for operation in operations}
+        unknown = self._operations.difference(PROFILE_OPERATIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown operations {sorted(unknown)}. "
+                f"Must be one of {PROFILE_OPERATIONS}."
+            )
+        self._quants = list(quants)
+        self._functions = list(functions)
+        self._max_files = max(max_files, 1)
+        self._rotate = rotate
+        self._files = collections.deque()
+        self._count = 0
+        self._active = threading.Lock()
+
+    def matches(self, operation: str, name: str) -> bool:
+        """Check if an operation is selected for profiling.
+
+        Args:
+            operation: Type of the operation (see ``Measure``).
+            name: Name of the quantity or function.
+
+        Returns:
+            Flag if the operation is captured.
+        """
+        if not self._rotate and self._count >= self._max_files:
+            return False
+        if operation == "function":
+            return any(fnmatch.fnmatchcase(name, p) for p in self._functions)
+        if operation.upper() not in PROFILE_OPERATIONS:
+            return False
+        if self._operations and operation.upper() not in self._operations:
+            return False
+        if self._quants:
+            return any(fnmatch.fnmatchcase(name, p) for p in self._quants)
+        return bool(self._operations)
+
+    def measure(self, operation: str, name: str) -> t.ContextManager:
+        """Profile an operation if it is selected (see ``Measure``).
+
+        Args:
+            operation: Type of the operation.
+            name: Name of the quantity or function.
+
+        Returns:
+            Context manager that profiles the enclosed work.
+        """
+        if not self.matches(operation, name):
+            return _NULL_CONTEXT
+        return self._capture(operation, name)
+
+    @contextlib.contextmanager
+    def _capture(self, operation: str, name: str) -> t.Iterator[None]:
+        """Profile the enclosed work and write the profile to a file."""
+        if not self._active.acquire(blocking=False):
+            yield
+            return
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as error:
+                # e.g. another profiler is active
+                logger.warning("%s %s can not be profiled: %s", operation, name, error)
+                profiler = None
+            try:
+                yield
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    self._write(profiler, operation, name)
+        finally:
+            self._active.release()
+
+    def _write(self, profiler: cProfile.Profile, operation: str, name: str) -> None:
+        """Write a profile and apply the rotation policy.
+
+        Args:
+            profiler: Profiler with the captured profile.
+            operation: Type of the operation.
+            name: Name of the quantity or function.
+        """
+        self._count += 1
+        safe_name = re.sub(r"[^\w.-]+", "_", name).strip("_")
+        file = self._directory / (
+            f"{os.getpid()}_{self._count:05d}_{operation}_{safe_name}.pstats"
+        )
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(file)
+        except OSError as error:
+            logger.error("Profile could not be written: %s", error)
+            return
+        logger.info("%s %s: profile written to %s", operation, name, file)
+        self._files.append(file)
+        while len(self._files) > self._max_files:
+            try:
+                self._files.popleft().unlink()
+            except OSError:
+                pass
@@ -0,0 +1,185 @@
+"""Ramping of node values in a background thread."""
+import logging
+import threading
+import time
+import typing as t
+
+logger = logging.getLogger(__name__)
+
+# Number of steps per second
+UPDATE_RATE = 50
+
+
+class _Ramp:
+    """Linear ramp of a single node.
+
+    Args:
+        node: Node path.
+        start: Start value.
+        target: Target value.
+        rate: Absolute change per second.
+    """
+
+    def __init__(self, node: str, start: float, target: float, rate: float):
+        self.node = node
+        self.start = start
+        self.target = target
+        self.rate = abs(rate)
+        self.value = start
+        self._t0 = time.monotonic()
+
+    def value_at(self, now: float) -> float:
+        """Value of the ramp at a point in time.
+
+        Args:
+            now: Time (``time.monotonic``).
+
+        Returns:
+            Value (limited to the target).
+        """
+        step = self.rate * (now - self._t0)
+        if step >= abs(self.target - self.start):
+            return self.target
+        return self.start + step if self.target > self.start else self.start - step
+
+
+class RampEngine:
+    """Ramps node values with a given rate in a background thread.
+
+    All running ramps are stepped at the same time. The steps of all ramps are
+    passed to ``set_values`` in a single call so they can be set in a batch.
+    The thread is only running while there are active ramps.
+
+    If a step can not be set all running ramps are stopped. The error is kept
+    for every stopped ramp until it is read with ``pop_error``.
+
+    Args:
+        set_values: Function that sets a list of (node, value) pairs.
+        update_rate: Number of steps per second.
+    """
+
+    def __init__(
+        self,
+        set_values: t.Callable[[t.List[t.Tuple[str, float]]], None],
+        update_rate: float = UPDATE_RATE,
+    ):
+        self._set_values = set_values
+        self._interval = 1 / max(update_rate, 1e-3)
+        self._ramps = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(
+        self, name: str, node: str, start: float, target: float, rate: float
+    ) -> None:
+        """Start a ramp. A running ramp with the same name is replaced.
+
+        Args:
+            name: Name of the ramp (e.g. name of the quantity).
+            node: Node path.
+            start: Start value.
+            target: Target value.
+            rate: Change per second.
+        """
+        with self._lock:
+            self._ramps[name] = _Ramp(node, start, target, rate)
+            self._errors.pop(name, None)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="zhinst-labber-ramp", daemon=True
+                )
+                self._thread.start()
+
+    def is_running(self, name: str) -> bool:
+        """Check if a ramp is running.
+
+        Args:
+            name: Name of the ramp.
+
+        Returns:
+            Flag if the ramp is running.
+        """
+        return name in self._ramps
+
+    def value(self, name: str) -> t.Optional[float]:
+        """Last value that was set by a running ramp.
+
+        Args:
+            name: Name of the ramp.
+
+        Returns:
+            Last value or None if the ramp is not running.
+        """
+        ramp = self._ramps.get(name)
+        return ramp.value if ramp is not None else None
+
+    def pop_error(self, name: str) -> t.Optional[Exception]:
+        """Get and remove the error of a failed ramp.
+
+        Args:
+            name: Name of the ramp.
+
+        Returns:
+            Error or None if the ramp did not fail.
+        """
+        with self._lock:
+            return self._errors.pop(name, None)
+
+    def stop(self, name: t.Optional[str] = None) -> t.List[str]:
+        """Stop a ramp at its current value.
+
+        Args:
+            name: Name of the ramp. Defaults to all ramps.
+
+        Returns:
+            Names of the stopped ramps.
+        """
+        with self._lock:
+            if name is None:
+                stopped = list(self._ramps)
+                self._ramps.clear()
+                return stopped
+            return [name] if self._ramps.pop(name, None) is not None else []
+
+    def close(self) -> None:
+        """Stop all ramps and wait until the thread is finished."""
+        with self._lock:
+            self._ramps.clear()
+            self._errors.clear()
+            thread = self._thread
+            self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self) -> None:
+        """Step all ramps until they are finished."""
+        while True:
+            with self._lock:
+                if not self._ramps or self._stop.is_set():
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                ramps = list(self._ramps.items())
+                steps = [(ramp.node, ramp.value_at(now)) for _, ramp in ramps]
+            try:
+                self._set_values(steps)
+            except Exception as error:
+                logger.error("Ramp stopped: %s", error)
+                with self._lock:
+                    for name, ramp in self._ramps.items():
+                        self._errors[name] = RuntimeError(
+                            f"Ramp of {ramp.node} to {ramp.target} stopped at "
+                            f"{ramp.value}: {error}"
+                        )
+                    self._ramps.clear()
+                continue
+            with self._lock:
+                for (name, ramp), (_, value) in zip(ramps, steps):
+                    ramp.value = value
+                    # ramps replaced in the meantime keep running
+                    if value == ramp.target and self._ramps.get(name) is ramp:
+                        del self._ramps[name]
+            self._stop.wait(self._interval)
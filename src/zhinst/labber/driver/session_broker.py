@@ -0,0 +1,625 @@
+"""Data server sessions shared between Labber driver processes.
+
+Labber runs every instrument driver in its own process. The session broker is
+a local process that owns a single session to each data server and serves the
+requests of all driver processes that use it (``"shared_session": "broker"``).
+The node documentation is fetched only once per data server.
+
+The broker is reached through a Unix socket (a named pipe on Windows). It is
+started by the first driver that needs it and stops once no driver has been
+connected for some time.
+
+Broker and drivers authenticate each other with a random key of the user. The
+key and the socket are stored in a directory that only the user can access
+(the pipe on Windows only accepts connections of its owner).
+"""
+import functools
+import getpass
+import logging
+import os
+import re
+import secrets
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import typing as t
+from multiprocessing.connection import (
+    AuthenticationError,
+    Client,
+    Connection,
+    Listener,
+)
+from pathlib import Path
+
+from zhinst.toolkit import Session
+
+logger = logging.getLogger(__name__)
+
+# Methods of the data server connection that are served by the broker
+ALLOWED_METHODS = (
+    "get",
+    "getInt",
+    "getDouble",
+    "getString",
+    "getComplex",
+    "getSample",
+    "getDIO",
+    "getAsEvent",
+    "set",
+    "setInt",
+    "setDouble",
+    "setString",
+    "setComplex",
+    "setVector",
+    "syncSetInt",
+    "syncSetDouble",
+    "syncSetString",
+    "sync",
+    "listNodes",
+    "listNodesJSON",
+    "connectDevice",
+    "disconnectDevice",
+    "revision",
+    "version",
+)
+# Results of these methods only change with the firmware and the options of
+# the device (or if a device is connected or disconnected)
+CACHED_METHODS = ("listNodes", "listNodesJSON")
+# Methods that change the connected devices
+DEVICE_METHODS = ("connectDevice", "disconnectDevice")
+# Data of subscriptions would be mixed between the driver processes
+UNSUPPORTED_METHODS = ("subscribe", "unsubscribe", "poll", "pollEvent")
+# Time in seconds after which the broker stops if no driver is connected
+IDLE_TIMEOUT = 300
+# Time in seconds to wait until a new broker accepts connections
+START_TIMEOUT = 10
+
+# Length in bytes of the authentication key
+AUTHKEY_LENGTH = 32
+# Access of the pipe on Windows: full access for the owner only
+PIPE_SECURITY = "D:P(A;;GA;;;OW)"
+# Path of the device in a node path
+DEVICE_PATH = re.compile(r"/?(dev\w+)", re.IGNORECASE)
+
+Server = t.Tuple[str, int, bool]
+
+
+def private_directory() -> Path:
+    """Directory of the broker files that only the current user can access.
+
+    Returns:
+        Directory path.
+
+    Raises:
+        RuntimeError: If the directory is accessible by other users.
+    """
+    if sys.platform == "win32":
+        # the profile directory of the user is private by default
+        base = os.environ.get("LOCALAPPDATA") or Path.home()
+        directory = Path(base) / "zhinst-labber"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+    directory = Path(tempfile.gettempdir()) / f"zhinst-labber-{os.getuid()}"
+    directory.mkdir(mode=0o700, exist_ok=True)
+    # the directory may have been created by another user
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or stat.S_IMODE(info.st_mode) != 0o700
+    ):
+        raise RuntimeError(
+            f"{directory} must be a directory owned by the current user with "
+            "mode 0700. Remove it to let the session broker recreate it."
+        )
+    return directory
+
+
+def default_address() -> str:
+    """Address of the broker of the current user.
+
+    Returns:
+        Path of the Unix socket or name of the pipe on Windows.
+    """
+    if sys.platform == "win32":
+        return rf"\\.\pipe\zhinst-labber-broker-{getpass.getuser()}"
+    return str(private_directory() / "broker.sock")
+
+
+def default_authkey() -> bytes:
+    """Authentication key of the broker of the current user.
+
+    The key is created on first use and stored in the private directory of
+    the user (see ``private_directory``) with mode 0600.
+
+    Returns:
+        Authentication key.
+
+    Raises:
+        RuntimeError: If the stored key is invalid or accessible by other users.
+    """
+    file = private_directory() / "broker.key"
+    try:
+        descriptor = os.open(file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(descriptor, "wb") as key_file:
+            key_file.write(secrets.token_bytes(AUTHKEY_LENGTH))
+    # another driver may still be writing the key
+    deadline = time.monotonic() + 1
+    while True:
+        authkey = file.read_bytes()
+        if len(authkey) == AUTHKEY_LENGTH or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    info = os.lstat(file)
+    if (
+        len(authkey) != AUTHKEY_LENGTH
+        or not stat.S_ISREG(info.st_mode)
+        or (sys.platform != "win32" and stat.S_IMODE(info.st_mode) != 0o600)
+    ):
+        raise RuntimeError(
+            f"Invalid session broker key {file}. Remove it to create a new one."
+        )
+    return authkey
+
+
+if sys.platform == "win32":
+    import _winapi
+    import ctypes
+    from ctypes import wintypes
+    from multiprocessing.connection import BUFSIZE, PipeListener
+
+    class _SecurityAttributes(ctypes.Structure):
+        _fields_ = [
+            ("nLength", wintypes.DWORD),
+            ("lpSecurityDescriptor", wintypes.LPVOID),
+            ("bInheritHandle", wintypes.BOOL),
+        ]
+
+    class _OwnerPipeListener(PipeListener):
+        """Named pipe that only accepts connections of its owner."""
+
+        def __init__(self, address: str):
+            descriptor = wintypes.LPVOID()
+            convert = (
+                ctypes.windll.advapi32.ConvertStringSecurityDescriptorToSecurityDescriptorW
+            )
+            convert.argtypes = [
+                wintypes.LPCWSTR,
+                wintypes.DWORD,
+                ctypes.POINTER(wintypes.LPVOID),
+                ctypes.POINTER(wintypes.ULONG),
+            ]
+            if not convert(PIPE_SECURITY, 1, ctypes.byref(descriptor), None):
+                raise ctypes.WinError()
+            self._security = _SecurityAttributes(
+                ctypes.sizeof(_SecurityAttributes), descriptor, False
+            )
+            super().__init__(address)
+
+        def _new_handle(self, first: bool = False) -> int:
+            # same as PipeListener._new_handle but with the access restriction
+            flags = _winapi.PIPE_ACCESS_DUPLEX | _winapi.FILE_FLAG_OVERLAPPED
+            if first:
+                flags |= _winapi.FILE_FLAG_FIRST_PIPE_INSTANCE
+            return _winapi.CreateNamedPipe(
+                self._address,
+                flags,
+                _winapi.PIPE_TYPE_MESSAGE
+                | _winapi.PIPE_READMODE_MESSAGE
+                | _winapi.PIPE_WAIT,
+                _winapi.PIPE_UNLIMITED_INSTANCES,
+                BUFSIZE,
+                BUFSIZE,
+                _winapi.NMPWAIT_WAIT_FOREVER,
+                ctypes.addressof(self._security),
+            )
+
+    class _OwnerListener(Listener):
+        """Listener on a named pipe that only its owner can access."""
+
+        def __init__(self, address: str, authkey: bytes):
+            # pylint: disable=super-init-not-called
+            self._listener = _OwnerPipeListener(address)
+            self._authkey = authkey
+
+
+def _listen(address: str, authkey: bytes) -> Listener:
+    """Create the listener of the broker.
+
+    Args:
+        address: Address of the broker.
+        authkey: Authentication key.
+
+    Returns:
+        Listener that accepts authenticated clients.
+    """
+    if sys.platform == "win32":
+        return _OwnerListener(address, authkey)
+    return Listener(address, authkey=authkey)
+
+
+def _device_revision(connection: t.Any, path: str) -> t.Optional[t.Tuple]:
+    """Get the firmware revision and the options of the device of a path.
+
+    Args:
+        connection: Connection to the data server.
+        path: Node path.
+
+    Returns:
+        Firmware revision and options or None if they can not be read (e.g.
+        the path does not belong to a device).
+    """
+    match = DEVICE_PATH.match(path) if isinstance(path, str) else None
+    if match is None:
+        return None
+    serial = match.group(1).lower()
+    try:
+        return (
+            connection.getInt(f"/{serial}/system/fwrevision"),
+            connection.getString(f"/{serial}/features/options"),
+        )
+    except Exception:
+        return None
+
+
+def _create_connection(host: str, port: int, hf2: bool) -> t.Any:
+    """Create the connection to a data server.
+
+    Args:
+        host: Address of the data server.
+        port: Port of the data server.
+        hf2: Flag if the data server is for hf2 devices.
+
+    Returns:
+        Connection of a new session to the data server.
+    """
+    return Session(host, port, hf2=hf2).daq_server
+
+
+class SessionBroker:
+    """Local server that shares data server sessions between processes.
+
+    Args:
+        address: Address of the broker (see ``default_address``).
+        connection_factory: Function that creates the connection to a data
+            server from host, port and hf2 flag.
+        idle_timeout: Time in seconds after which the broker stops if no
+            client is connected. 0 keeps it running until ``close``.
+        authkey: Authentication key. Defaults to the key of the user.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        connection_factory: t.Callable[[str, int, bool], t.Any] = _create_connection,
+        idle_timeout: float = IDLE_TIMEOUT,
+        authkey: t.Optional[bytes] = None,
+    ):
+        self._address = address
+        self._authkey = authkey or default_authkey()
+        self._connection_factory = connection_factory
+        self._idle_timeout = idle_timeout
+        self._connections = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._clients = 0
+        self._last_activity = time.monotonic()
+        self._listener = None
+        self._ready = threading.Event()
+        self._closed = threading.Event()
+
+    def wait_ready(self, timeout: t.Optional[float] = None) -> bool:
+        """Wait until the broker accepts connections.
+
+        Args:
+            timeout: Maximum time to wait in seconds.
+
+        Returns:
+            Flag if the broker is ready.
+        """
+        return self._ready.wait(timeout)
+
+    def serve_forever(self) -> None:
+        """Accept clients until the broker is closed or idle."""
+        self._listener = _listen(self._address, self._authkey)
+        self._ready.set()
+        logger.info("Session broker listening on %s", self._address)
+        if self._idle_timeout > 0:
+            threading.Thread(target=self._watch_idle, daemon=True).start()
+        try:
+            while not self._closed.is_set():
+                try:
+                    client = self._listener.accept()
+                except Exception as error:
+                    if not self._closed.is_set():
+                        logger.warning("Rejected client: %s", error)
+                    continue
+                if self._closed.is_set():
+                    client.close()
+                    break
+                with self._lock:
+                    self._clients += 1
+                threading.Thread(
+                    target=self._serve_client, args=(client,), daemon=True
+                ).start()
+        finally:
+            self._listener.close()
+            logger.info("Session broker stopped")
+
+    def close(self) -> None:
+        """Stop accepting clients."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._ready.is_set():
+            # wake up the blocking accept
+            try:
+                Client(self._address, authkey=self._authkey).close()
+            except Exception:
+                pass
+
+    def _watch_idle(self) -> None:
+        """Close the broker if no client was connected for a while."""
+        while not self._closed.wait(min(self._idle_timeout, 1)):
+            with self._lock:
+                idle = time.monotonic() - self._last_activity
+                if self._clients == 0 and idle > self._idle_timeout:
+                    break
+        self.close()
+
+    def _serve_client(self, client: Connection) -> None:
+        """Answer the requests of a client until it disconnects.
+
+        Args:
+            client: Connection to the client.
+        """
+        try:
+            while True:
+                try:
+                    request = client.recv()
+                except (EOFError, OSError):
+                    break
+                response = self._handle(*request)
+                try:
+                    client.send(response)
+                except (EOFError, OSError):
+                    break
+                except Exception as error:
+                    # e.g. result can not be pickled
+                    client.send(("error", RuntimeError(str(error))))
+        finally:
+            client.close()
+            with self._lock:
+                self._clients -= 1
+                self._last_activity = time.monotonic()
+
+    def _connection(self, server: Server) -> t.Tuple[t.Any, threading.Lock]:
+        """Get the connection to a data server (created on first use).
+
+        Args:
+            server: Host, port and hf2 flag of the data server.
+
+        Returns:
+            Connection, lock for the connection.
+        """
+        with self._lock:
+            if server not in self._connections:
+                logger.info("Session broker connects to %s:%s", *server[:2])
+                self._connections[server] = (
+                    self._connection_factory(*server),
+                    threading.Lock(),
+                )
+            return self._connections[server]
+
+    def _handle(
+        self, server: Server, method: str, args: t.Tuple, kwargs: t.Dict[str, t.Any]
+    ) -> t.Tuple[str, t.Any]:
+        """Call a method of the connection to a data server.
+
+        Args:
+            server: Host, port and hf2 flag of the data server.
+            method: Name of the method of the connection.
+            args: Positional arguments of the method.
+            kwargs: Keyword arguments of the method.
+
+        Returns:
+            ("ok", result) or ("error", exception)
+        """
+        try:
+            if method not in ALLOWED_METHODS:
+                raise RuntimeError(f"{method} is not supported by the session broker.")
+            connection, lock = self._connection(server)
+            with lock:
+                if method in DEVICE_METHODS:
+                    self._clear_cache(server)
+                if method not in CACHED_METHODS or not args:
+                    return "ok", getattr(connection, method)(*args, **kwargs)
+                revision = _device_revision(connection, args[0])
+                key = (server, method, args, tuple(sorted(kwargs.items())))
+                cached = self._cache.get(key)
+                if revision is not None and cached and cached[0] == revision:
+                    return "ok", cached[1]
+                result = getattr(connection, method)(*args, **kwargs)
+                if revision is not None:
+                    self._cache[key] = (revision, result)
+            return "ok", result
+        except Exception as error:
+            return "error", error
+
+    def _clear_cache(self, server: Server) -> None:
+        """Remove the cached results of a data server.
+
+        Args:
+            server: Host, port and hf2 flag of the data server.
+        """
+        for key in [key for key in list(self._cache) if key[0] == server]:
+            del self._cache[key]
+
+
+class BrokerConnection:
+    """Connection to a data server through the session broker.
+
+    Can be used instead of a ``zhinst.core.ziDAQServer`` for a toolkit session.
+    The calls of the supported methods (see ``ALLOWED_METHODS``) are forwarded
+    to the session of the broker.
+
+    Args:
+        host: Address of the data server.
+        port: Port of the data server.
+        hf2: Flag if the data server is for hf2 devices.
+        address: Address of the broker.
+        authkey: Authentication key. Defaults to the key of the user.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        hf2: bool,
+        address: str,
+        authkey: t.Optional[bytes] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.api_level = 1 if hf2 else 6
+        self._server = (host, port, hf2)
+        self._client = Client(address, authkey=authkey or default_authkey())
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, *args, **kwargs) -> t.Any:
+        """Call a method of the connection in the broker.
+
+        Args:
+            method: Name of the method.
+            args: Positional arguments of the method.
+            kwargs: Keyword arguments of the method.
+
+        Returns:
+            Result of the method.
+        """
+        with self._lock:
+            self._client.send((self._server, method, args, kwargs))
+            status, result = self._client.recv()
+        if status == "error":
+            raise result
+        return result
+
+    def __getattr__(self, name: str) -> t.Callable:
+        if name not in ALLOWED_METHODS and name not in UNSUPPORTED_METHODS:
+            raise AttributeError(name)
+        return functools.partial(self._call, name)
+
+    def close(self) -> None:
+        """Close the connection to the broker."""
+        self._client.close()
+
+
+def start_broker(address: str) -> None:
+    """Start a broker in a new process.
+
+    Args:
+        address: Address of the broker.
+    """
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen(
+        [sys.executable, "-m", __name__, address],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs,
+    )
+
+
+def _connect(
+    host: str, port: int, hf2: bool, address: str, authkey: bytes
+) -> BrokerConnection:
+    """Connect to a running broker.
+
+    Raises:
+        OSError: If the broker is not running.
+        RuntimeError: If the broker can not be authenticated.
+    """
+    try:
+        return BrokerConnection(host, port, hf2, address, authkey)
+    except AuthenticationError as error:
+        raise RuntimeError(
+            f"Session broker on {address} could not be authenticated."
+        ) from error
+
+
+def connect_broker(
+    host: str,
+    port: int,
+    hf2: bool = False,
+    address: t.Optional[str] = None,
+    timeout: float = START_TIMEOUT,
+    authkey: t.Optional[bytes] = None,
+) -> BrokerConnection:
+    """Connect to a data server through the session broker.
+
+    The broker is started if it is not running yet.
+
+    Args:
+        host: Address of the data server.
+        port: Port of the data server.
+        hf2: Flag if the data server is for hf2 devices.
+        address: Address of the broker. Defaults to the broker of the user.
+        timeout: Maximum time in seconds to wait for a new broker.
+        authkey: Authentication key. Defaults to the key of the user.
+
+    Returns:
+        Connection to the data server.
+
+    Raises:
+        RuntimeError: If the broker can not be reached or authenticated.
+    """
+    address = address or default_address()
+    authkey = authkey or default_authkey()
+    try:
+        return _connect(host, port, hf2, address, authkey)
+    except OSError:
+        logger.info("Starting session broker on %s", address)
+        start_broker(address)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return _connect(host, port, hf2, address, authkey)
+        except OSError as error:
+            if time.monotonic() > deadline:
+                raise RuntimeError(
+                    f"Session broker on {address} is not reachable."
+                ) from error
+            time.sleep(0.05)
+
+
+def main(address: t.Optional[str] = None) -> None:
+    """Run a broker until it is idle.
+
+    Args:
+        address: Address of the broker. Defaults to the broker of the user.
+    """
+    address = address or default_address()
+    authkey = default_authkey()
+    if sys.platform != "win32" and os.path.exists(address):
+        try:
+            Client(address, authkey=authkey).close()
+            # another broker is already running
+            return
+        except OSError:
+            # left over from a broker that did not stop cleanly
+            os.unlink(address)
+    SessionBroker(address, authkey=authkey).serve_forever()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
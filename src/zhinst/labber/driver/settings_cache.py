@@ -0,0 +1,119 @@
+"""Process wide cache for the parsed settings files of the drivers."""
+import copy
+import json
+import os
+import string
+import typing as t
+from pathlib import Path
+
+from zhinst.labber.driver.node_info import NodeInfoIndex
+
+_parsed_files = {}
+_driver_settings = {}
+
+
+class DriverSettings(t.NamedTuple):
+    """Merged view of the global settings for one instrument type.
+
+    The view is shared between all instances of the same instrument type and
+    must therefore be treated as read only.
+    """
+
+    node_info: NodeInfoIndex
+    function_info: t.Dict[str, t.Dict[str, t.Any]]
+    path_seperator: str
+    log_level: int
+
+
+def _file_key(path: t.Union[str, Path]) -> t.Tuple[str, int]:
+    """Key that identifies the current state of a file.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        Path and modification time of the file.
+    """
+    return str(path), os.stat(path).st_mtime_ns
+
+
+def _load_json(key: t.Tuple[str, int]) -> t.Dict[str, t.Any]:
+    """Load a json file or return its cached content.
+
+    Args:
+        key: Path and modification time of the file.
+
+    Returns:
+        Parsed content of the file. (shared, must not be modified)
+    """
+    try:
+        return _parsed_files[key]
+    except KeyError:
+        pass
+    with open(key[0], "r") as file:
+        content = json.loads(file.read())
+    # drop outdated versions of the same file
+    for old_key in [k for k in _parsed_files if k[0] == key[0]]:
+        del _parsed_files[old_key]
+    _parsed_files[key] = content
+    return content
+
+
+def load_settings(path: t.Union[str, Path]) -> t.Dict[str, t.Any]:
+    """Load the local settings of a driver.
+
+    The parsed file is cached as long as it is not modified on disk. Each call
+    returns an independent copy that can be modified by the caller.
+
+    Args:
+        path: Path of the settings file.
+
+    Returns:
+        Content of the settings file.
+    """
+    return copy.deepcopy(_load_json(_file_key(path)))
+
+
+def load_driver_settings(
+    path: t.Union[str, Path], base_type: str, device_type: str
+) -> DriverSettings:
+    """Load the global settings for a specific instrument type.
+
+    The quants of the common section and the section of the instrument type
+    are merged (instrument type has precedence). The result is cached as long
+    as the settings file is not modified on disk.
+
+    Args:
+        path: Path of the global settings file.
+        base_type: Base type of the instrument. (device, module, session)
+        device_type: Type of the instrument (e.g. SHFQA4 or daq)
+
+    Returns:
+        Merged view of the global settings.
+    """
+    file_key = _file_key(path)
+    key = (file_key, base_type, device_type)
+    try:
+        return _driver_settings[key]
+    except KeyError:
+        pass
+    node_info = _load_json(file_key)
+    quant_info = node_info["common"].get("quants", {})
+    if device_type:
+        if base_type == "device":
+            dev_type = device_type.split("_")[0].rstrip(string.digits)
+            device_info = node_info.get(dev_type, {}).get("quants", {})
+        else:
+            device_info = node_info.get(device_type, {}).get("quants", {})
+        quant_info = {**quant_info, **device_info}
+    settings = DriverSettings(
+        node_info=NodeInfoIndex(quant_info),
+        function_info=node_info.get("functions", {}),
+        path_seperator=node_info["misc"]["labberDelimiter"],
+        log_level=node_info["misc"]["LogLevel"],
+    )
+    for old_key in [k for k in _driver_settings if k[0][0] == file_key[0]]:
+        if old_key[0] != file_key:
+            del _driver_settings[old_key]
+    _driver_settings[key] = settings
+    return settings
@@ -1,8 +1,118 @@
 """Snapshot manager for getting ans settings more than one node at a time."""
+
+import logging
+import time
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
 
 from zhinst.toolkit.nodetree import NodeTree
 
+from zhinst.labber.driver.profiling import Measure, no_measure
+
+logger = logging.getLogger(__name__)
+
+# Node types that are only fetched on demand (e.g. waveforms, scope waves)
+HEAVY_NODE_TYPES = ("Vector", "Wave")
+# Streaming node types that are never subscribed
+STREAMING_NODE_TYPES = ("Sample",)
+# Poll arguments for the snapshot subscription (recording time in s, timeout
+# in ms and the THROW flag, which raises an error if data was lost)
+POLL_TIME = 1e-3
+POLL_TIMEOUT = 100
+POLL_THROW = 4
+# Maximum number of threads that parse the input files of the functions at the
+# end of a transaction
+MAX_WORKERS = 8
+# Node types that can be read with a (multi-path) get
+BATCH_NODE_TYPES = ("Double", "String", "ZIVectorData", "ZIDemodSample", "ZIDIOSample")
+
+
+def _is_heavy(node_doc: t.Dict[str, t.Any]) -> bool:
+    """Check if a node holds a (potentially large) vector.
+
+    Args:
+        node_doc: Node documentation (listNodesJSON entry).
+
+    Returns:
+        Flag if the node is a heavy vector node.
+    """
+    node_type = node_doc.get("Type", "")
+    return any(heavy_type in node_type for heavy_type in HEAVY_NODE_TYPES)
+
+
+def _is_streaming(node_doc: t.Dict[str, t.Any]) -> bool:
+    """Check if a node streams data continuously (e.g. demodulator samples).
+
+    Args:
+        node_doc: Node documentation (listNodesJSON entry).
+
+    Returns:
+        Flag if the node is a streaming node.
+    """
+    node_type = node_doc.get("Type", "")
+    return any(stream_type in node_type for stream_type in STREAMING_NODE_TYPES)
+
+
+def _entry(raw_value: t.Any) -> t.Tuple[t.Optional[int], t.Any]:
+    """Extract the latest value from a raw (flat) LabOne get or poll entry.
+
+    Args:
+        raw_value: Entry of the get or poll result.
+
+    Returns:
+        (timestamp, value) pair. The timestamp is None if not available.
+    """
+    try:
+        return raw_value["timestamp"][-1], raw_value["value"][-1]
+    except TypeError:
+        # Vector nodes
+        value = raw_value[-1]
+        if isinstance(value, dict):
+            return value.get("timestamp"), value["vector"]
+        return None, value
+    except (IndexError, KeyError):
+        pass
+    try:
+        # HF2 has no timestamp
+        return None, raw_value["value"][-1]
+    except (TypeError, IndexError, KeyError):
+        return None, raw_value
+
+
+def covering_paths(
+    node_docs: t.Dict[str, t.Dict[str, t.Any]], paths: t.Iterable[str]
+) -> t.List[str]:
+    """Calculate the gets that cover a set of nodes.
+
+    Every node is covered by its highest parent that does not contain a heavy
+    vector node. Heavy nodes and unknown nodes are not covered.
+
+    Args:
+        node_docs: Node documentation of the tree (keys are raw lower case
+            paths).
+        paths: Raw lower case paths of the nodes that should be covered.
+
+    Returns:
+        Sorted list of wildcard (e.g. /dev1234/sigouts/*) or leaf paths that
+        cover the nodes.
+    """
+    dirty = set()
+    for node, node_doc in node_docs.items():
+        if _is_heavy(node_doc):
+            parts = node.split("/")
+            dirty.update("/".join(parts[:i]) for i in range(2, len(parts)))
+    gets = set()
+    for path in paths:
+        if path not in node_docs or _is_heavy(node_docs[path]):
+            continue
+        parts = path.split("/")
+        for i in range(2, len(parts) + 1):
+            prefix = "/".join(parts[:i])
+            if prefix not in dirty:
+                gets.add(prefix if i == len(parts) else prefix + "/*")
+                break
+    return sorted(gets)
+
 
 class SnapshotManager:
     """Manages a instrument snapshot.
@@ -11,13 +121,151 @@ class SnapshotManager:
     transaction and the reuses the values in later calls until ``clear`` is
     called.
 
+    If the snapshot is scoped to a set of nodes only the smallest set of
+    wildcard gets that covers these nodes is fetched (as a single multi-path
+    get). Heavy vector nodes and nodes outside of the scope are fetched
+    individually the first time they are accessed.
+
+    A scoped snapshot can be kept alive through a change subscription. In that
+    case ``clear`` only marks the snapshot as outdated and the next access
+    applies the changes polled from the subscription instead of fetching all
+    values again. A full snapshot is taken if the last one is older than
+    ``max_age`` or if the subscription lost data.
+
+    If the snapshot can not be fetched the nodes are fetched individually
+    until the snapshot is cleared. The next snapshot is then fetched
+    completely (values from before the error are not reused).
+
     Args:
         nodetree: Toolkit nodetree which is used for getting the values.
+        paths: Paths of the nodes that are part of the snapshot (e.g. the get
+            commands of all quantities). If not specified the whole node tree
+            is part of the snapshot.
+        subscription: Separate connection to the data server that is used for
+            the change subscription. (Only used for scoped snapshots) The
+            snapshot manager owns the connection and disconnects it in
+            ``close``.
+        max_age: Maximum time in seconds a snapshot is kept alive through the
+            subscription before a full snapshot is taken.
+        measure: Function that measures the duration of the fetches (see
+            ``zhinst.labber.driver.profiling``).
     """
 
-    def __init__(self, nodetree: NodeTree):
+    def __init__(
+        self,
+        nodetree: NodeTree,
+        paths: t.Optional[t.Iterable[str]] = None,
+        subscription: t.Any = None,
+        max_age: float = 60.0,
+        measure: Measure = no_measure,
+    ):
         self._values = {}
+        self._timestamps = {}
         self._nodetree = nodetree
+        self._paths = paths
+        self._gets = None
+        self._subscription = subscription
+        self._subscribed = None
+        self._max_age = max_age
+        self._taken = 0.0
+        self._outdated = False
+        self._failed = False
+        self._measure = measure
+
+    def _raw_path(self, path: str) -> str:
+        """Convert a node path into a raw LabOne path.
+
+        Args:
+            path: Path of the node (e.g. /test/a)
+
+        Returns:
+            Raw LabOne path (e.g. /dev1234/test/a).
+        """
+        return str(self._nodetree[path]).lower()
+
+    def _subscribe(self, raw_paths: t.Set[str]) -> None:
+        """Subscribe to the changes of all light weight setting nodes.
+
+        Args:
+            raw_paths: Raw paths of the nodes in the scope.
+        """
+        node_docs = self._nodetree.raw_dict
+        self._subscribed = {
+            path
+            for path in raw_paths
+            if path in node_docs
+            and not _is_heavy(node_docs[path])
+            and not _is_streaming(node_docs[path])
+        }
+        if self._subscribed:
+            self._subscription.subscribe(sorted(self._subscribed))
+        logger.debug("Snapshot subscribed to %d nodes", len(self._subscribed))
+
+    def _take_snapshot(self) -> None:
+        """Fetch the values of all nodes in the scope.
+
+        If the fetch fails the snapshot is marked as failed.
+        """
+        self._outdated = False
+        self._taken = time.monotonic()
+        self._values = {}
+        self._timestamps = {}
+        try:
+            if self._paths is None:
+                self._values = dict(self._nodetree["*"](parse=False, enum=False))
+                return
+            if self._gets is None:
+                raw_paths = {self._raw_path(path) for path in self._paths}
+                self._gets = covering_paths(self._nodetree.raw_dict, raw_paths)
+                logger.debug("Snapshot covered by %s", self._gets)
+                if self._subscription is not None:
+                    self._subscribe(raw_paths)
+            if not self._gets:
+                return
+            result = self._nodetree.connection.get(
+                ",".join(self._gets), flat=True, settingsonly=False
+            )
+        except RuntimeError as error:
+            logger.warning("Snapshot failed (%s), getting nodes individually", error)
+            self._failed = True
+            # the next snapshot must not build on values from before the error
+            self._taken = 0.0
+            return
+        for path, raw_value in result.items():
+            path = path.lower()
+            self._timestamps[path], self._values[path] = _entry(raw_value)
+
+    def _update_snapshot(self) -> None:
+        """Apply the changes since the last access to the snapshot.
+
+        Falls back to a full snapshot if the snapshot is too old or the
+        subscription lost data.
+        """
+        self._outdated = False
+        if time.monotonic() - self._taken > self._max_age:
+            logger.debug("Snapshot older than %ss, taking a new one", self._max_age)
+            self._take_snapshot()
+            return
+        try:
+            changes = self._subscription.poll(
+                POLL_TIME, POLL_TIMEOUT, flags=POLL_THROW, flat=True
+            )
+        except RuntimeError as error:
+            logger.warning("Snapshot subscription failed (%s), taking a new one", error)
+            self._take_snapshot()
+            return
+        for path, raw_value in changes.items():
+            path = path.lower()
+            timestamp, value = _entry(raw_value)
+            last_timestamp = self._timestamps.get(path)
+            if (
+                timestamp is None
+                or last_timestamp is None
+                or timestamp >= last_timestamp
+            ):
+                self._timestamps[path] = timestamp
+                self._values[path] = value
+        logger.debug("Snapshot updated with %d changes", len(changes))
 
     def get_value(self, path: str) -> t.Any:
         """Get a value from the snapshot.
@@ -29,47 +277,92 @@ class SnapshotManager:
             path: Path of the node (e.g. /test/a)
 
         Returns:
-            Value for the specified node
-
-        Raises:
-            KeyError: If the value is not part of the snapshot and also can not
-                be fetched with a single get command.
+            Value for the specified node. None if the value is not part of the
+            snapshot and also can not be fetched with a single get command.
         """
-        if not self._values:
-            self._values = self._nodetree["*"](parse=False, enum=False)
+        if self._outdated:
+            with self._measure("snapshot", "update"):
+                self._update_snapshot()
+        elif not self._values and not self._failed:
+            with self._measure("snapshot", "take"):
+                self._take_snapshot()
+        raw_path = self._raw_path(path)
         try:
-            return self._values[self._nodetree[path]]
+            return self._values[raw_path]
         except KeyError:
-            # node not found in snapshot
-            print(f"{path} not found in snapshot")
-            return None
+            pass
+        # node not covered by the snapshot
+        try:
+            value = self._nodetree[path](parse=False, enum=False)
+        except (KeyError, AttributeError, RuntimeError, TypeError) as error:
+            logger.debug("%s not found in snapshot (%s)", path, error)
+            value = None
+        self._values[raw_path] = value
+        return value
 
     def clear(self) -> None:
-        """Clears the current snapshot if there is any."""
-        self._values = {}
+        """Clears the current snapshot if there is any.
+
+        If the snapshot is kept alive through a subscription only the values
+        of the subscribed nodes are kept and marked as outdated.
+        """
+        self._failed = False
+        if not self._subscribed or not self._values:
+            self._values = {}
+            self._timestamps = {}
+            return
+        self._values = {
+            path: value
+            for path, value in self._values.items()
+            if path in self._subscribed
+        }
+        self._outdated = True
+
+    def close(self) -> None:
+        """Close the connection of the change subscription.
+
+        All nodes are unsubscribed and the connection is disconnected. The
+        snapshot is no longer kept alive afterwards.
+        """
+        subscription = self._subscription
+        self._subscription = None
+        self._subscribed = None
+        self._outdated = False
+        self.clear()
+        if subscription is None:
+            return
+        try:
+            subscription.unsubscribe("*")
+            subscription.disconnect()
+        except Exception as error:
+            logger.debug("Snapshot subscription could not be closed (%s)", error)
 
 
 class TransactionManager:
     """Manages a set transaction
 
     It both handles nodes and functions. The node transaction is handled within
-    toolkit and the functions are cached an called in a loop at the end of the
+    toolkit and the functions are cached an called at the end of the
     transaction.
 
     Args:
         tk_instrument: toolkit object of the instrument
         labber_instrument: labber object of the instrument
+        max_workers: Maximum number of threads that read and parse the input
+            files of the functions in parallel.
     """
 
     def __init__(
         self,
         tk_instrument: t.Union["Session", "DeviceType", "ModuleType"],
         labber_instrument: "BaseDevice",
+        max_workers: int = MAX_WORKERS,
     ):
         self._transaction = None
         self._tk_instrument = tk_instrument
         self._labber_instrument = labber_instrument
         self._functions = None
+        self._max_workers = max(max_workers, 1)
 
     def start(self) -> None:
         """Start a new transaction.
@@ -90,27 +383,63 @@ class TransactionManager:
         """
         self._functions.append((name, path))
 
+    @staticmethod
+    def _load(loader: t.Callable[[], t.Any]) -> None:
+        """Read and parse input files in advance.
+
+        Errors are ignored, they are reported when the function is called.
+
+        Args:
+            loader: Function that parses the files for the later call.
+        """
+        try:
+            loader()
+        except Exception as error:
+            logger.debug("Loading the function input failed (%s)", error)
+
     def end(self) -> None:
         """End a running transaction.
 
         Does not do any sanity checks if a transaction can be ended or if
         there is even a running one.
 
-        After the toolkit transaction is closed all cached functions are called
-        in a loop. (Each function is only called once even if it was cached
-        multiple times).
+        After the toolkit transaction is closed all cached functions are called.
+        (Each function is only called once even if it was cached multiple times).
+        The input files of all functions (e.g. waveforms) are read and parsed
+        in parallel first and handed directly to the functions. The functions
+        are then called one after another in the order they were added, since
+        the connection to the data server and the state of the driver are not
+        thread safe.
+
+        Raises:
+            RuntimeError: If a function failed. The other functions are called
+                regardless.
         """
         self._transaction.__exit__(None, None, None)
         self._transaction = None
         # Call every function only once
-        functions = [
-            func
-            for n, func in enumerate(self._functions)
-            if func not in self._functions[:n]
-        ]
-        for function in functions:
-            self._labber_instrument.call_function(function[0], function[1])
+        functions = list(dict.fromkeys(self._functions))
         self._functions = None
+        with self._labber_instrument.preloaded_files():
+            loaders = []
+            if len(functions) > 1 and self._max_workers > 1:
+                for name, path in functions:
+                    loaders.extend(self._labber_instrument.function_loaders(name, path))
+            if len(loaders) > 1:
+                with ThreadPoolExecutor(
+                    max_workers=min(self._max_workers, len(loaders))
+                ) as executor:
+                    list(executor.map(self._load, loaders))
+            errors = {}
+            for name, path in functions:
+                try:
+                    self._labber_instrument.call_function(name, path)
+                except Exception as error:
+                    errors[f"{name} ({path})"] = error
+        if errors:
+            raise RuntimeError(
+                "; ".join(f"{function}: {error}" for function, error in errors.items())
+            )
 
     def is_running(self) -> bool:
         """Check if a transaction is running or not.
@@ -119,3 +448,89 @@ class TransactionManager:
             Status of the transaction.
         """
         return self._transaction is not None
+
+
+class GetBatchManager:
+    """Manages a batched get for a series of get calls.
+
+    Labber reads the quantities of a measurement in a series of get calls.
+    The first call of a series fetches the nodes that were read in the
+    previous series with a single multi-path get. The following calls of the
+    series are served from that batch.
+
+    Args:
+        nodetree: Toolkit nodetree of the device.
+    """
+
+    def __init__(self, nodetree: NodeTree):
+        self._nodetree = nodetree
+        self._values = None
+        self._series = []
+        self._recorded = None
+
+    def _is_batchable(self, raw_path: str) -> bool:
+        """Check if a node can be read as part of a batch.
+
+        Args:
+            raw_path: Raw LabOne path of the node.
+
+        Returns:
+            Flag if the node can be read with a multi-path get.
+        """
+        node_type = self._nodetree.raw_dict.get(raw_path, {}).get("Type", "")
+        return "Integer" in node_type or node_type in BATCH_NODE_TYPES
+
+    def start(self) -> None:
+        """Start a new series and fetch the nodes of the previous one.
+
+        Does not do any sanity checks if there is already a running series.
+        """
+        self._values = {}
+        self._recorded = []
+        if not self._series:
+            return
+        try:
+            result = self._nodetree.connection.get(
+                ",".join(self._series), flat=True, settingsonly=False
+            )
+        except RuntimeError as error:
+            logger.debug("Batched get failed (%s)", error)
+            return
+        for path, raw_value in result.items():
+            self._values[path.lower()] = _entry(raw_value)[1]
+
+    def get_value(self, path: str) -> t.Any:
+        """Get a value from the batch.
+
+        The node is recorded for the batch of the next series.
+
+        Args:
+            path: Path of the node (e.g. /test/a)
+
+        Returns:
+            Value for the specified node.
+
+        Raises:
+            KeyError: If the node is not part of the batch.
+        """
+        raw_path = str(self._nodetree[path]).lower()
+        if raw_path not in self._recorded and self._is_batchable(raw_path):
+            self._recorded.append(raw_path)
+        return self._values[raw_path]
+
+    def end(self) -> None:
+        """End a running series.
+
+        Does not do any sanity checks if there is even a running series.
+        """
+        self._series = self._recorded
+        self._values = None
+        self._recorded = None
+
+    def is_running(self) -> bool:
+        """Check if a series is running or not.
+
+        Returns:
+            Status of the series.
+        """
+        return self._values is not None
@@ -0,0 +1,136 @@
+"""Timeline of the driver activity in the Chrome trace event format.
+
+The trace can be opened in Perfetto (https://ui.perfetto.dev) or in
+``chrome://tracing``. Every thread of the driver (e.g. the module poller or
+the parallel file parsing of a transaction) is shown as a separate track.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+# Default maximum number of recorded events
+MAX_EVENTS = 200000
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Tracer:
+    """Records begin and end events of the driver operations.
+
+    The events are kept in memory until they are written with ``dump``. Once
+    the maximum number of events is reached no further operations are
+    recorded (the end events of running operations are still added). Events
+    of all threads are appended to the same list without a lock (appending
+    is atomic).
+
+    Args:
+        process_name: Name of the process in the trace.
+        max_events: Maximum number of recorded events.
+    """
+
+    def __init__(
+        self, process_name: str = "zhinst-labber", max_events: int = MAX_EVENTS
+    ):
+        self._process_name = process_name
+        self._max_events = max_events
+        self._events = []
+        self._threads = {}
+        self._dropped = 0
+
+    def measure(self, operation: str, name: str) -> t.ContextManager:
+        """Record the enclosed work (see ``zhinst.labber.driver.profiling``).
+
+        Args:
+            operation: Type of the operation (category of the events).
+            name: Name of the quantity, function or node.
+
+        Returns:
+            Context manager that records the enclosed work.
+        """
+        if len(self._events) >= self._max_events:
+            self._dropped += 1
+            return _NULL_CONTEXT
+        return self._span(operation, name)
+
+    @contextlib.contextmanager
+    def _span(self, operation: str, name: str) -> t.Iterator[None]:
+        """Add a begin event and an end event around the enclosed work."""
+        thread_id = threading.get_ident()
+        if thread_id not in self._threads:
+            self._threads[thread_id] = threading.current_thread().name
+        self._events.append(("B", operation, name, time.perf_counter_ns(), thread_id))
+        try:
+            yield
+        finally:
+            self._events.append(
+                ("E", operation, name, time.perf_counter_ns(), thread_id)
+            )
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def events(self) -> t.List[t.Dict[str, t.Any]]:
+        """Get the recorded events in the trace event format.
+
+        Returns:
+            Metadata events (process and thread names) and recorded events.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "ph": "M",
+                "name": "process_name",
+                "pid": pid,
+                "tid": 0,
+                "args": {"name": self._process_name},
+            }
+        ]
+        for thread_id, thread_name in list(self._threads.items()):
+            events.append(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": pid,
+                    "tid": thread_id,
+                    "args": {"name": thread_name},
+                }
+            )
+        for phase, operation, name, timestamp, thread_id in list(self._events):
+            events.append(
+                {
+                    "ph": phase,
+                    "cat": operation,
+                    "name": f"{operation} {name}",
+                    "ts": timestamp / 1000,
+                    "pid": pid,
+                    "tid": thread_id,
+                }
+            )
+        return events
+
+    def dump(self, file: t.Union[str, Path]) -> Path:
+        """Write the trace to a JSON file.
+
+        Args:
+            file: File path.
+
+        Returns:
+            Path of the written file.
+        """
+        file = Path(file)
+        trace = {
+            "traceEvents": self.events(),
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_operations": self._dropped},
+        }
+        file.write_text(json.dumps(trace), encoding="utf-8")
+        return file
+
+    def clear(self) -> None:
+        """Remove all recorded events."""
+        self._events = []
+        self._dropped = 0
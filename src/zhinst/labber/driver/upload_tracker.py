@@ -0,0 +1,98 @@
+"""Tracking of the content that was uploaded to a device."""
+import hashlib
+import json
+import threading
+import typing as t
+
+import numpy as np
+from zhinst.toolkit import Waveforms
+
+
+def _update_hash(digest: t.Any, value: t.Any) -> None:
+    """Add a value to a hash.
+
+    Args:
+        digest: Hash object.
+        value: Value (Waveforms, numpy arrays, dictionaries and plain values).
+    """
+    if isinstance(value, Waveforms):
+        digest.update(b"waveforms")
+        for slot in sorted(value):
+            digest.update(f"slot{slot}".encode())
+            for wave in value[slot]:
+                _update_hash(digest, wave)
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for element in value:
+            _update_hash(digest, element)
+    elif isinstance(value, dict):
+        digest.update(json.dumps(value, sort_keys=True, default=repr).encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def content_hash(kwargs: t.Dict[str, t.Any]) -> str:
+    """Calculate the hash of the arguments of a function call.
+
+    Args:
+        kwargs: Keyword arguments of the function call.
+
+    Returns:
+        Hex digest of the content.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(kwargs):
+        digest.update(name.encode())
+        _update_hash(digest, kwargs[name])
+    return digest.hexdigest()
+
+
+class UploadTracker:
+    """Record of the last successful upload for each function path.
+
+    Used to skip uploads whose content is identical to what the device
+    already has. The tracker can be used from multiple threads.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def is_uploaded(self, path: str, digest: str) -> bool:
+        """Check if the content was the last successful upload.
+
+        Args:
+            path: Path of the upload function.
+            digest: Hash of the content.
+
+        Returns:
+            True if the content matches the last upload.
+        """
+        with self._lock:
+            return self._hashes.get(path) == digest
+
+    def record(self, path: str, digest: str) -> None:
+        """Record a successful upload.
+
+        Args:
+            path: Path of the upload function.
+            digest: Hash of the content.
+        """
+        with self._lock:
+            self._hashes[path] = digest
+
+    def invalidate(self, prefix: str = "/") -> None:
+        """Forget the uploads of a function or of all functions below a path.
+
+        Args:
+            prefix: Path of a function or a parent path (e.g. /awgs/0).
+                Defaults to all uploads.
+        """
+        prefix = prefix.rstrip("/")
+        with self._lock:
+            for path in list(self._hashes):
+                if path == prefix or path.startswith(prefix + "/"):
+                    del self._hashes[path]
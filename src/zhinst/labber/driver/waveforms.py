@@ -0,0 +1,334 @@
+"""Import of waveform files for the AWG and generator cores."""
+import queue
+import threading
+import typing as t
+from contextlib import ExitStack
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+from zhinst.toolkit import Waveforms
+
+NumpyArray = t.TypeVar("NumpyArray")
+T = t.TypeVar("T")
+
+BINARY_SUFFIXES = (".npy", ".npz")
+
+
+def _detect_dtype(cell: str) -> type:
+    """Detect the datatype of a CSV cell.
+
+    Args:
+        cell: Stripped CSV cell.
+
+    Returns:
+        Python type of the cell (complex, float or int)
+    """
+    if "j" in cell or "J" in cell:
+        return complex
+    if any(char in cell for char in ".eEnN"):
+        return float
+    return int
+
+
+def _has_empty_value(line: str) -> bool:
+    """Check if a csv line contains a value without digits.
+
+    ``np.fromstring`` parses empty values (e.g. ``1, ,3``) and single signs
+    without an error.
+
+    Args:
+        line: Line of a CSV file.
+
+    Returns:
+        Flag if a value is empty or only a sign.
+    """
+    padded = "," + "".join(line.split()) + ","
+    return any(value in padded for value in (",,", ",+,", ",-,"))
+
+
+def _is_value(cell: str, datatype: type) -> bool:
+    """Check if a CSV cell is a valid value of a datatype.
+
+    Args:
+        cell: CSV cell.
+        datatype: Python type of the values (see ``_detect_dtype``).
+
+    Returns:
+        Flag if the cell can be converted.
+    """
+    try:
+        datatype(cell.strip())
+    except ValueError:
+        return False
+    return True
+
+
+def _csv_line_to_vector(line: str) -> t.Optional[NumpyArray]:
+    """Convert a csv line into a numpy array.
+
+    The datatype of the array is detected from the first value of the line.
+    Real values are parsed directly from the string by numpy.
+
+    Args:
+        line: Line of a CSV file.
+
+    Returns:
+        Numpy array or None if the line is empty.
+
+    Raises:
+        ValueError: If a value of the line is not a number.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    datatype = _detect_dtype(line.split(",", 1)[0].strip())
+    if datatype is not complex and not _has_empty_value(line):
+        try:
+            vector = np.fromstring(line, dtype=datatype, sep=",")
+        except (ValueError, DeprecationWarning):
+            vector = None
+        # numpy < 2 stops at the first invalid value without an error (only a
+        # DeprecationWarning). The number of values detects all invalid values
+        # except one in the last cell, which is checked on its own.
+        if (
+            vector is not None
+            and len(vector) == line.count(",") + 1
+            and _is_value(line.rpartition(",")[2], datatype)
+        ):
+            return vector
+    # Fallback for complex values (and malformed lines which raise an error)
+    return np.array(line.split(","), dtype=datatype)
+
+
+def _open_csv(stack: ExitStack, file: t.Optional[Path]) -> t.Iterable[str]:
+    """Open an optional CSV file.
+
+    Args:
+        stack: Exit stack that closes the file.
+        file: CSV file. If it is not specified or does not exist, empty
+            lines are returned.
+
+    Returns:
+        Iterable over all lines in the file.
+    """
+    if file and file.exists():
+        return stack.enter_context(file.open("r"))
+    return repeat("")
+
+
+def _npz_slot(key: str) -> int:
+    """Convert the name of an array in a .npz file into a waveform slot.
+
+    Args:
+        key: Name of the array. Either the slot itself (e.g. "3") or the default
+            name used by ``numpy.savez`` (e.g. "arr_3").
+
+    Returns:
+        Waveform slot.
+
+    Raises:
+        ValueError: If the name does not specify a slot.
+    """
+    slot = key[4:] if key.startswith("arr_") else key
+    if not slot.isdecimal():
+        raise ValueError(
+            f"Invalid array name {key} in npz file. Name must be the slot index."
+        )
+    return int(slot)
+
+
+def _load_slots(file: t.Optional[Path]) -> t.Dict[int, NumpyArray]:
+    """Load all waveform slots of a single waveform file.
+
+    Supported formats:
+
+    * ``.npy``: 1D array for slot 0 or 2D array with one row per slot. The
+      file is memory-mapped, i.e. the data is only read when it is accessed.
+    * ``.npz``: One array per slot, named by the slot index. The arrays are
+      read completely (no memory-mapping), also if the archive is uncompressed.
+    * everything else is parsed as CSV with one line per slot.
+
+    Args:
+        file: Waveform file. If it is not specified or does not exist no
+            slots are returned.
+
+    Returns:
+        Waveform data for each slot.
+
+    Raises:
+        ValueError: If the content of the file is not valid.
+    """
+    if not file or not file.exists():
+        return {}
+    suffix = file.suffix.lower()
+    if suffix == ".npy":
+        data = np.load(file, mmap_mode="r", allow_pickle=False)
+        if data.ndim == 1:
+            return {0: data}
+        if data.ndim == 2:
+            return {slot: data[slot] for slot in range(len(data))}
+        raise ValueError(
+            f"{file} has {data.ndim} dimensions. Only 1D or 2D arrays are supported."
+        )
+    if suffix == ".npz":
+        with np.load(file, allow_pickle=False) as data:
+            return {_npz_slot(key): data[key] for key in data.files}
+    slots = {}
+    with file.open("r") as csv_file:
+        for i, line in enumerate(csv_file):
+            vector = _csv_line_to_vector(line)
+            if vector is not None:
+                slots[i] = vector
+    return slots
+
+
+def _iter_slots(
+    waves1: Path, waves2: Path = None, markers: Path = None
+) -> t.Iterator[t.Tuple[int, t.Tuple[NumpyArray, ...]]]:
+    """Iterate over the waveform slots of CSV or numpy files.
+
+    CSV files are parsed line by line while iterating.
+
+    Args:
+        waves1: csv for real part waves
+        waves2: csv for imag part waves
+        markers: csv for markers
+
+    Yields:
+        Slot index and (wave1, wave2, marker) tuple of the slot.
+
+    Raises:
+        IOError: If the file for the first waves can not be opened.
+    """
+    files = [waves1, waves2, markers]
+    if any(file and file.suffix.lower() in BINARY_SUFFIXES for file in files):
+        if not waves1.exists():
+            raise FileNotFoundError(f"No such file: '{waves1}'")
+        wave1_slots, wave2_slots, marker_slots = map(_load_slots, files)
+        for slot, wave1 in sorted(wave1_slots.items()):
+            yield slot, (wave1, wave2_slots.get(slot), marker_slots.get(slot))
+        return
+    with ExitStack() as stack:
+        rows = zip(
+            stack.enter_context(waves1.open("r")),
+            _open_csv(stack, waves2),
+            _open_csv(stack, markers),
+        )
+        for i, row in enumerate(rows):
+            wave1 = _csv_line_to_vector(row[0])
+            if wave1 is None:
+                continue
+            yield i, (
+                wave1,
+                _csv_line_to_vector(row[1]),
+                _csv_line_to_vector(row[2]),
+            )
+
+
+def import_waveforms(
+    waves1: Path, waves2: Path = None, markers: Path = None
+) -> Waveforms:
+    """Import Waveforms from CSV or numpy files.
+
+    In a CSV file each line represents a waveform slot/index. Empty lines are
+    skipped. Binary numpy files (.npy, .npz) are detected by their extension
+    (see ``_load_slots`` for the supported layouts).
+
+    Args:
+        waves1: csv for real part waves
+        waves2: csv for imag part waves
+        markers: csv for markers
+
+    Returns:
+        Waveform object.
+
+    Raises:
+        IOError: If the file for the first waves can not be opened.
+    """
+    waves = Waveforms()
+    for slot, wave in _iter_slots(waves1, waves2, markers):
+        waves[slot] = wave
+    return waves
+
+
+def iter_waveform_chunks(
+    waves1: Path, waves2: Path = None, markers: Path = None, chunk_size: int = 1
+) -> t.Iterator[Waveforms]:
+    """Import Waveforms from CSV or numpy files in chunks.
+
+    Same as ``import_waveforms`` but the slots are returned in chunks while the
+    files are parsed.
+
+    Args:
+        waves1: csv for real part waves
+        waves2: csv for imag part waves
+        markers: csv for markers
+        chunk_size: Maximum number of slots per chunk.
+
+    Yields:
+        Waveform object with the slots of a chunk.
+
+    Raises:
+        IOError: If the file for the first waves can not be opened.
+    """
+    chunk = Waveforms()
+    for slot, wave in _iter_slots(waves1, waves2, markers):
+        chunk[slot] = wave
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = Waveforms()
+    if len(chunk):
+        yield chunk
+
+
+def pipelined(items: t.Iterable[T], max_pending: int = 1) -> t.Iterator[T]:
+    """Produce the items of an iterable in a worker thread.
+
+    The next items are produced while the current one is processed by the
+    caller. At most ``max_pending`` produced items wait to be processed.
+    Exceptions of the worker are raised in the caller.
+
+    Args:
+        items: Iterable that produces the items (e.g. parsed waveform chunks).
+        max_pending: Maximum number of produced items that are not yet
+            processed.
+
+    Yields:
+        Items of the iterable.
+    """
+    done = object()
+    pending = queue.Queue(maxsize=max(max_pending, 1))
+    stopped = threading.Event()
+
+    def put(item: t.Any) -> None:
+        while not stopped.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def produce() -> None:
+        try:
+            for item in items:
+                put((item, None))
+                if stopped.is_set():
+                    return
+            put((done, None))
+        except Exception as error:
+            put((done, error))
+
+    worker = threading.Thread(target=produce, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = pending.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stopped.set()
+        worker.join()
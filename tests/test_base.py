@@ -1,7 +1,10 @@
+import json
 import pytest
 from unittest.mock import MagicMock, patch, Mock
 import sys
 import tempfile
+import threading
+import time
 from pathlib import Path
 from zhinst.toolkit import Waveforms
 import numpy as np
@@ -11,6 +14,7 @@ import zhinst.labber.driver.base_instrument as labber_driver
 from zhinst.labber.driver.base_instrument import logger
 from labber.BaseDriver import InstrumentQuantity
 
+
 @pytest.fixture()
 def mock_toolkit_session():
     with patch(
@@ -164,9 +168,9 @@ class TestBase:
             labber_driver.BaseDevice(settings=settings)
             assert log_path.exists()
             # Remove handler so tmpdirname can be unlinked.
-            for handler in logger.handlers[:]:
+            for handler in labber_driver.driver_logger.handlers[:]:
                 handler.close()
-                logger.removeHandler(handler)
+                labber_driver.driver_logger.removeHandler(handler)
 
             with open(Path(tmpdirname) / "test.log") as f:
                 assert "" in f.read()
@@ -177,6 +181,36 @@ class TestBase:
         mock_toolkit_session.assert_called_with("localhost", 8004, hf2=False)
         mock_toolkit_session.return_value.connect_device.assert_called_with("DEV1234")
 
+    def test_performOpen_broker(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        device_driver._instrument_settings["data_server"]["shared_session"] = "broker"
+        with patch("zhinst.labber.driver.base_instrument.connect_broker") as broker:
+            device_driver.performOpen()
+        broker.assert_called_once_with("localhost", 8004, False)
+        mock_toolkit_session.assert_called_with(
+            "localhost", 8004, hf2=False, connection=broker.return_value
+        )
+
+    def test_performOpen_broker_module(self, mock_toolkit_session, shfqa_sweeper):
+        shfqa_sweeper._instrument_settings["data_server"]["shared_session"] = "broker"
+        with patch("zhinst.labber.driver.base_instrument.connect_broker") as broker:
+            shfqa_sweeper.performOpen()
+        broker.assert_not_called()
+        mock_toolkit_session.assert_called_with("localhost", 8004, hf2=False)
+
+    def test_performOpen_node_doc_cache(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            device_driver._instrument_settings["node_doc_cache"] = tmpdirname
+            with patch("zhinst.core.ziDAQServer") as daq_server:
+                device_driver.performOpen()
+        # a single connection is created for the session
+        mock_toolkit_session.assert_called_once()
+        daq_server.assert_called_once_with("localhost", 8004, 6)
+        connection = mock_toolkit_session.call_args.kwargs["connection"]
+        assert isinstance(connection, labber_driver.CachedNodeDocConnection)
+        assert connection._connection == daq_server.return_value
+
     def test_performOpen_module(self, mock_toolkit_session, shfqa_sweeper):
         shfqa_sweeper.performOpen()
         mock_toolkit_session.assert_called_with("localhost", 8004, hf2=False)
@@ -279,10 +313,99 @@ class TestBase:
         device_driver.comCfg.getAddressString.return_value = "DEV1234"
         device_driver.performOpen()
 
-        # Currently the sweepRate keyword does not have any effect
+        # Only numeric values are ramped
         quant = create_quant_mock("Test - Name", device_driver, "test/node", "")
         device_driver.performSetValue(quant, 1.0, sweepRate=1)
         device_driver._instrument[quant.set_cmd].assert_called_with(1.0)
+        assert not device_driver.checkIfSweeping(quant)
+
+        node = device_driver._instrument[quant.set_cmd]
+        node.reset_mock()
+        node.return_value = 0.0
+        quant.datatype = quant.DOUBLE
+        quant.sweep_minute = False
+        device_driver._ramps = labber_driver.RampEngine(
+            device_driver._set_ramp_values, 1000
+        )
+        assert device_driver.performSetValue(quant, 0.1, sweepRate=2) == 0.1
+        assert device_driver.checkIfSweeping(quant)
+        deadline = time.monotonic() + 5
+        while device_driver.checkIfSweeping(quant) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not device_driver.checkIfSweeping(quant)
+        node.assert_called_with(0.1)
+        values = [call[0][0] for call in node.call_args_list if call[0]]
+        assert len(values) > 2
+        assert values == sorted(values)
+
+        # a failed ramp is reported once instead of finishing at the target
+        node.side_effect = [0.0, RuntimeError("test")]
+        device_driver.performSetValue(quant, 1.0, sweepRate=0.1)
+        deadline = time.monotonic() + 5
+        with pytest.raises(RuntimeError, match="stopped at 0.0: test"):
+            while time.monotonic() < deadline:
+                device_driver.checkIfSweeping(quant)
+                time.sleep(0.01)
+        assert not device_driver.checkIfSweeping(quant)
+        node.side_effect = None
+
+        # stop sweep
+        node.reset_mock()
+        node.return_value = 0.0
+        device_driver.performSetValue(quant, 1.0, sweepRate=0.1)
+        assert device_driver.checkIfSweeping(quant)
+        device_driver.performStopSweep(quant)
+        assert not device_driver.checkIfSweeping(quant)
+        device_driver.performClose()
+        assert all(call[0][0] < 1.0 for call in node.call_args_list if call[0])
+
+        # steps of multiple ramps are set with a single call
+        device_driver._set_ramp_values([("a/b", 1.0), ("c/d", 2.0)])
+        device_driver._instrument.root.connection.set.assert_called_once()
+
+    def test_performSet_sweep_overlap(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        device_driver.performOpen()
+        device_driver._ramps = labber_driver.RampEngine(
+            device_driver._set_ramp_values, 1000
+        )
+        ramp = create_quant_mock("Test - Ramp", device_driver, "test/ramp", "")
+        ramp.datatype = ramp.DOUBLE
+        ramp.sweep_minute = False
+        quant = create_quant_mock("Test - Name", device_driver, "test/node", "")
+
+        # the ramp thread and the driver never use the connection at the same time
+        active = []
+        overlaps = []
+        threads = set()
+
+        def node_call(*args, **kwargs):
+            active.append(threading.current_thread())
+            if len(active) > 1:
+                overlaps.append(list(active))
+            threads.add(threading.current_thread())
+            time.sleep(0.001)
+            active.pop()
+            return 0.0
+
+        device_driver._instrument[quant.set_cmd].side_effect = node_call
+        device_driver.performSetValue(ramp, 1.0, sweepRate=0.1)
+        for value in range(50):
+            device_driver.performSetValue(quant, value)
+        assert device_driver.checkIfSweeping(ramp)
+        assert len(threads) == 2
+        assert not overlaps
+
+        # a transaction stops the running ramps and starts new ones after it
+        device_driver.performSetValue(quant, 1, options={"call_no": 0, "n_calls": 2})
+        assert not device_driver.checkIfSweeping(ramp)
+        device_driver.performSetValue(
+            ramp, 1.0, sweepRate=0.1, options={"call_no": 1, "n_calls": 2}
+        )
+        assert not device_driver._transaction.is_running()
+        assert device_driver.checkIfSweeping(ramp)
+        device_driver.performClose()
+        assert not overlaps
 
     def test_performSet_csv(self, mock_toolkit_session, device_driver):
         device_driver.comCfg.getAddressString.return_value = "DEV1234"
@@ -385,6 +508,42 @@ class TestBase:
         ]["waveforms"]
         compare_waveforms(Waveforms(), actual)
 
+    def test_performSet_csv_pipelined(self, mock_toolkit_session, device_driver):
+        device_driver._instrument_settings["waveform_pipeline_slots"] = 3
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        device_driver.performOpen()
+
+        input = Path("tests/data/pulses.csv")
+        device_driver.instrCfg.getQuantity.return_value.getValue.return_value = input
+        quant = create_quant_mock(
+            "qachannels - 0 - generator - pulses", device_driver, "*.csv", ""
+        )
+        upload = device_driver._instrument.qachannels[
+            0
+        ].generator.write_to_waveform_memory
+        # small files are not pipelined
+        device_driver.performSetValue(quant, input)
+        upload.assert_called_once()
+
+        upload.reset_mock()
+        with patch("zhinst.labber.driver.base_instrument.PIPELINE_MIN_SIZE", 0):
+            device_driver._uploads.invalidate()
+            device_driver.performSetValue(quant, input)
+            # one call per slot (chunk size 1), only the first clears the memory
+            assert upload.call_count == 3
+            assert [list(c[1]["pulses"].keys()) for c in upload.call_args_list] == [
+                [0],
+                [1],
+                [3],
+            ]
+            assert "clear_existing" not in upload.call_args_list[0][1]
+            assert upload.call_args_list[1][1]["clear_existing"] is False
+            assert upload.call_args_list[2][1]["clear_existing"] is False
+
+            # unchanged files are not uploaded again
+            device_driver.performSetValue(quant, input)
+            assert upload.call_count == 3
+
     def test_performSet_function_delayed(self, mock_toolkit_session, device_driver):
         device_driver.comCfg.getAddressString.return_value = "DEV1234"
         device_driver.performOpen()
@@ -442,6 +601,54 @@ class TestBase:
         )
         device_driver._instrument.qachannels[0].generator.wait_done.assert_not_called()
 
+    def test_performSet_transaction_files(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        device_driver.performOpen()
+
+        # same waves for both cores
+        input = Path("tests/data/waves1.csv")
+        device_driver.instrCfg.getQuantity.return_value.getValue.return_value = input
+        for call_no, core in enumerate([0, 1]):
+            quant = create_quant_mock(
+                f"awgs - {core} - waves1", device_driver, "*.csv", ""
+            )
+            device_driver.performSetValue(
+                quant, input, options={"call_no": call_no, "n_calls": 2}
+            )
+        # files are parsed once before the functions are called
+        assert device_driver._file_cache.misses == 1
+        assert device_driver._file_cache.stats["entries"] == 1
+        upload = device_driver._instrument.awgs[0].write_to_waveform_memory
+        assert upload.call_count == 2
+
+    def test_performSet_transaction_files_no_cache(
+        self, mock_toolkit_session, device_driver
+    ):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        device_driver._instrument_settings["file_cache_size"] = 0
+        device_driver.performOpen()
+        device_driver._file_cache = labber_driver.FileCache(0)
+
+        input = Path("tests/data/waves1.csv")
+        device_driver.instrCfg.getQuantity.return_value.getValue.return_value = input
+        with patch(
+            "zhinst.labber.driver.base_instrument.import_waveforms",
+            wraps=labber_driver.import_waveforms,
+        ) as parse:
+            for call_no, core in enumerate([0, 1]):
+                quant = create_quant_mock(
+                    f"awgs - {core} - waves1", device_driver, "*.csv", ""
+                )
+                device_driver.performSetValue(
+                    quant, input, options={"call_no": call_no, "n_calls": 2}
+                )
+        # the parsed file is handed to the functions without the cache
+        assert parse.call_count == 1
+        assert device_driver._file_cache.stats["entries"] == 0
+        assert device_driver._preloaded is None
+        upload = device_driver._instrument.awgs[0].write_to_waveform_memory
+        assert upload.call_count == 2
+
     def test_performSet_CSV_Envelope(self, mock_toolkit_session, device_driver):
         device_driver.comCfg.getAddressString.return_value = "DEV1234"
         device_driver.performOpen()
@@ -508,6 +715,32 @@ class TestBase:
             0
         ].commandtable.upload_to_device.assert_called_with(ct={"test": "a"})
 
+        # unchanged file is served from the cache
+        assert device_driver._file_cache.hits == 0
+        assert input == device_driver.performSetValue(quant, input)
+        device_driver._instrument.awgs[
+            0
+        ].commandtable.upload_to_device.assert_called_with(ct={"test": "a"})
+        assert device_driver._file_cache.hits == 1
+        # identical content is not uploaded again
+        upload = device_driver._instrument.awgs[0].commandtable.upload_to_device
+        assert upload.call_count == 2
+
+        # recompiling the sequencer invalidates the previous uploads
+        quant = create_quant_mock(
+            "awgs - 0 - sequencer_program", device_driver, "*.seqc", ""
+        )
+        input = Path("tests/data/test.seqc")
+        device_driver.instrCfg.getQuantity.return_value.getValue.return_value = input
+        device_driver.performSetValue(quant, input)
+        quant = create_quant_mock(
+            "awgs - 0 - commandtable - data", device_driver, "*.json", ""
+        )
+        input = Path("tests/data/test.json")
+        device_driver.instrCfg.getQuantity.return_value.getValue.return_value = input
+        device_driver.performSetValue(quant, input)
+        assert upload.call_count == 3
+
     def test_performSet_text(self, mock_toolkit_session, device_driver):
         device_driver.comCfg.getAddressString.return_value = "DEV1234"
         device_driver.performOpen()
@@ -594,25 +827,220 @@ class TestBase:
 
     def test_performGet_Get_CFG(self, mock_toolkit_session, device_driver):
         device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        quant = create_quant_mock("Test - Name", device_driver, "", "test/node")
+        device_driver.dQuantities = {quant.name: quant}
         device_driver.performOpen()
+        root = device_driver._instrument.root
+        # nodes that are not part of the snapshot do not exist
+        root.__getitem__.side_effect = lambda path: MagicMock(
+            __str__=lambda _: "/dev1234/" + path, side_effect=KeyError(path)
+        )
+        root.raw_dict = {
+            "/dev1234/test/node": {"Type": "Double"},
+            "/dev1234/wave": {"Type": "ZIVectorData"},
+        }
 
         device_driver.dOp["operation"] = 4
 
         # Not existing node (in snapshot)
-        device_driver._instrument.root["*"].side_effect = [{}, 1]
-        quant = create_quant_mock("Test - Name", device_driver, "", "test/node")
+        root.connection.get.return_value = {}
         assert device_driver.performGetValue(quant) == quant.getValue()
 
-        # Not existing node (in snapshot)
-        device_driver._instrument.root["*"].side_effect = [{}, KeyError("test")]
-        with patch("zhinst.labber.driver.base_instrument.logger") as logger:
-            assert quant.getValue() == device_driver.performGetValue(quant)
-        # existing node
-        device_driver._instrument.root["*"].side_effect = None
-        device_driver._instrument.root["*"].return_value = {
-            device_driver._instrument.root["test/node"]: 0
+        # existing node (snapshot is scoped to the quantities)
+        device_driver._snapshot.clear()
+        root.connection.get.return_value = {
+            "/dev1234/test/node": {"timestamp": [0], "value": [0]}
         }
         assert device_driver.performGetValue(quant) == 0
+        root.connection.get.assert_called_with(
+            "/dev1234/test/*", flat=True, settingsonly=False
+        )
+
+    def test_latency_stats(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        assert device_driver.dump_latency_stats() is None
+        device_driver._latency = labber_driver.LatencyRecorder()
+        device_driver._latency_format = "csv"
+        device_driver.performOpen()
+        quant = create_quant_mock(
+            "Test - Name", device_driver, "test/node", "test/node"
+        )
+        device_driver.performSetValue(quant, 0)
+        device_driver.performSetValue(quant, 1)
+        device_driver.dOp["operation"] = 4
+        device_driver.performGetValue(quant)
+        histograms = device_driver._latency.histograms()
+        assert histograms[("set", "Test - Name")].count == 2
+        assert histograms[("get_cfg", "Test - Name")].count == 1
+        assert histograms[("snapshot", "take")].count == 1
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            file = device_driver.dump_latency_stats(tmpdirname)
+            assert file.parent == Path(tmpdirname)
+            assert file.name.startswith("latency_SHFQA_")
+            assert file.suffix == ".csv"
+            assert "set,Test - Name,2," in file.read_text()
+
+        with pytest.raises(ValueError):
+            labber_driver.BaseDevice(
+                settings={**device_driver._instrument_settings, "latency_stats": "xml"}
+            )
+
+    def test_profile(self, mock_toolkit_session, device_driver):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            settings = device_driver._instrument_settings
+            settings["instrument"]["profile"] = {
+                "directory": tmpdirname,
+                "quants": ["Test*"],
+            }
+            device_driver = labber_driver.BaseDevice(settings=settings)
+            device_driver.comCfg = MagicMock()
+            device_driver.dOp = {"operation": 0}
+            device_driver.comCfg.getAddressString.return_value = "DEV1234"
+            device_driver.performOpen()
+            quant = create_quant_mock("Test - Name", device_driver, "test/node", "")
+            device_driver.performSetValue(quant, 0)
+            other = create_quant_mock("Other", device_driver, "test/other", "")
+            device_driver.performSetValue(other, 0)
+            files = list(Path(tmpdirname).glob("*.pstats"))
+            assert len(files) == 1
+            assert files[0].name.endswith("_set_Test_-_Name.pstats")
+
+    def test_trace(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        assert device_driver.dump_trace() is None
+        device_driver._tracer = labber_driver.Tracer()
+        device_driver.performOpen()
+        quant = create_quant_mock("Test - Name", device_driver, "test/node", "")
+        device_driver.performSetValue(quant, 0)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            device_driver._instrument_settings["trace"] = str(
+                Path(tmpdirname) / "trace.json"
+            )
+            device_driver.performClose()
+            trace = json.loads((Path(tmpdirname) / "trace.json").read_text())
+        names = [e["name"] for e in trace["traceEvents"] if e["ph"] == "B"]
+        assert names == ["set Test - Name", "node_set test/node"]
+
+    def test_performGet_series(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        device_driver.performOpen()
+        root = device_driver._instrument.root
+        root.__getitem__.side_effect = lambda path: MagicMock(
+            __str__=lambda _: "/dev1234/" + path
+        )
+        root.raw_dict = {
+            "/dev1234/a": {"Type": "Double"},
+            "/dev1234/b": {"Type": "ZIDemodSample"},
+        }
+        quant_a = create_quant_mock("A", device_driver, "", "a")
+        quant_b = create_quant_mock("B", device_driver, "", "b")
+        nodes = {"a": MagicMock(return_value=1), "b": MagicMock()}
+        nodes["b"].return_value = {"x": 1, "y": 2}
+        device_driver._instrument.__getitem__.side_effect = nodes.get
+
+        # first series => single gets
+        assert device_driver.performGetValue(quant_a, {"call_no": 0, "n_calls": 2}) == 1
+        assert device_driver.performGetValue(
+            quant_b, {"call_no": 1, "n_calls": 2}
+        ) == complex(1, 2)
+        root.connection.get.assert_not_called()
+
+        # next series => single multi-path get
+        root.connection.get.return_value = {
+            "/dev1234/a": {"timestamp": [0], "value": [3]},
+            "/dev1234/b": {
+                "timestamp": np.array([0]),
+                "x": np.array([3.0]),
+                "y": np.array([4.0]),
+            },
+        }
+        nodes["a"].reset_mock()
+        assert device_driver.performGetValue(quant_a, {"call_no": 0, "n_calls": 2}) == 3
+        assert device_driver.performGetValue(
+            quant_b, {"call_no": 1, "n_calls": 2}
+        ) == complex(3, 4)
+        root.connection.get.assert_called_once_with(
+            "/dev1234/a,/dev1234/b", flat=True, settingsonly=False
+        )
+        nodes["a"].assert_not_called()
+        assert not device_driver._get_batch.is_running()
+
+    def test_snapshot_subscription(self, mock_toolkit_session, device_driver):
+        device_driver.comCfg.getAddressString.return_value = "DEV1234"
+        device_driver.performOpen()
+        assert device_driver._snapshot._subscription is None
+        mock_toolkit_session.return_value.clone_underlying_session.assert_not_called()
+
+        device_driver._instrument_settings["snapshot_subscribe"] = True
+        device_driver.performOpen()
+        subscription = mock_toolkit_session.return_value.clone_underlying_session
+        subscription.assert_called_once()
+        assert device_driver._snapshot._subscription == subscription.return_value
+
+        # the subscription connection is closed with the instrument
+        device_driver.performClose()
+        subscription.return_value.unsubscribe.assert_called_once_with("*")
+        subscription.return_value.disconnect.assert_called_once()
+        assert device_driver._snapshot._subscription is None
+
+        # older toolkit versions can not clone the session
+        del mock_toolkit_session.return_value.clone_underlying_session
+        with patch("zhinst.core.ziDAQServer") as daq_server:
+            device_driver.performOpen()
+        daq_server.assert_called_once_with("localhost", 8004, 6)
+        assert device_driver._snapshot._subscription == daq_server.return_value
+
+    def test_hardware_loop(self, mock_toolkit_session, shfqa_sweeper):
+        shfqa_sweeper.comCfg.getAddressString.return_value = "DEV1234"
+        shfqa_sweeper.performOpen()
+        instrument = shfqa_sweeper._instrument
+        quant = create_quant_mock("sweep - offset_freq", shfqa_sweeper, "", "")
+        result = create_quant_mock("result", shfqa_sweeper, "", "")
+        shfqa_sweeper.instrCfg.getQuantity.return_value.getValue.return_value = (
+            np.array([1, 2, 3])
+        )
+
+        # values are only collected
+        for index, value in enumerate([1e6, 2e6, 3e6]):
+            options = {"n_seq": 3, "seq_no": index}
+            assert shfqa_sweeper.performSetValue(quant, value, options=options) == value
+        instrument.__getitem__.assert_not_called()
+
+        shfqa_sweeper.dOp["operation"] = 10
+        shfqa_sweeper.performArm(["result"])
+        instrument.__getitem__.assert_any_call("sweep/start_freq")
+        instrument.__getitem__.assert_any_call("sweep/stop_freq")
+        instrument.__getitem__.assert_any_call("sweep/num_points")
+        instrument.__getitem__.return_value.assert_any_call(1e6)
+        instrument.__getitem__.return_value.assert_any_call(3e6)
+        instrument.__getitem__.return_value.assert_any_call(3)
+        instrument.run.assert_called_once()
+
+        # results are served from the acquired data
+        shfqa_sweeper.dOp["operation"] = 2
+        for index in range(3):
+            options = {"n_seq": 3, "seq_no": index}
+            value = shfqa_sweeper.performGetValue(result, options=options)
+            assert np.array_equal(value, [index + 1])
+        instrument.run.assert_called_once()
+
+        # single point sweep outside of a hardware loop
+        instrument.__getitem__.reset_mock()
+        assert shfqa_sweeper.performSetValue(quant, 5e6) == 5e6
+        instrument.__getitem__.return_value.assert_any_call(5e6)
+        instrument.__getitem__.return_value.assert_any_call(1)
+        assert shfqa_sweeper.performGetValue(quant) == quant.getValue()
+
+        # only equally spaced values are supported
+        instrument.reset_mock()
+        for index, value in enumerate([1e6, 2e6, 4e6]):
+            options = {"n_seq": 3, "seq_no": index}
+            shfqa_sweeper.performSetValue(quant, value, options=options)
+        with patch("zhinst.labber.driver.base_instrument.logger") as logger:
+            shfqa_sweeper.performArm(["result"])
+        logger.error.assert_called_once()
+        instrument.run.assert_not_called()
 
     def test_performGet_function(self, mock_toolkit_session, shfqa_sweeper):
         shfqa_sweeper.comCfg.getAddressString.return_value = "DEV1234"
@@ -764,6 +1192,101 @@ class TestBase:
             ["sig3"],
         )
 
+    def test_module_read_poller(self, mock_toolkit_session, daq_module):
+        daq_module.comCfg.getAddressString.return_value = "DEV1234"
+        daq_module._instrument_settings["module_poll_interval"] = 0.1
+        with patch("zhinst.labber.driver.base_instrument.ModulePoller.start") as start:
+            daq_module.performOpen()
+        start.assert_called_once()
+        poller = daq_module._module_poller
+        assert poller is not None
+
+        daq_module.instrCfg.getQuantity.return_value.getTraceDict.side_effect = (
+            lambda a, **kwarg: a
+        )
+        signal_quant = create_quant_mock("Signal - 1", daq_module, "", "")
+        result_quant = create_quant_mock("Result - 1", daq_module, "", "")
+        daq_module.instrCfg.getQuantity.return_value.getValue.return_value = "test/a/b"
+        raw_module = daq_module._instrument.raw_module
+        raw_module.read.return_value = {
+            "/dev1234/test/a/b": [{"value": np.array([1, 2, 3, 4])}]
+        }
+        set_value = daq_module.instrCfg.getQuantity.return_value.setValue
+
+        # no results yet
+        daq_module.performGetValue(result_quant)
+        raw_module.read.assert_not_called()
+        set_value.assert_not_called()
+
+        poller.poll()
+        raw_module.read.reset_mock()
+        daq_module.performGetValue(result_quant)
+        raw_module.read.assert_not_called()
+        assert all(set_value.call_args[0][0] == np.array([1, 2, 3, 4]))
+
+        # stale results are only applied once
+        set_value.reset_mock()
+        daq_module.performGetValue(result_quant)
+        set_value.assert_not_called()
+        # also if other nodes have new results
+        raw_module.read.return_value = {"/dev1234/test/c/d": [{"value": np.array([5])}]}
+        poller.poll()
+        daq_module.performGetValue(result_quant)
+        set_value.assert_not_called()
+
+        daq_module.performClose()
+        assert daq_module._module_poller is None
+
+    def test_module_node_lock(self, mock_toolkit_session, daq_module):
+        daq_module.comCfg.getAddressString.return_value = "DEV1234"
+        daq_module.performOpen()
+        locked = []
+        node = daq_module._instrument["test/node"]
+        node.side_effect = lambda *args, **kwargs: locked.append(
+            daq_module._module_lock.locked()
+        )
+        quant = create_quant_mock("Test - Node", daq_module, "test/node", "test/node")
+        # node sets and gets of modules are guarded like the poller reads
+        daq_module.performSetValue(quant, 1)
+        daq_module.performGetValue(quant)
+        assert locked == [True, True]
+        assert not daq_module._module_lock.locked()
+
+    def test_module_read_accumulate(self, mock_toolkit_session, daq_module):
+        daq_module.comCfg.getAddressString.return_value = "DEV1234"
+        daq_module._accumulators = {"Result - 1": labber_driver.RingBuffer(6)}
+        daq_module.performOpen()
+        daq_module.instrCfg.getQuantity.return_value.getTraceDict.side_effect = (
+            lambda a, **kwarg: a
+        )
+        signal_quant = create_quant_mock("Signal - 1", daq_module, "", "")
+        result_quant = create_quant_mock("Result - 1", daq_module, "", "")
+        clear_quant = create_quant_mock("clear_results", daq_module, "", "")
+        daq_module.instrCfg.getQuantity.return_value.getValue.return_value = "test/a/b"
+        daq_module.performSetValue(signal_quant, "test/a/b")
+        raw_module = daq_module._instrument.raw_module
+        set_value = daq_module.instrCfg.getQuantity.return_value.setValue
+
+        raw_module.read.return_value = {
+            "/dev1234/test/a/b": [
+                {"value": np.array([[1, 2]])},
+                {"value": np.array([[3, 4]])},
+            ]
+        }
+        daq_module.performGetValue(result_quant)
+        assert np.array_equal(set_value.call_args[0][0], [1, 2, 3, 4])
+
+        raw_module.read.return_value = {
+            "/dev1234/test/a/b": [{"value": np.array([[5, 6], [7, 8]])}]
+        }
+        daq_module.performGetValue(result_quant)
+        assert np.array_equal(set_value.call_args[0][0], [3, 4, 5, 6, 7, 8])
+
+        daq_module.instrCfg.getQuantity.return_value.VECTOR = 4
+        daq_module.instrCfg.getQuantity.return_value.datatype = 4
+        daq_module.performSetValue(clear_quant, 1)
+        assert len(daq_module._accumulators["Result - 1"]) == 0
+
     def test_module_clear(self, mock_toolkit_session, daq_module):
         daq_module.comCfg.getAddressString.return_value = "DEV1234"
         daq_module.performOpen()
@@ -0,0 +1,86 @@
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from zhinst.labber.driver.file_cache import FileCache
+
+
+def touch(file, content):
+    file.write_text(content)
+    stat = file.stat()
+    # ensure a different mtime even on filesystems with a coarse resolution
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_hit_and_miss(tmp_path):
+    file = tmp_path / "test.txt"
+    touch(file, "abc")
+    cache = FileCache(1000)
+    loader = Mock(side_effect=lambda: file.read_text())
+
+    assert cache.load([file], loader) == "abc"
+    assert cache.load([file], loader) == "abc"
+    assert loader.call_count == 1
+    assert cache.stats == {"hits": 1, "misses": 1, "entries": 1, "bytes": 3}
+
+    # modified file
+    touch(file, "abcd")
+    assert cache.load([file], loader) == "abcd"
+    assert loader.call_count == 2
+    assert cache.misses == 2
+
+    # optional and missing files are part of the key
+    missing = tmp_path / "missing.txt"
+    assert cache.load([file, None, missing], loader) == "abcd"
+    assert loader.call_count == 3
+    touch(missing, "")
+    cache.load([file, None, missing], loader)
+    assert loader.call_count == 4
+
+    cache.clear()
+    assert cache.stats["entries"] == 0
+    assert cache.stats["bytes"] == 0
+
+
+def test_eviction(tmp_path):
+    files = []
+    for i in range(3):
+        files.append(tmp_path / f"{i}.txt")
+        touch(files[-1], "x" * 40)
+    cache = FileCache(100)
+    cache.load([files[0]], lambda: 0)
+    cache.load([files[1]], lambda: 1)
+    # access 0 so that 1 is the least recently used entry
+    cache.load([files[0]], lambda: 0)
+    cache.load([files[2]], lambda: 2)
+    assert cache.stats["entries"] == 2
+    assert cache.stats["bytes"] == 80
+    loader = Mock(return_value=0)
+    cache.load([files[0]], loader)
+    loader.assert_not_called()
+    cache.load([files[1]], loader)
+    loader.assert_called_once()
+
+    # files larger than the cache are not cached
+    touch(files[0], "x" * 101)
+    loader = Mock(return_value=0)
+    cache.load([files[0]], loader)
+    cache.load([files[0]], loader)
+    assert loader.call_count == 2
+
+
+def test_disabled_and_errors(tmp_path):
+    file = tmp_path / "test.txt"
+    touch(file, "abc")
+    cache = FileCache(0)
+    loader = Mock(return_value="abc")
+    cache.load([file], loader)
+    cache.load([file], loader)
+    assert loader.call_count == 2
+    assert cache.stats["misses"] == 0
+
+    cache = FileCache(1000)
+    with pytest.raises(IOError):
+        cache.load([tmp_path / "missing.txt"], Mock(side_effect=IOError))
+    assert cache.stats["entries"] == 0
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from zhinst.labber.driver.hardware_loop import HardwareLoop, linear_axis
+
+
+def test_linear_axis():
+    assert linear_axis([1.0, 2.0, 3.0]) == (1.0, 3.0, 3)
+    assert linear_axis(np.linspace(-1e6, 1e6, 101)) == (-1e6, 1e6, 101)
+    assert linear_axis([5.0]) == (5.0, 5.0, 1)
+    assert linear_axis([5.0, 1.0]) == (5.0, 1.0, 2)
+    with pytest.raises(ValueError):
+        linear_axis([1.0, 2.0, 4.0])
+
+
+def test_hardware_loop():
+    loop = HardwareLoop()
+    assert loop.axes() == {}
+    loop.add_value("Freq", 1, 3, 2.0)
+    with pytest.raises(ValueError):
+        loop.axes()
+    loop.add_value("Freq", 0, 3, 1.0)
+    loop.add_value("Freq", 2, 3, 3.0)
+    assert np.array_equal(loop.axes()["Freq"], [1.0, 2.0, 3.0])
+
+    assert not loop.has_result("Result")
+    loop.set_result("Result", np.arange(6))
+    assert loop.has_result("Result")
+    assert np.array_equal(loop.get_result("Result", 0, 3), [0, 1])
+    assert np.array_equal(loop.get_result("Result", 2, 3), [4, 5])
+    assert np.array_equal(loop.get_result("Result", 4, 6), [4])
+    with pytest.raises(ValueError):
+        loop.get_result("Result", 0, 4)
+    with pytest.raises(KeyError):
+        loop.get_result("Other", 0, 3)
+
+    # new values invalidate the results
+    loop.add_value("Freq", 0, 2, 1.0)
+    assert not loop.has_result("Result")
+    loop.clear()
+    assert loop.axes() == {}
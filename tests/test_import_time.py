@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+LABBER_STUBS = Path(__file__).resolve().parent / "labber"
+
+# Modules only needed to generate drivers
+GENERATOR_MODULES = (
+    "jinja2",
+    "black",
+    "autoflake",
+    "natsort",
+    "zhinst.labber.generator",
+    "zhinst.labber.code_generator.drivers",
+)
+
+# Heavy modules that are only needed once a device is used
+DEVICE_MODULES = ("numpy", "zhinst.core", "zhinst.toolkit")
+
+# Import time budgets in ms (generous, -X importtime adds overhead). The
+# wall-clock checks depend on the machine and only run if the environment
+# variable ZHINST_LABBER_IMPORT_BUDGET is set.
+PACKAGE_BUDGET = 100
+CLI_BUDGET = 500
+DRIVER_OWN_BUDGET = 250
+
+budget = pytest.mark.skipif(
+    not os.environ.get("ZHINST_LABBER_IMPORT_BUDGET"),
+    reason="set ZHINST_LABBER_IMPORT_BUDGET to check the import times",
+)
+
+
+def import_times(module):
+    """Import a module in a new interpreter and parse ``-X importtime``.
+
+    Returns:
+        Dictionary with the self and cumulative import time in ms per module.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(LABBER_STUBS), env.get("PYTHONPATH")])
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(own) / 1000, int(cumulative) / 1000)
+    return times
+
+
+def assert_no_generator(times):
+    loaded = [name for name in GENERATOR_MODULES if name in times]
+    assert not loaded, f"Generator modules imported: {loaded}"
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "zhinst.labber",
+        "zhinst.labber.cli_script",
+        "zhinst.labber.driver.base_instrument",
+    ],
+)
+def test_no_generator_import(module):
+    assert_no_generator(import_times(module))
+
+
+@pytest.mark.parametrize("module", ["zhinst.labber", "zhinst.labber.cli_script"])
+def test_no_device_import(module):
+    times = import_times(module)
+    loaded = [name for name in DEVICE_MODULES if name in times]
+    assert not loaded, f"Device modules imported: {loaded}"
+
+
+@budget
+def test_import_package_budget():
+    times = import_times("zhinst.labber")
+    assert times["zhinst.labber"][1] < PACKAGE_BUDGET
+
+
+@budget
+def test_import_cli_budget():
+    times = import_times("zhinst.labber.cli_script")
+    assert times["zhinst.labber.cli_script"][1] < CLI_BUDGET
+
+
+@budget
+def test_import_driver_budget():
+    times = import_times("zhinst.labber.driver.base_instrument")
+    own = sum(
+        own for name, (own, _) in times.items() if name.startswith("zhinst.labber")
+    )
+    assert own < DRIVER_OWN_BUDGET
+
+
+def test_lazy_attributes():
+    import zhinst.labber
+
+    assert callable(zhinst.labber.generate_labber_files)
+    assert callable(zhinst.labber.export_waveforms)
+    assert "generate_labber_files" in dir(zhinst.labber)
+    with pytest.raises(AttributeError):
+        zhinst.labber.not_existing
@@ -0,0 +1,201 @@
+import logging
+import threading
+from logging.handlers import QueueHandler
+from unittest.mock import Mock, patch
+
+import numpy as np
+from zhinst.toolkit import Waveforms
+
+from zhinst.labber.driver.logger import (
+    RATE_LIMITED,
+    Payload,
+    RateLimitFilter,
+    _remove_setup,
+    configure_logger,
+    summarize,
+)
+
+
+def test_summarize():
+    assert summarize(1.5) == "1.5"
+    assert summarize(np.array([1, 2])) == "[1 2]"
+    array = np.arange(1000, dtype=np.float64)
+    text = summarize(array)
+    assert text.startswith("array(shape=(1000,), dtype=float64, hash=")
+    assert text == summarize(array.copy())
+    assert text != summarize(array + 1)
+
+    waveforms = Waveforms()
+    waveforms[0] = (np.ones(100), np.zeros(100))
+    waveforms[3] = np.ones(50)
+    assert summarize(waveforms).startswith("Waveforms(slots=[0, 3], samples=250, ")
+
+    text = summarize({"pulses": waveforms, "index": 1})
+    assert text.startswith("{'pulses': Waveforms(slots=[0, 3]")
+    assert text.endswith("'index': 1}")
+
+    assert summarize("x" * 1000, 20) == "x" * 17 + "..."
+    assert summarize(list(range(100))) == "[0, 1, 2, 3, 4, 5, 6, 7, ... (100 items)]"
+    assert len(summarize([["y" * 500] * 100] * 100)) <= 200
+
+
+def test_payload_is_lazy():
+    value = Mock()
+    value.__str__ = Mock(return_value="value")
+    logger = logging.getLogger("zhinst.labber.test.payload")
+    logger.setLevel(logging.WARNING)
+    logger.info("%s", Payload(value))
+    value.__str__.assert_not_called()
+    assert str(Payload(value)) == "value"
+
+
+def test_rate_limit_filter():
+    rate_filter = RateLimitFilter(2, interval=1.0)
+
+    def record(msg, limited=True, args=()):
+        record = logging.makeLogRecord({"msg": msg, "name": "test", "args": args})
+        if limited:
+            record.__dict__.update(RATE_LIMITED)
+        return record
+
+    with patch("zhinst.labber.driver.logger.time.monotonic", return_value=0):
+        assert rate_filter.filter(record("a %s"))
+        assert rate_filter.filter(record("a %s"))
+        assert not rate_filter.filter(record("a %s"))
+        assert not rate_filter.filter(record("a %s"))
+        # other messages are limited on their own
+        assert rate_filter.filter(record("b %s"))
+        # as well as messages of other quantities
+        assert rate_filter.filter(record("a %s", args=("Quant 1",)))
+        assert rate_filter.filter(record("a %s", args=("Quant 2",)))
+        # messages without the flag are never limited
+        assert rate_filter.filter(record("a %s", limited=False))
+    with patch("zhinst.labber.driver.logger.time.monotonic", return_value=1.5):
+        emitted = record("a %s")
+        assert rate_filter.filter(emitted)
+        assert emitted.msg == "a %s"
+        assert emitted.suppressed == 2
+
+    # a record passed to several handlers is only counted once
+    shared = record("c %s")
+    assert rate_filter.filter(shared)
+    assert rate_filter.filter(shared)
+    assert rate_filter.filter(record("c %s"))
+    assert not rate_filter.filter(record("c %s"))
+
+    rate_filter.rate = 0
+    assert all(rate_filter.filter(record("a %s")) for _ in range(10))
+
+
+def test_configure_logger_rate_limit():
+    logger = logging.getLogger("zhinst.labber.test.rate_limit")
+    configure_logger(logger, logging.INFO, rate_limit=5)
+    configure_logger(logger, logging.INFO, rate_limit=3)
+    filters = [
+        f
+        for handler in logger.handlers
+        for f in handler.filters
+        if isinstance(f, RateLimitFilter)
+    ]
+    assert len(filters) == 1
+    assert filters[0].rate == 3
+
+
+def test_configure_logger_children(tmp_path):
+    logger = logging.getLogger("zhinst.labber.test.package")
+    child = logging.getLogger("zhinst.labber.test.package.module")
+    try:
+        configure_logger(logger, logging.INFO, tmp_path / "test.log", rate_limit=1)
+        child.info("child message")
+        child.debug("debug message")
+        # the rate limit also applies to the records of the children
+        for _ in range(3):
+            child.info("hot message", extra=RATE_LIMITED)
+    finally:
+        _remove_setup(logger)
+    text = (tmp_path / "test.log").read_text()
+    assert "INFO: child message" in text
+    assert "debug message" not in text
+    assert text.count("hot message") == 1
+
+
+def test_configure_logger_suppressed(tmp_path):
+    logger = logging.getLogger("zhinst.labber.test.suppressed")
+    try:
+        configure_logger(logger, logging.INFO, tmp_path / "test.log", rate_limit=1)
+        with patch("zhinst.labber.driver.logger.time.monotonic", return_value=0):
+            for index in range(3):
+                logger.info("hot %d", index, extra=RATE_LIMITED)
+        with patch("zhinst.labber.driver.logger.time.monotonic", return_value=2):
+            logger.info("hot %d", 3, extra=RATE_LIMITED)
+    finally:
+        _remove_setup(logger)
+    lines = (tmp_path / "test.log").read_text().splitlines()
+    assert lines[0].endswith("INFO: hot 0")
+    assert lines[1].endswith("INFO: hot 3 (2 similar messages suppressed)")
+
+
+def test_configure_logger_idempotent(tmp_path):
+    logger = logging.getLogger("zhinst.labber.test.idempotent")
+    try:
+        configure_logger(logger, logging.INFO)
+        configure_logger(logger, logging.DEBUG)
+        assert len(logger.handlers) == 1
+        assert logger.level == logging.DEBUG
+
+        configure_logger(logger, logging.INFO, tmp_path / "1.log")
+        configure_logger(logger, logging.INFO, tmp_path / "1.log")
+        assert len(logger.handlers) == 2
+        first_file = logger.handlers[1]
+
+        # a new path replaces the file handler
+        configure_logger(logger, logging.INFO, tmp_path / "2.log")
+        assert len(logger.handlers) == 2
+        assert first_file not in logger.handlers
+        assert first_file.stream is None
+    finally:
+        _remove_setup(logger)
+    assert logger.handlers == []
+
+
+def test_configure_logger_async(tmp_path):
+    logger = logging.getLogger("zhinst.labber.test.async")
+    # the capture handlers of pytest render in the calling thread
+    logger.propagate = False
+    rendered_in = []
+
+    class Value:
+        def __str__(self):
+            rendered_in.append(threading.current_thread())
+            return "value"
+
+    try:
+        configure_logger(logger, logging.INFO, tmp_path / "test.log", asynchronous=True)
+        configure_logger(logger, logging.INFO, tmp_path / "test.log", asynchronous=True)
+        assert len(logger.handlers) == 1
+        assert isinstance(logger.handlers[0], QueueHandler)
+        logger.info("got %s", Value())
+    finally:
+        # writes all queued messages
+        _remove_setup(logger)
+    assert rendered_in and threading.current_thread() not in rendered_in
+    assert "INFO: got value" in (tmp_path / "test.log").read_text()
+
+
+def test_configure_logger_async_payload(tmp_path):
+    logger = logging.getLogger("zhinst.labber.test.async_payload")
+    logger.propagate = False
+    value = [1, 2]
+    try:
+        configure_logger(logger, logging.INFO, tmp_path / "test.log", asynchronous=True)
+        with patch.object(logger.handlers[0], "enqueue") as enqueue:
+            logger.info("set %s (%d)", Payload(value), 1)
+            logger.info("set %(value)s", {"value": Payload(value)})
+        value.append(3)
+        records = [call.args[0] for call in enqueue.call_args_list]
+        # payloads are summarized before the value can change
+        assert records[0].args == ("[1, 2]", 1)
+        assert records[1].args == {"value": "[1, 2]"}
+        assert records[0].getMessage() == "set [1, 2] (1)"
+    finally:
+        _remove_setup(logger)
@@ -0,0 +1,162 @@
+import threading
+from unittest.mock import MagicMock, Mock
+
+import numpy as np
+
+from zhinst.labber.driver.module_manager import (
+    ModulePoller,
+    RingBuffer,
+    SignalEntry,
+    SignalTable,
+    iter_chunks,
+)
+from zhinst.labber.driver.node_path import QuantPathMap
+
+
+def parse(value):
+    path, _, option = value.partition("::")
+    return f"/dev1234/{path.lstrip('/')}", option
+
+
+def test_signal_table():
+    quant_map = QuantPathMap(
+        " - ", ["Signal - 1", "Signal - 2", "Result - 1", "Result - 2", "Enable"]
+    )
+    parse_mock = Mock(side_effect=parse)
+    table = SignalTable(quant_map, parse_mock)
+    values = {"Signal - 1": "Demods/0/Sample::X", "Signal - 2": "demods/1/sample"}
+
+    assert table.quants("/result/*") == ["Result - 1", "Result - 2"]
+    assert table.entries("/signal/*", "/result/*", values.get) == [
+        SignalEntry("Signal - 1", "Result - 1", "/dev1234/demods/0/sample", "x"),
+        SignalEntry("Signal - 2", "Result - 2", "/dev1234/demods/1/sample", ""),
+    ]
+    assert parse_mock.call_count == 2
+
+    # unchanged values are not parsed again
+    table.entries("/signal/*", "/result/*", values.get)
+    assert table.parse("Signal - 1", values["Signal - 1"]) == (
+        "/dev1234/demods/0/sample",
+        "x",
+    )
+    assert parse_mock.call_count == 2
+
+    values["Signal - 2"] = "demods/2/sample::r"
+    assert table.entries("/signal/*", "/result/*", values.get)[1] == SignalEntry(
+        "Signal - 2", "Result - 2", "/dev1234/demods/2/sample", "r"
+    )
+    assert parse_mock.call_count == 3
+
+
+def test_signal_table_new_quants():
+    quant_map = QuantPathMap(" - ", ["Signal - 1", "Result - 1"])
+    table = SignalTable(quant_map, parse)
+    assert table.quants("/signal/*") == ["Signal - 1"]
+    quant_map.add("Signal - 2")
+    assert table.quants("/signal/*") == ["Signal - 1", "Signal - 2"]
+
+
+def test_module_poller():
+    module = Mock()
+    module.read.side_effect = [
+        {"/dev1234/a": [1]},
+        {},
+        {"/dev1234/b": [2]},
+        RuntimeError("test"),
+    ]
+    callback = Mock()
+    measure = MagicMock()
+    poller = ModulePoller(module, 1, callback, measure)
+    assert poller.read() == (0, {})
+    assert poller.poll()
+    sequence, result = poller.read()
+    assert (sequence, result) == (1, {"/dev1234/a": [1]})
+    assert not poller.poll()
+    assert poller.read() == (1, {"/dev1234/a": [1]})
+    assert poller.poll()
+    assert poller.read() == (2, {"/dev1234/a": [1], "/dev1234/b": [2]})
+    # only the results updated since a previous read
+    assert poller.read(1) == (2, {"/dev1234/b": [2]})
+    assert poller.read(2) == (2, {})
+    # published buffers are not modified
+    assert result == {"/dev1234/a": [1]}
+    assert not poller.poll()
+    assert poller.read()[0] == 2
+    assert callback.call_count == 2
+    callback.assert_called_with({"/dev1234/b": [2]})
+    measure.assert_called_with("module", "poll")
+    assert measure.call_count == 4
+
+
+def test_module_poller_lock():
+    module = Mock()
+    module.read.return_value = {"/dev1234/a": [1]}
+    lock = threading.Lock()
+    poller = ModulePoller(module, 1, module_lock=lock)
+    assert poller.module_lock is lock
+    with lock:
+        thread = threading.Thread(target=poller.poll)
+        thread.start()
+        thread.join(0.05)
+        # the module is not read while another thread uses it
+        assert thread.is_alive()
+        module.read.assert_not_called()
+    thread.join(5)
+    module.read.assert_called_once_with(flat=True)
+
+
+def test_module_poller_thread():
+    module = Mock()
+    read = threading.Event()
+
+    def read_module(flat):
+        read.set()
+        return {"/dev1234/a": [1]}
+
+    module.read.side_effect = read_module
+    poller = ModulePoller(module, 0.001)
+    poller.start()
+    assert poller.is_running()
+    assert read.wait(5)
+    poller.stop()
+    assert not poller.is_running()
+    assert poller.read()[0] >= 1
+    module.read.assert_called_with(flat=True)
+
+
+def test_ring_buffer():
+    buffer = RingBuffer(10, initial_size=2)
+    assert len(buffer) == 0
+    assert buffer.values().size == 0
+    buffer.append(np.array([0, 1, 2]))
+    buffer.append(np.array([[3, 4], [5, 6]]))
+    assert len(buffer) == 7
+    assert np.array_equal(buffer.values(), np.arange(7))
+    # oldest values are dropped
+    buffer.append(np.arange(7, 12))
+    assert len(buffer) == 10
+    assert np.array_equal(buffer.values(), np.arange(2, 12))
+    buffer.append(np.arange(12, 15))
+    assert np.array_equal(buffer.values(), np.arange(5, 15))
+    buffer.append(np.arange(15, 40))
+    assert np.array_equal(buffer.values(), np.arange(30, 40))
+    # dtype is promoted
+    buffer.append(np.array([1j]))
+    values = buffer.values()
+    assert values.dtype == complex
+    assert np.array_equal(values, np.append(np.arange(31, 40), 1j))
+
+    buffer.clear()
+    assert len(buffer) == 0
+    buffer.append(np.array([1.0]))
+    assert np.array_equal(buffer.values(), [1.0])
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(None)) == []
+    assert list(iter_chunks({"x": 1})) == [{"x": 1}]
+    assert list(iter_chunks([{"x": 1}, [{"x": 2}, {"x": 3}], {}])) == [
+        {"x": 1},
+        {"x": 2},
+        {"x": 3},
+    ]
@@ -0,0 +1,82 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from zhinst.labber.driver.node_doc_cache import CachedNodeDocConnection, NodeDocCache
+
+
+def create_connection(fwrevision=1000):
+    connection = MagicMock()
+    values = {
+        "/dev1234/features/devtype": "SHFQA4",
+        "/dev1234/features/options": "16W",
+        "/dev1234/system/fwrevision": fwrevision,
+        "/zi/about/revision": 2000,
+    }
+    connection.getString.side_effect = lambda path: values[path]
+    connection.getInt.side_effect = lambda path: values[path]
+    connection.listNodesJSON.return_value = json.dumps(
+        {"/dev1234/sigouts/0/on": {"Type": "Integer"}}
+    )
+    return connection
+
+
+def test_node_doc_cache():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        cache = NodeDocCache(Path(tmpdirname) / "cache")
+        raw = create_connection()
+        connection = CachedNodeDocConnection(raw, cache)
+        nodes_json = connection.listNodesJSON("/dev1234/*")
+        assert json.loads(nodes_json) == {"/dev1234/sigouts/0/on": {"Type": "Integer"}}
+        raw.listNodesJSON.assert_called_once_with("/dev1234/*")
+
+        # reopen
+        raw = create_connection()
+        connection = CachedNodeDocConnection(raw, cache)
+        assert connection.listNodesJSON("/DEV1234/*") == nodes_json
+        raw.listNodesJSON.assert_not_called()
+
+        # other paths are not cached
+        connection.listNodesJSON("/zi/*")
+        connection.listNodesJSON("/dev1234/*", 0)
+        assert raw.listNodesJSON.call_count == 2
+
+        # new firmware
+        raw = create_connection(fwrevision=1001)
+        connection = CachedNodeDocConnection(raw, cache)
+        connection.listNodesJSON("/dev1234/*")
+        raw.listNodesJSON.assert_called_once_with("/dev1234/*")
+        assert len(list((Path(tmpdirname) / "cache").glob("dev1234_*.json"))) == 1
+
+
+def test_cached_connection_forwarding():
+    raw = MagicMock()
+    raw.host = "localhost"
+    connection = CachedNodeDocConnection(raw, NodeDocCache("unused"))
+    connection.setDouble("/dev1234/sigouts/0/offset", 1.0)
+    raw.setDouble.assert_called_once_with("/dev1234/sigouts/0/offset", 1.0)
+    assert connection.host == "localhost"
+
+
+def test_node_doc_cache_errors():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        raw = create_connection()
+        cache = NodeDocCache(tmpdirname)
+        key = cache.key(raw, "DEV1234")
+        assert key.startswith("dev1234_")
+        assert cache.load(key) is None
+
+        # the cache is skipped if the versions can not be read
+        raw.getInt.side_effect = RuntimeError("test")
+        assert cache.key(raw, "DEV1234") is None
+        connection = CachedNodeDocConnection(raw, cache)
+        connection.listNodesJSON("/dev1234/*")
+        connection.listNodesJSON("/dev1234/*")
+        assert raw.listNodesJSON.call_count == 2
+        assert not list(Path(tmpdirname).glob("*.json"))
+
+        file = Path(tmpdirname) / "file"
+        file.write_text("")
+        # cache directory can not be created
+        NodeDocCache(file / "cache").store(key, "{}")
@@ -0,0 +1,50 @@
+import fnmatch
+
+from zhinst.labber.driver.node_info import NodeInfoIndex
+
+
+def reference_lookup(node_info, node_path):
+    for parent_node, info in node_info.items():
+        if fnmatch.fnmatch(node_path, parent_node):
+            return info.get("driver", {})
+    return {}
+
+
+def test_first_match(settings_json):
+    node_info = {
+        **settings_json["common"]["quants"],
+        **settings_json["SHFQA"]["quants"],
+    }
+    index = NodeInfoIndex(node_info)
+    assert len(index) == len(node_info)
+    for node_path in [
+        "/awgs/0/waves1",
+        "/awgs/0/commandtable/data",
+        "/qachannels/0/generator/pulses",
+        "/qachannels/1/readout/result/enable",
+        "/system/identify",
+        "/sigouts/0/enables/1",
+        "/sigouts/0/on",
+        "/",
+    ]:
+        assert index.get(node_path) == reference_lookup(node_info, node_path)
+
+
+def test_pattern_order():
+    index = NodeInfoIndex(
+        {
+            "/a/*": {"driver": {"first": True}},
+            "/a/b": {"driver": {"second": True}},
+            "/c/*": {},
+        }
+    )
+    assert index.get("/a/b") == {"first": True}
+    assert index.get("/c/d") == {}
+    assert index.get("/d") == {}
+    # cached lookups return the same object
+    assert index.get("/a/b") is index.get("/a/b")
+
+
+def test_empty():
+    index = NodeInfoIndex({})
+    assert index.get("/a/b") == {}
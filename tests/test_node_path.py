@@ -0,0 +1,35 @@
+from zhinst.labber.driver.node_path import NodePath, QuantPathMap
+
+
+def test_node_path():
+    path = NodePath("/awgs/0/waves1")
+    assert path == "/awgs/0/waves1"
+    assert path.parts == ("awgs", "0", "waves1")
+    assert path.name == "waves1"
+    assert path.parent == "/awgs/0"
+    assert path / "." == "/awgs/0/waves1"
+    assert path / "" == "/awgs/0/waves1"
+    assert path / "../write_to_waveform_memory" == "/awgs/0/write_to_waveform_memory"
+    assert path / "../../../../a" == "/a"
+    assert isinstance(path / "..", NodePath)
+    assert NodePath("a/b/") == "/a/b"
+    assert NodePath("") == "/"
+    assert NodePath("/").parts == ()
+
+
+def test_quant_path_map():
+    quant_map = QuantPathMap(" - ", ["AWGS - 0 - Waves1", "Result - 1"])
+    assert len(quant_map) == 2
+    assert "/awgs/0/waves1" in quant_map
+    assert quant_map.to_path("AWGS - 0 - Waves1") == "/awgs/0/waves1"
+    assert quant_map.to_quant(NodePath("/awgs/0/waves1")) == "AWGS - 0 - Waves1"
+    assert quant_map["/result/1"] == "Result - 1"
+    assert sorted(quant_map) == ["/awgs/0/waves1", "/result/1"]
+
+    # unknown entries
+    assert quant_map.to_path("Test - Name") == "/test/name"
+    assert "/test/name" not in quant_map
+    assert quant_map.to_quant("/test/name") == "test - name"
+
+    quant_map[quant_map.to_path("Test - Name")] = "Test - Name"
+    assert quant_map.to_quant("/test/name") == "Test - Name"
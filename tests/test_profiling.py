@@ -0,0 +1,154 @@
+import contextlib
+import csv
+import json
+import pstats
+
+import pytest
+
+from zhinst.labber.driver.profiling import (
+    BUCKETS,
+    LatencyHistogram,
+    LatencyRecorder,
+    ProfileCapture,
+    measure_iter,
+    nested,
+    no_measure,
+)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.summary()["count"] == 0
+    assert histogram.percentile(50) == 0.0
+    for duration in [1e-4] * 90 + [1e-2] * 9 + [1000]:
+        histogram.add(duration)
+    assert sum(histogram.counts) == 100
+    # durations above the last bucket are counted in the overflow bucket
+    assert histogram.counts[-1] == 1
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["min"] == 1e-4
+    assert summary["max"] == 1000
+    assert summary["mean"] == pytest.approx((90 * 1e-4 + 9 * 1e-2 + 1000) / 100)
+    assert summary["p50"] == pytest.approx(1e-4)
+    assert summary["p90"] == pytest.approx(1e-4)
+    assert summary["p99"] == pytest.approx(1e-2)
+    assert histogram.percentile(100) == 1000
+    assert len(histogram.counts) == len(BUCKETS) + 1
+
+
+def test_latency_recorder(tmp_path):
+    recorder = LatencyRecorder()
+    with recorder.measure("set", "Quant - 1"):
+        pass
+    with pytest.raises(RuntimeError):
+        with recorder.measure("set", "Quant - 1"):
+            raise RuntimeError("test")
+    recorder.add("function", "awg/write_to_waveform_memory", 0.5)
+    histograms = recorder.histograms()
+    assert histograms[("set", "Quant - 1")].count == 2
+    assert histograms[("function", "awg/write_to_waveform_memory")].total == 0.5
+
+    file = recorder.dump(tmp_path / "latency.txt")
+    assert file == tmp_path / "latency.json"
+    operations = json.loads(file.read_text())["operations"]
+    assert [(o["operation"], o["name"]) for o in operations] == [
+        ("function", "awg/write_to_waveform_memory"),
+        ("set", "Quant - 1"),
+    ]
+    assert operations[0]["buckets"] == {"0.562": 1}
+
+    file = recorder.dump(tmp_path / "latency", "csv")
+    with file.open(newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert rows[1]["name"] == "Quant - 1"
+    assert rows[1]["count"] == "2"
+
+    with pytest.raises(ValueError):
+        recorder.dump(tmp_path / "latency", "xml")
+
+    recorder.clear()
+    assert recorder.histograms() == {}
+
+
+def test_no_measure():
+    with no_measure("set", "Quant - 1"):
+        pass
+
+
+def test_profile_capture_matches(tmp_path):
+    capture = ProfileCapture(
+        tmp_path, operations=["set"], quants=["AWG*"], functions=["awg/*"]
+    )
+    assert capture.matches("set", "AWG - 0 - Enable")
+    assert not capture.matches("get", "AWG - 0 - Enable")
+    assert not capture.matches("set", "Oscs - 0 - Freq")
+    assert capture.matches("function", "awg/write_to_waveform_memory")
+    assert not capture.matches("function", "sequencer_program")
+    assert not capture.matches("snapshot", "take")
+
+    capture = ProfileCapture(tmp_path, operations=["GET_CFG"])
+    assert capture.matches("get_cfg", "Oscs - 0 - Freq")
+    assert not capture.matches("get", "Oscs - 0 - Freq")
+
+    capture = ProfileCapture(tmp_path, quants=["Oscs*"])
+    assert capture.matches("get", "Oscs - 0 - Freq")
+    assert capture.matches("set_cfg", "Oscs - 0 - Freq")
+
+    assert not ProfileCapture(tmp_path).matches("set", "Oscs - 0 - Freq")
+    with pytest.raises(ValueError):
+        ProfileCapture(tmp_path, operations=["ARM"])
+
+
+def test_profile_capture(tmp_path):
+    capture = ProfileCapture(tmp_path / "profiles", quants=["*"], max_files=2)
+    for index in range(3):
+        with capture.measure("set", f"Quant - {index}"):
+            sum(range(100))
+    files = sorted((tmp_path / "profiles").glob("*.pstats"))
+    # the oldest profile is removed
+    assert [file.name.split("_", 1)[1] for file in files] == [
+        "00002_set_Quant_-_1.pstats",
+        "00003_set_Quant_-_2.pstats",
+    ]
+    stats = pstats.Stats(str(files[-1]))
+    assert stats.total_calls > 0
+
+    # nested operations are part of the outer profile
+    with capture.measure("set", "Outer"):
+        with capture.measure("set", "Inner"):
+            pass
+    assert len(list((tmp_path / "profiles").glob("*_Outer.pstats"))) == 1
+    assert not list((tmp_path / "profiles").glob("*_Inner.pstats"))
+
+
+def test_profile_capture_no_rotate(tmp_path):
+    capture = ProfileCapture(tmp_path, quants=["*"], max_files=1, rotate=False)
+    with capture.measure("set", "Quant - 1"):
+        pass
+    assert not capture.matches("set", "Quant - 2")
+    assert len(list(tmp_path.glob("*.pstats"))) == 1
+
+
+def test_nested():
+    calls = []
+
+    @contextlib.contextmanager
+    def context(name):
+        calls.append(f"enter {name}")
+        yield
+        calls.append(f"exit {name}")
+
+    with nested([]):
+        pass
+    with nested([context("a"), context("b")]):
+        pass
+    assert calls == ["enter a", "enter b", "exit b", "exit a"]
+
+
+def test_measure_iter():
+    recorder = LatencyRecorder()
+    items = measure_iter(recorder.measure, "parse", "waves.csv", iter([1, 2, 3]))
+    assert list(items) == [1, 2, 3]
+    # the exhausted iterator is measured as well
+    assert recorder.histograms()[("parse", "waves.csv")].count == 4
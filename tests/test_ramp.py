@@ -0,0 +1,64 @@
+import threading
+import time
+
+from zhinst.labber.driver.ramp import RampEngine
+
+
+def wait_for(engine, name, timeout=5):
+    deadline = time.monotonic() + timeout
+    while engine.is_running(name) and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return not engine.is_running(name)
+
+
+def test_ramp():
+    steps = []
+    engine = RampEngine(steps.append, update_rate=1000)
+    engine.start("a", "/a", 0.0, 0.05, 1.0)
+    engine.start("b", "/b", 1.0, 0.95, 1.0)
+    assert engine.is_running("a")
+    assert wait_for(engine, "a")
+    assert wait_for(engine, "b")
+
+    # steps of both ramps are set together
+    assert len(steps[0]) == 2
+    values = {}
+    for step in steps:
+        for node, value in step:
+            values.setdefault(node, []).append(value)
+    assert values["/a"][-1] == 0.05
+    assert values["/a"] == sorted(values["/a"])
+    assert values["/b"][-1] == 0.95
+    assert values["/b"] == sorted(values["/b"], reverse=True)
+    assert len(values["/a"]) > 2
+    assert engine.value("a") is None
+    engine.close()
+
+
+def test_ramp_stop():
+    steps = []
+    engine = RampEngine(steps.append, update_rate=1000)
+    engine.start("a", "/a", 0.0, 1.0, 0.1)
+    time.sleep(0.01)
+    engine.stop("a")
+    assert not engine.is_running("a")
+    engine.close()
+    assert steps
+    assert all(value < 1.0 for step in steps for _, value in step)
+
+
+def test_ramp_error():
+    called = threading.Event()
+
+    def set_values(steps):
+        called.set()
+        raise RuntimeError("test")
+
+    engine = RampEngine(set_values, update_rate=1000)
+    engine.start("a", "/a", 0.0, 1.0, 0.1)
+    assert called.wait(5)
+    assert wait_for(engine, "a")
+    error = engine.pop_error("a")
+    assert str(error) == "Ramp of /a to 1.0 stopped at 0.0: test"
+    assert engine.pop_error("a") is None
+    engine.close()
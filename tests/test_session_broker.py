@@ -0,0 +1,169 @@
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from zhinst.labber.driver.session_broker import (
+    BrokerConnection,
+    SessionBroker,
+    connect_broker,
+    default_authkey,
+    private_directory,
+)
+
+AUTHKEY = b"test-key"
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Unix sockets are not available"
+)
+
+
+class StandInServer:
+    """Stand-in for the connection to a data server."""
+
+    def __init__(self, host, port, hf2):
+        self.host = host
+        self.port = port
+        self.values = {
+            "/dev1234/sigouts/0/offset": 0.0,
+            "/dev1234/system/fwrevision": 1,
+            "/dev1234/features/options": "",
+        }
+        self.list_nodes_calls = 0
+
+    def listNodesJSON(self, path, *args, **kwargs):
+        self.list_nodes_calls += 1
+        return '{"/dev1234/sigouts/0/offset": {}}'
+
+    def getDouble(self, path):
+        return self.values[path]
+
+    getInt = getDouble
+    getString = getDouble
+
+    def disconnectDevice(self, serial):
+        pass
+
+    def set(self, path, value=None):
+        if isinstance(path, list):
+            for node, node_value in path:
+                self.values[node] = node_value
+        else:
+            self.values[path] = value
+
+    def get(self, paths, flat=False):
+        return {path: np.array([self.values[path]]) for path in paths.split(",")}
+
+
+@pytest.fixture()
+def broker():
+    servers = []
+
+    def factory(host, port, hf2):
+        servers.append(StandInServer(host, port, hf2))
+        return servers[-1]
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        address = str(Path(tmpdirname) / "broker.sock")
+        broker = SessionBroker(address, factory, idle_timeout=0, authkey=AUTHKEY)
+        thread = threading.Thread(target=broker.serve_forever, daemon=True)
+        thread.start()
+        assert broker.wait_ready(5)
+        yield address, servers
+        broker.close()
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def test_broker_shared_connection(broker):
+    address, servers = broker
+    client1 = BrokerConnection("localhost", 8004, False, address, AUTHKEY)
+    client2 = connect_broker("localhost", 8004, False, address=address, authkey=AUTHKEY)
+
+    client1.set("/dev1234/sigouts/0/offset", 1.5)
+    assert client2.getDouble("/dev1234/sigouts/0/offset") == 1.5
+    client2.set([("/dev1234/sigouts/0/offset", 2.5)])
+    result = client1.get("/dev1234/sigouts/0/offset", flat=True)
+    assert np.array_equal(result["/dev1234/sigouts/0/offset"], [2.5])
+    # one connection per data server
+    assert len(servers) == 1
+
+    # node documentation is fetched once
+    assert client1.listNodesJSON("/dev1234", 0) == client2.listNodesJSON("/dev1234", 0)
+    assert servers[0].list_nodes_calls == 1
+    # a firmware update or new options change the node documentation
+    client1.set("/dev1234/system/fwrevision", 2)
+    client1.listNodesJSON("/dev1234", 0)
+    assert servers[0].list_nodes_calls == 2
+    client2.listNodesJSON("/dev1234", 0)
+    assert servers[0].list_nodes_calls == 2
+    client1.disconnectDevice("dev1234")
+    client1.listNodesJSON("/dev1234", 0)
+    assert servers[0].list_nodes_calls == 3
+
+    client3 = BrokerConnection("otherhost", 8004, False, address, AUTHKEY)
+    client3.set("/dev1234/sigouts/0/offset", 3.0)
+    assert len(servers) == 2
+    assert client1.getDouble("/dev1234/sigouts/0/offset") == 2.5
+
+    for client in (client1, client2, client3):
+        client.close()
+
+
+def test_broker_errors(broker):
+    address, _ = broker
+    client = BrokerConnection("localhost", 8004, False, address, AUTHKEY)
+    with pytest.raises(KeyError):
+        client.getDouble("/dev1234/unknown")
+    with pytest.raises(RuntimeError, match="not supported"):
+        client.subscribe("/dev1234/sigouts/0/offset")
+    with pytest.raises(AttributeError):
+        client.unknownMethod()
+    # only the allowed methods are called in the broker
+    with pytest.raises(RuntimeError, match="not supported"):
+        client._call("__reduce__")
+    with pytest.raises(AttributeError):
+        client._private
+    # connection is still usable
+    assert client.getDouble("/dev1234/sigouts/0/offset") == 0.0
+    client.close()
+
+
+def test_broker_not_reachable():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        address = str(Path(tmpdirname) / "broker.sock")
+        with patch("zhinst.labber.driver.session_broker.start_broker") as start:
+            with pytest.raises(RuntimeError, match="not reachable"):
+                connect_broker(
+                    "localhost", 8004, address=address, timeout=0, authkey=AUTHKEY
+                )
+        start.assert_called_once_with(address)
+
+
+def test_broker_wrong_key(broker):
+    address, _ = broker
+    with pytest.raises(RuntimeError, match="authenticated"):
+        connect_broker("localhost", 8004, address=address, authkey=b"other-key")
+
+
+def test_private_directory(tmp_path):
+    with patch("tempfile.gettempdir", return_value=str(tmp_path)):
+        directory = private_directory()
+        assert directory.parent == tmp_path
+        authkey = default_authkey()
+        assert len(authkey) == 32
+        assert default_authkey() == authkey
+        assert (directory / "broker.key").stat().st_mode & 0o777 == 0o600
+
+        # e.g. created by another user
+        directory.chmod(0o755)
+        with pytest.raises(RuntimeError, match="mode 0700"):
+            private_directory()
+        directory.chmod(0o700)
+        (directory / "broker.key").chmod(0o644)
+        with pytest.raises(RuntimeError, match="Invalid session broker key"):
+            default_authkey()
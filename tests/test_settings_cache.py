@@ -0,0 +1,56 @@
+import json
+import os
+from pathlib import Path
+
+from zhinst.labber.driver import settings_cache
+
+GLOBAL_SETTINGS = (
+    Path(__file__).parent.parent / "src/zhinst/labber/resources/settings.json"
+)
+
+
+def test_load_settings(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings_file.write_text(json.dumps({"instrument": {"type": "SHFQA"}}))
+
+    settings = settings_cache.load_settings(settings_file)
+    assert settings == {"instrument": {"type": "SHFQA"}}
+    # returned settings are independent copies
+    del settings["instrument"]["type"]
+    assert settings_cache.load_settings(settings_file) == {
+        "instrument": {"type": "SHFQA"}
+    }
+
+    # modified file is reloaded
+    settings_file.write_text(json.dumps({"instrument": {"type": "HDAWG"}}))
+    stat = settings_file.stat()
+    os.utime(settings_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert settings_cache.load_settings(settings_file) == {
+        "instrument": {"type": "HDAWG"}
+    }
+    cached = [k for k in settings_cache._parsed_files if k[0] == str(settings_file)]
+    assert len(cached) == 1
+
+
+def test_load_driver_settings(settings_json):
+    shfqa = settings_cache.load_driver_settings(GLOBAL_SETTINGS, "device", "SHFQA4")
+    assert shfqa is settings_cache.load_driver_settings(
+        GLOBAL_SETTINGS, "device", "SHFQA4"
+    )
+    assert shfqa.path_seperator == settings_json["misc"]["labberDelimiter"]
+    assert shfqa.log_level == settings_json["misc"]["LogLevel"]
+    assert shfqa.function_info == settings_json["functions"]
+    assert len(shfqa.node_info) == len(
+        {**settings_json["common"]["quants"], **settings_json["SHFQA"]["quants"]}
+    )
+    assert shfqa.node_info.get("/qachannels/0/generator/pulses") == (
+        settings_json["SHFQA"]["quants"]["/qachannels/*/generator/pulses"]["driver"]
+    )
+
+    daq = settings_cache.load_driver_settings(GLOBAL_SETTINGS, "module", "daq")
+    assert daq.node_info.get("/signal/0") == (
+        settings_json["daq"]["quants"]["/signal/*"]["driver"]
+    )
+
+    session = settings_cache.load_driver_settings(GLOBAL_SETTINGS, "DataServer", "")
+    assert len(session.node_info) == len(settings_json["common"]["quants"])
@@ -0,0 +1,336 @@
+import json
+import threading
+from unittest.mock import MagicMock, call
+
+import numpy as np
+import pytest
+from zhinst.toolkit.nodetree import NodeTree
+
+from zhinst.labber.driver.snapshot_manager import (
+    GetBatchManager,
+    SnapshotManager,
+    TransactionManager,
+    covering_paths,
+)
+
+
+@pytest.fixture()
+def nodetree(data_dir):
+    with (data_dir / "nodedoc_dev1234_shfqa.json").open("r") as file:
+        node_docs = json.load(file)
+    yield NodeTree(MagicMock(), "dev1234", preloaded_json=node_docs)
+
+
+def test_covering_paths(nodetree):
+    paths = [
+        "/dev1234/system/update",
+        "/dev1234/qachannels/0/oscs/0/freq",
+        "/dev1234/qachannels/0/centerfreq",
+        "/dev1234/scopes/0/channels/0/enable",
+        "/dev1234/scopes/0/channels/0/wave",
+        "/dev1234/unknown/node",
+    ]
+    assert covering_paths(nodetree.raw_dict, paths) == [
+        "/dev1234/qachannels/0/centerfreq",
+        "/dev1234/qachannels/0/oscs/*",
+        "/dev1234/scopes/0/channels/0/enable",
+        "/dev1234/system/*",
+    ]
+    assert covering_paths(nodetree.raw_dict, []) == []
+    assert covering_paths({"/dev1/a/b": {"Type": "Double"}}, ["/dev1/a/b"]) == [
+        "/dev1/*"
+    ]
+
+
+def test_scoped_snapshot(nodetree):
+    connection = nodetree.connection
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [1], "value": [0]},
+        "/dev1234/system/owner": {"timestamp": [1], "value": ["test"]},
+    }
+    snapshot = SnapshotManager(
+        nodetree, ["/system/update", "/scopes/0/channels/0/wave"]
+    )
+    assert snapshot.get_value("/system/update") == 0
+    assert snapshot.get_value("system/owner") == "test"
+    connection.get.assert_called_once_with(
+        "/dev1234/system/*", flat=True, settingsonly=False
+    )
+
+    # heavy nodes are fetched individually and only once
+    connection.get.return_value = {
+        "/dev1234/scopes/0/channels/0/wave": [{"timestamp": 1, "vector": [1, 2]}]
+    }
+    assert all(snapshot.get_value("/scopes/0/channels/0/wave") == np.array([1, 2]))
+    snapshot.get_value("/scopes/0/channels/0/wave")
+    assert connection.get.call_count == 2
+
+    # unknown nodes
+    assert snapshot.get_value("/unknown/node") is None
+
+    # a cleared snapshot is taken again on the next access
+    snapshot.clear()
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [2], "value": [1]},
+    }
+    assert snapshot.get_value("/system/update") == 1
+    assert connection.get.call_count == 3
+
+
+def test_snapshot_error(nodetree):
+    connection = nodetree.connection
+    connection.get.side_effect = RuntimeError("timeout")
+    connection.getInt.return_value = 1
+    connection.getString.return_value = "test"
+    snapshot = SnapshotManager(nodetree, ["/system/update", "/system/owner"])
+    # the nodes are fetched individually without retrying the snapshot
+    assert snapshot.get_value("/system/update") == 1
+    assert snapshot.get_value("/system/owner") == "test"
+    assert snapshot.get_value("/system/update") == 1
+    assert connection.get.call_count == 1
+    connection.getInt.assert_called_once_with("/dev1234/system/update")
+
+    # the next get config takes a new snapshot
+    snapshot.clear()
+    connection.get.side_effect = None
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [1], "value": [2]},
+    }
+    assert snapshot.get_value("/system/update") == 2
+    assert connection.get.call_count == 2
+
+
+def test_subscribed_snapshot_error(nodetree):
+    connection = nodetree.connection
+    subscription = MagicMock()
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [10], "value": [0]},
+    }
+    snapshot = SnapshotManager(nodetree, ["/system/update"], subscription)
+    assert snapshot.get_value("/system/update") == 0
+
+    # data loss and failed snapshot => node is fetched individually
+    snapshot.clear()
+    subscription.poll.side_effect = RuntimeError("Data loss")
+    connection.get.side_effect = RuntimeError("timeout")
+    connection.getInt.return_value = 1
+    assert snapshot.get_value("/system/update") == 1
+
+    # values from before the error are not updated through the subscription
+    snapshot.clear()
+    connection.get.side_effect = None
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [20], "value": [3]},
+    }
+    assert snapshot.get_value("/system/update") == 3
+    assert subscription.poll.call_count == 1
+
+
+def test_full_snapshot():
+    nodetree = MagicMock()
+    root = MagicMock()
+    root.return_value = {"/dev1234/a": 1, "/dev1234/b": 2}
+    nodetree.__getitem__.side_effect = lambda path: (
+        root if path == "*" else MagicMock(__str__=lambda _: "/dev1234/" + path)
+    )
+    snapshot = SnapshotManager(nodetree)
+    assert snapshot.get_value("a") == 1
+    assert snapshot.get_value("b") == 2
+    root.assert_called_once_with(parse=False, enum=False)
+
+
+def test_subscribed_snapshot(nodetree):
+    connection = nodetree.connection
+    subscription = MagicMock()
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [10], "value": [0]},
+        "/dev1234/system/owner": {"timestamp": [10], "value": ["test"]},
+    }
+    snapshot = SnapshotManager(
+        nodetree,
+        ["/system/update", "/scopes/0/channels/0/wave"],
+        subscription,
+        max_age=60,
+    )
+    assert snapshot.get_value("/system/update") == 0
+    # vector nodes are not subscribed
+    subscription.subscribe.assert_called_once_with(["/dev1234/system/update"])
+
+    # only the changes are applied
+    snapshot.clear()
+    subscription.poll.return_value = {
+        "/dev1234/system/update": {"timestamp": [11, 12], "value": [1, 2]},
+    }
+    assert snapshot.get_value("/system/update") == 2
+    assert snapshot.get_value("/system/update") == 2
+    subscription.poll.assert_called_once()
+    assert connection.get.call_count == 1
+    # nodes that are not subscribed are fetched individually
+    connection.getString.return_value = "new"
+    assert snapshot.get_value("system/owner") == "new"
+    connection.getString.assert_called_once_with("/dev1234/system/owner")
+
+    # outdated changes are ignored
+    snapshot.clear()
+    subscription.poll.return_value = {
+        "/dev1234/system/update": {"timestamp": [5], "value": [3]},
+    }
+    assert snapshot.get_value("/system/update") == 2
+
+    # data loss => full snapshot
+    snapshot.clear()
+    subscription.poll.side_effect = RuntimeError("Data loss")
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [20], "value": [4]},
+    }
+    assert snapshot.get_value("/system/update") == 4
+    assert connection.get.call_count == 2
+
+    # too old => full snapshot
+    snapshot._max_age = 0
+    snapshot.clear()
+    snapshot.get_value("/system/update")
+    assert connection.get.call_count == 3
+    assert subscription.poll.call_count == 3
+
+    # closing disconnects the subscription
+    snapshot.clear()
+    snapshot.close()
+    subscription.unsubscribe.assert_called_once_with("*")
+    subscription.disconnect.assert_called_once()
+    snapshot.get_value("/system/update")
+    assert connection.get.call_count == 4
+    assert subscription.poll.call_count == 3
+
+
+def test_get_batch(nodetree):
+    connection = nodetree.connection
+    batch = GetBatchManager(nodetree)
+    assert not batch.is_running()
+
+    # first series is only recorded
+    batch.start()
+    assert batch.is_running()
+    with pytest.raises(KeyError):
+        batch.get_value("/system/update")
+    with pytest.raises(KeyError):
+        batch.get_value("system/owner")
+    # unknown nodes are not part of a batch
+    with pytest.raises(KeyError):
+        batch.get_value("/unknown/node")
+    with pytest.raises(KeyError):
+        batch.get_value("/system/update")
+    batch.end()
+    assert not batch.is_running()
+    connection.get.assert_not_called()
+
+    connection.get.return_value = {
+        "/dev1234/system/update": {"timestamp": [1], "value": [0]},
+        "/dev1234/system/owner": {"timestamp": [1], "value": ["test"]},
+    }
+    batch.start()
+    connection.get.assert_called_once_with(
+        "/dev1234/system/update,/dev1234/system/owner",
+        flat=True,
+        settingsonly=False,
+    )
+    assert batch.get_value("system/owner") == "test"
+    batch.end()
+
+    # the batch follows the last series
+    batch.start()
+    assert batch.get_value("system/owner") == "test"
+    batch.end()
+    connection.get.side_effect = RuntimeError("test")
+    batch.start()
+    connection.get.assert_called_with(
+        "/dev1234/system/owner", flat=True, settingsonly=False
+    )
+    with pytest.raises(KeyError):
+        batch.get_value("system/owner")
+    batch.end()
+
+
+def test_transaction_functions():
+    labber_instrument = MagicMock()
+    transaction = TransactionManager(MagicMock(), labber_instrument, max_workers=1)
+    transaction.start()
+    assert transaction.is_running()
+    transaction.add_function("b", "/awgs/0/b")
+    transaction.add_function("a", "/awgs/0/a")
+    transaction.add_function("b", "/awgs/0/b")
+    transaction.add_function("a", "/awgs/1/a")
+    transaction.end()
+    assert not transaction.is_running()
+    # every function is only called once in the order of the first occurrence
+    assert labber_instrument.call_function.call_args_list == [
+        call("b", "/awgs/0/b"),
+        call("a", "/awgs/0/a"),
+        call("a", "/awgs/1/a"),
+    ]
+
+
+def test_transaction_parallel():
+    # the files of both cores must be loaded at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    loaded = []
+    called = []
+    active = []
+
+    def function_loaders(name, path):
+        if name != "upload":
+            return []
+        return [lambda: loaded.append((path, barrier.wait()))]
+
+    def call_function(name, path):
+        # the functions are called one after another after loading
+        assert len(loaded) == 2
+        active.append(path)
+        assert len(active) == 1
+        called.append(path)
+        active.remove(path)
+
+    labber_instrument = MagicMock()
+    labber_instrument.function_loaders.side_effect = function_loaders
+    labber_instrument.call_function.side_effect = call_function
+    transaction = TransactionManager(MagicMock(), labber_instrument)
+    transaction.start()
+    transaction.add_function("upload", "/awgs/0/upload")
+    transaction.add_function("ct", "/awgs/0/commandtable/upload")
+    transaction.add_function("upload", "/awgs/1/upload")
+    transaction.end()
+    assert called == [
+        "/awgs/0/upload",
+        "/awgs/0/commandtable/upload",
+        "/awgs/1/upload",
+    ]
+
+    # no parallel loading with a single worker
+    labber_instrument.reset_mock()
+    transaction = TransactionManager(MagicMock(), labber_instrument, max_workers=1)
+    transaction.start()
+    transaction.add_function("upload", "/awgs/0/upload")
+    transaction.add_function("upload", "/awgs/1/upload")
+    transaction.end()
+    labber_instrument.function_loaders.assert_not_called()
+    assert labber_instrument.call_function.call_count == 2
+
+
+def test_transaction_errors():
+    def call_function(name, path):
+        if name == "fail":
+            raise RuntimeError(f"{path} failed")
+
+    labber_instrument = MagicMock()
+    labber_instrument.call_function.side_effect = call_function
+    transaction = TransactionManager(MagicMock(), labber_instrument)
+    transaction.start()
+    transaction.add_function("fail", "/awgs/0/upload")
+    transaction.add_function("ok", "/awgs/0/commandtable/upload")
+    transaction.add_function("fail", "/awgs/1/upload")
+    with pytest.raises(RuntimeError) as error:
+        transaction.end()
+    assert "fail (/awgs/0/upload): /awgs/0/upload failed" in str(error.value)
+    assert "fail (/awgs/1/upload): /awgs/1/upload failed" in str(error.value)
+    # the other functions are called regardless
+    assert labber_instrument.call_function.call_count == 3
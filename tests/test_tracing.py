@@ -0,0 +1,68 @@
+import json
+import threading
+
+import pytest
+
+from zhinst.labber.driver.tracing import Tracer
+
+
+def test_tracer(tmp_path):
+    tracer = Tracer("test")
+    with tracer.measure("set", "Quant - 1"):
+        with tracer.measure("node_set", "/dev1234/a"):
+            pass
+    with pytest.raises(RuntimeError):
+        with tracer.measure("function", "sequencer_program"):
+            raise RuntimeError("test")
+
+    def poll():
+        with tracer.measure("module", "poll"):
+            pass
+
+    worker = threading.Thread(target=poll, name="poller")
+    worker.start()
+    worker.join()
+    assert len(tracer) == 8
+
+    events = tracer.events()
+    assert events[0]["name"] == "process_name"
+    assert events[0]["args"] == {"name": "test"}
+    threads = {
+        e["tid"]: e["args"]["name"] for e in events if e["name"] == "thread_name"
+    }
+    assert threads[worker.ident] == "poller"
+    recorded = [(e["ph"], e["name"]) for e in events if e["ph"] != "M"]
+    assert recorded == [
+        ("B", "set Quant - 1"),
+        ("B", "node_set /dev1234/a"),
+        ("E", "node_set /dev1234/a"),
+        ("E", "set Quant - 1"),
+        ("B", "function sequencer_program"),
+        ("E", "function sequencer_program"),
+        ("B", "module poll"),
+        ("E", "module poll"),
+    ]
+    timestamps = [e["ts"] for e in events if e["ph"] != "M"]
+    assert timestamps == sorted(timestamps)
+
+    file = tracer.dump(tmp_path / "trace.json")
+    trace = json.loads(file.read_text())
+    assert trace["traceEvents"] == events
+    assert trace["otherData"] == {"dropped_operations": 0}
+
+    tracer.clear()
+    assert len(tracer) == 0
+
+
+def test_tracer_max_events():
+    tracer = Tracer(max_events=2)
+    with tracer.measure("set", "Quant - 1"):
+        with tracer.measure("set", "Quant - 2"):
+            # limit reached, end events are still added
+            with tracer.measure("set", "Quant - 3"):
+                pass
+    assert len(tracer) == 4
+    with tracer.measure("set", "Quant - 4"):
+        pass
+    assert len(tracer) == 4
+    assert tracer._dropped == 2
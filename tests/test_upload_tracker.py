@@ -0,0 +1,58 @@
+import numpy as np
+from zhinst.toolkit import Waveforms
+
+from zhinst.labber.driver.upload_tracker import UploadTracker, content_hash
+
+
+def test_content_hash():
+    waveforms = Waveforms()
+    waveforms[0] = (np.ones(8), np.zeros(8), None)
+    waveforms[2] = np.ones(4, dtype=complex)
+    digest = content_hash({"waveforms": waveforms})
+    assert digest == content_hash({"waveforms": waveforms})
+
+    other = Waveforms()
+    other[0] = (np.ones(8), np.zeros(8), None)
+    other[2] = np.ones(4, dtype=complex)
+    assert digest == content_hash({"waveforms": other})
+    other[2] = np.ones(4, dtype=float)
+    assert digest != content_hash({"waveforms": other})
+    other[2] = np.ones(4, dtype=complex)
+    other[3] = np.ones(4, dtype=complex)
+    assert digest != content_hash({"waveforms": other})
+    assert digest != content_hash({"pulses": waveforms})
+
+    assert content_hash({"ct": {"a": 1, "b": [1, 2]}}) == content_hash(
+        {"ct": {"b": [1, 2], "a": 1}}
+    )
+    assert content_hash({"ct": {"a": 1}}) != content_hash({"ct": {"a": 2}})
+    assert content_hash({"weights": np.ones(4)}) != content_hash(
+        {"weights": np.ones(5)}
+    )
+    assert content_hash({"value": np.arange(8)[::2]}) == content_hash(
+        {"value": np.array([0, 2, 4, 6])}
+    )
+
+
+def test_upload_tracker():
+    tracker = UploadTracker()
+    assert not tracker.is_uploaded("/awgs/0/write_to_waveform_memory", "a")
+    tracker.record("/awgs/0/write_to_waveform_memory", "a")
+    tracker.record("/awgs/0/commandtable/upload_to_device", "b")
+    tracker.record("/awgs/1/write_to_waveform_memory", "c")
+    tracker.record("/awgs/10/write_to_waveform_memory", "d")
+    assert tracker.is_uploaded("/awgs/0/write_to_waveform_memory", "a")
+    assert not tracker.is_uploaded("/awgs/0/write_to_waveform_memory", "b")
+
+    tracker.invalidate("/awgs/1")
+    assert not tracker.is_uploaded("/awgs/1/write_to_waveform_memory", "c")
+    assert tracker.is_uploaded("/awgs/10/write_to_waveform_memory", "d")
+    assert tracker.is_uploaded("/awgs/0/write_to_waveform_memory", "a")
+
+    tracker.invalidate("/awgs/0/write_to_waveform_memory")
+    assert not tracker.is_uploaded("/awgs/0/write_to_waveform_memory", "a")
+    assert tracker.is_uploaded("/awgs/0/commandtable/upload_to_device", "b")
+
+    tracker.invalidate()
+    assert not tracker.is_uploaded("/awgs/0/commandtable/upload_to_device", "b")
+    assert not tracker.is_uploaded("/awgs/10/write_to_waveform_memory", "d")
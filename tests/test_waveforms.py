@@ -0,0 +1,164 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from zhinst.labber.driver.waveforms import (
+    import_waveforms,
+    iter_waveform_chunks,
+    pipelined,
+)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def test_import_waveforms_dtypes():
+    waves = import_waveforms(DATA_DIR / "pulses.csv")
+    assert list(waves.keys()) == [0, 1, 3]
+    assert waves[0][0].dtype == complex
+    assert all(waves[0][0] == np.array([1.0 + 5.0j, 2.0 + 5.0j, 5.0 + 0.0j]))
+    assert waves[1][0].dtype == int
+    assert all(waves[1][0] == np.array([1, 4, 6]))
+    assert waves[0][1] is None
+    assert waves[0][2] is None
+
+
+def test_import_waveforms_all_files():
+    waves = import_waveforms(
+        DATA_DIR / "waves1.csv", DATA_DIR / "waves2.csv", DATA_DIR / "markers.csv"
+    )
+    assert list(waves.keys()) == [0, 2]
+    assert waves[0][0].dtype == float
+    assert all(waves[2][1] == np.array([8.0, -8.0] * 4))
+    assert waves[0][2] is None
+    assert all(waves[2][2] == np.array([1, 1, 1, 0, 1, 1, 1, 1]))
+
+    # missing optional files
+    waves = import_waveforms(DATA_DIR / "waves1.csv", DATA_DIR / "wav.csv")
+    assert waves[2][1] is None
+
+
+def test_import_waveforms_values(tmp_path):
+    csv_file = tmp_path / "waves.csv"
+    csv_file.write_text("1e-3,nan,-inf\r\n\r\n  \n0.5+1j, -2j\n")
+    waves = import_waveforms(csv_file)
+    assert list(waves.keys()) == [0, 3]
+    assert waves[0][0][0] == 1e-3
+    assert np.isnan(waves[0][0][1])
+    assert waves[0][0][2] == -np.inf
+    assert all(waves[3][0] == np.array([0.5 + 1j, -2j]))
+
+
+def test_import_waveforms_invalid(tmp_path):
+    csv_file = tmp_path / "waves.csv"
+    csv_file.write_text("1,1.5,a\n")
+    with pytest.raises(ValueError):
+        import_waveforms(csv_file)
+    for line in ("1,  ,3", "1,,3", "1.5,\t,3", "1,-", "1,2,", "0.5+1j, ,1"):
+        csv_file.write_text(line + "\n")
+        with pytest.raises(ValueError):
+            import_waveforms(csv_file)
+
+
+@pytest.mark.parametrize(
+    "line, partial",
+    [("1,2.5", [1, 2]), ("1.0,2,3abc", [1.0, 2.0, 3.0]), ("1,2.5,3", [1, 2])],
+)
+def test_import_waveforms_partial_parse(tmp_path, line, partial):
+    # numpy < 2 returns the values up to the first invalid one
+    csv_file = tmp_path / "waves.csv"
+    csv_file.write_text(line + "\n")
+    with patch("numpy.fromstring", return_value=np.array(partial)):
+        with pytest.raises(ValueError):
+            import_waveforms(csv_file)
+
+
+def test_import_waveforms_complex_suffix(tmp_path):
+    csv_file = tmp_path / "waves.csv"
+    csv_file.write_text("1+2J,3J\n")
+    waves = import_waveforms(csv_file)
+    assert all(waves[0][0] == np.array([1 + 2j, 3j]))
+    with pytest.raises(IOError):
+        import_waveforms(tmp_path / "missing.csv")
+
+
+def test_import_waveforms_npy(tmp_path):
+    waves1 = np.arange(12, dtype=float).reshape(3, 4)
+    markers = np.ones((3, 4), dtype=int)
+    np.save(tmp_path / "waves1.npy", waves1)
+    np.save(tmp_path / "markers.npy", markers)
+    waves = import_waveforms(
+        tmp_path / "waves1.npy", tmp_path / "waves2.npy", tmp_path / "markers.npy"
+    )
+    assert list(waves.keys()) == [0, 1, 2]
+    for slot in range(3):
+        # memory-mapped, no copy of the data
+        assert not waves[slot][0].flags.owndata
+        assert all(waves[slot][0] == waves1[slot])
+        assert waves[slot][1] is None
+        assert all(waves[slot][2] == markers[slot])
+
+    # single waveform
+    np.save(tmp_path / "wave.npy", np.array([1 + 1j, 2j]))
+    waves = import_waveforms(tmp_path / "wave.npy")
+    assert list(waves.keys()) == [0]
+    assert all(waves[0][0] == np.array([1 + 1j, 2j]))
+
+    # invalid dimension
+    np.save(tmp_path / "wave.npy", np.ones((2, 2, 2)))
+    with pytest.raises(ValueError):
+        import_waveforms(tmp_path / "wave.npy")
+    with pytest.raises(IOError):
+        import_waveforms(tmp_path / "missing.npy")
+
+
+def test_import_waveforms_npz(tmp_path):
+    np.savez(tmp_path / "waves1.npz", np.ones(4), np.zeros(4))
+    np.savez(tmp_path / "waves2.npz", **{"1": np.ones(4)})
+    waves = import_waveforms(
+        tmp_path / "waves1.npz", tmp_path / "waves2.npz", DATA_DIR / "markers.csv"
+    )
+    assert list(waves.keys()) == [0, 1]
+    assert all(waves[0][0] == np.ones(4))
+    assert waves[0][1] is None
+    assert all(waves[1][1] == np.ones(4))
+    assert waves[1][2] is None
+
+    np.savez(tmp_path / "invalid.npz", test=np.ones(4))
+    with pytest.raises(ValueError):
+        import_waveforms(tmp_path / "invalid.npz")
+
+
+def test_iter_waveform_chunks():
+    files = (DATA_DIR / "waves1.csv", DATA_DIR / "waves2.csv", DATA_DIR / "markers.csv")
+    chunks = list(iter_waveform_chunks(*files, chunk_size=1))
+    assert [list(chunk.keys()) for chunk in chunks] == [[0], [2]]
+    waves = import_waveforms(*files)
+    assert all(chunks[1][2][1] == waves[2][1])
+    assert all(chunks[1][2][2] == waves[2][2])
+
+    chunks = list(iter_waveform_chunks(DATA_DIR / "pulses.csv", chunk_size=2))
+    assert [list(chunk.keys()) for chunk in chunks] == [[0, 1], [3]]
+
+    with pytest.raises(IOError):
+        list(iter_waveform_chunks(DATA_DIR / "missing.csv"))
+
+
+def test_pipelined():
+    assert list(pipelined(iter(range(10)), 2)) == list(range(10))
+    assert list(pipelined([])) == []
+
+    def fail():
+        yield 1
+        raise ValueError("test")
+
+    items = pipelined(fail())
+    assert next(items) == 1
+    with pytest.raises(ValueError):
+        next(items)
+
+    # stopping early does not block the worker
+    items = pipelined(iter(range(100)))
+    assert next(items) == 0
+    items.close()